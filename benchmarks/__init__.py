@@ -0,0 +1,24 @@
+"""
+Offline load benchmarks for the MCP server.
+
+The server runs in-process with a stand-in vol.py (fake_vol.py) against
+sparse synthetic images, and load scenarios call its tools through a FastMCP
+client. Run with `python -m benchmarks`.
+"""
+from .images import DEFAULT_IMAGES, create_images, create_sparse_image
+from .scenarios import DEFAULT_PROFILE, Scenario, default_scenarios
+from .harness import ScenarioResult, configure_environment, load_server, run_suite, format_table
+
+__all__ = [
+    'DEFAULT_IMAGES',
+    'create_images',
+    'create_sparse_image',
+    'DEFAULT_PROFILE',
+    'Scenario',
+    'default_scenarios',
+    'ScenarioResult',
+    'configure_environment',
+    'load_server',
+    'run_suite',
+    'format_table',
+]
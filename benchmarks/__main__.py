@@ -0,0 +1,93 @@
+"""
+python -m benchmarks [--scenarios NAME ...] [--requests N] [--json FILE]
+
+Creates sparse images and a scratch cache in a temporary directory (or
+--work-dir), starts the server in-process on fake_vol.py and prints a table
+of throughput, latency percentiles and peak RSS per scenario.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+from .images import DEFAULT_IMAGES, create_images, parse_sizes
+from .scenarios import DEFAULT_PROFILE, default_scenarios
+from .harness import configure_environment, format_table, load_server, run_suite
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline MCP server load benchmarks")
+    parser.add_argument("--scenarios", nargs="+", metavar="NAME", help="Scenarios to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--requests", type=int, default=20, help="Base number of calls per scenario")
+    parser.add_argument("--concurrency", type=int, help="Override the concurrency of every scenario")
+    parser.add_argument("--image-sizes", nargs="+", metavar="SIZE",
+                        help="Synthetic image sizes such as 512M 4G (default: 256M 2G 8G)")
+    parser.add_argument("--profile", help="fake_vol.py behaviour as JSON or a JSON file (see fake_vol.py)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply the fake plugin latencies, e.g. 0 to measure pure server overhead")
+    parser.add_argument("--work-dir", help="Keep images and caches here instead of a temporary directory")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    scenarios = default_scenarios(args.requests)
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario.name:22} {scenario.description}")
+        return 0
+    if args.scenarios:
+        unknown = set(args.scenarios) - {scenario.name for scenario in scenarios}
+        if unknown:
+            parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in scenarios if scenario.name in args.scenarios]
+    if args.concurrency:
+        for scenario in scenarios:
+            scenario.concurrency = args.concurrency
+
+    profile = DEFAULT_PROFILE
+    if args.profile:
+        from .fake_vol import load_profiles
+        profile = load_profiles(args.profile)
+    if args.latency_scale != 1.0:
+        profile = json.loads(json.dumps(profile))
+        for entry in [profile.get("default") or {}] + list((profile.get("plugins") or {}).values()):
+            for key in ("latency", "automagic"):
+                if key in entry:
+                    entry[key] *= args.latency_scale
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="volatility-mcp-bench-")
+    try:
+        images_dir = os.path.join(work_dir, "images")
+        sizes = parse_sizes(args.image_sizes) if args.image_sizes else DEFAULT_IMAGES
+        images = create_images(images_dir, sizes)
+        configure_environment(work_dir, images_dir, profile)
+        server = load_server()
+
+        print(f"Python {platform.python_version()}, {os.cpu_count()} CPUs, "
+              f"{server.VOLATILITY_MAX_CONCURRENT} execution slots, work dir {work_dir}", file=sys.stderr)
+        results = asyncio.run(run_suite(server, scenarios, images,
+                                        progress=lambda message: print(message, file=sys.stderr)))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(format_table(results))
+    for result in results:
+        if result.first_error:
+            print(f"\n{result.name}: {result.errors} errors, first: {result.first_error}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "images": sizes,
+                "profile": profile,
+                "results": [result.to_dict() for result in results],
+            }, f, indent=2)
+    return 1 if any(result.errors for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
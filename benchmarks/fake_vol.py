@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Stand-in for vol.py used by the benchmarks.
+
+Accepts the command lines VolatilityRunner builds, sleeps instead of
+analysing the image and prints synthetic rows in the layout of volatility's
+quick text renderer, or of the JSON renderer with `-r json`. Progress lines
+go to stderr like vol.py's, and `--save-config` writes an automagic-shaped
+configuration, so the automagic cache, result cache, streaming and progress
+paths of the server all see realistic traffic without volatility, symbols
+or a real memory image.
+
+How each plugin behaves comes from the JSON in FAKE_VOL_PROFILE (inline or
+the path of a file), e.g.
+
+    {"default": {"latency": 0.2, "rows": 100},
+     "plugins": {"windows.filescan.FileScan": {"latency": 2, "rows": 20000}}}
+
+with the keys of PluginProfile. Runs without a `--config` pay `automagic`
+seconds on top of `latency`, as a first run against an image does.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+if __package__ in (None, ""):
+    # Started as a script by VolatilityRunner: make the server's packages importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.invocation import VolatilityInvocation, parse_cmd_args
+
+VERSION = "2.0.0-fake"
+PAGE_SIZE = 4096
+
+COLUMNS = ("PID", "PPID", "ImageFileName", "Offset(V)", "Threads", "Handles", "CreateTime", "Detail")
+
+@dataclass
+class PluginProfile:
+    """Behaviour of one fake plugin"""
+
+    # Seconds the plugin runs, and how much that varies (0.2 = +-20%)
+    latency: float = 0.2
+    jitter: float = 0.0
+    # Extra seconds for runs that do not get a cached configuration via --config
+    automagic: float = 0.0
+    # Rows printed, and the length of the Detail column of each
+    rows: int = 100
+    row_bytes: int = 40
+    # Every n-th row is a child of the row before it (0: flat output)
+    tree_every: int = 0
+    # Progress lines written to stderr over the run
+    progress_steps: int = 5
+    # Pages of the image read, spread evenly over it
+    read_pages: int = 0
+    # Fraction of runs that fail with a volatility-style error
+    fail_rate: float = 0.0
+
+def load_profiles(spec: Optional[str]) -> Dict[str, Any]:
+    """Parse FAKE_VOL_PROFILE, which holds JSON or the path of a JSON file"""
+    if not spec:
+        return {}
+    if not spec.lstrip().startswith("{"):
+        with open(spec) as f:
+            return json.load(f)
+    return json.loads(spec)
+
+def profile_for(plugin: str, profiles: Dict[str, Any]) -> PluginProfile:
+    """Defaults overlaid with the profile's "default" entry and the plugin's own entry"""
+    known = {f.name for f in fields(PluginProfile)}
+    values = {}
+    for entry in (profiles.get("default") or {}, (profiles.get("plugins") or {}).get(plugin) or {}):
+        values.update({key: value for key, value in entry.items() if key in known})
+    return PluginProfile(**values)
+
+def make_rows(invocation: VolatilityInvocation, profile: PluginProfile) -> List[Dict[str, Any]]:
+    """Deterministic rows for a plugin and image, nested where the profile asks for a tree"""
+    seed = zlib.crc32(f"{invocation.plugin}|{invocation.file}".encode())
+    rng = random.Random(seed)
+    wanted = {int(pid) for pid in invocation.plugin_args.get("pid", []) if pid.isdigit()}
+    roots: List[Dict[str, Any]] = []
+    for index in range(profile.rows):
+        pid = 4 + index * 4
+        if wanted and pid not in wanted:
+            continue
+        row = {
+            "PID": pid,
+            "PPID": 4 + rng.randrange(max(index, 1)) * 4 if index else 0,
+            "ImageFileName": f"proc{index % 997:03d}.exe",
+            "Offset(V)": 0xfa8000000000 + index * 0x1000,
+            "Threads": rng.randrange(1, 64),
+            "Handles": rng.randrange(0, 4096) if rng.random() > 0.1 else None,
+            "CreateTime": f"2024-01-01T00:{(index // 60) % 60:02d}:{index % 60:02d}+00:00",
+            "Detail": "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(profile.row_bytes)),
+            "__children": [],
+        }
+        if profile.tree_every and roots and index % profile.tree_every:
+            roots[-1]["__children"].append(row)
+        else:
+            roots.append(row)
+    return roots
+
+def render_text(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"Volatility 3 Framework {VERSION}", "", "\t".join(COLUMNS), ""]
+    stack = [(row, 0) for row in reversed(rows)]
+    while stack:
+        row, level = stack.pop()
+        cells = ["N/A" if row[column] is None else str(row[column]) for column in COLUMNS]
+        if level:
+            cells[0] = "*" * level + " " + cells[0]
+        lines.append("\t".join(cells))
+        stack.extend((child, level + 1) for child in reversed(row["__children"]))
+    return "\n".join(lines) + "\n"
+
+def touch_image(path: str, pages: int) -> None:
+    """Read `pages` pages spread over the image, as a scan would"""
+    size = os.path.getsize(path)
+    if not pages or not size:
+        return
+    step = max(size // pages, PAGE_SIZE)
+    with open(path, "rb") as f:
+        for offset in range(0, size, step):
+            f.seek(offset)
+            f.read(PAGE_SIZE)
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    invocation = parse_cmd_args(argv)
+    if invocation.help or not invocation.plugin:
+        argparse.ArgumentParser(prog="vol.py", description="Fake volatility for benchmarks").print_help()
+        return 0
+    if not invocation.file or not os.path.isfile(invocation.file):
+        sys.stderr.write(f"Unable to open memory image {invocation.file}\n")
+        return 1
+
+    profile = profile_for(invocation.plugin, load_profiles(os.environ.get("FAKE_VOL_PROFILE")))
+    rng = random.Random()
+    duration = profile.latency * (1 + rng.uniform(-profile.jitter, profile.jitter))
+    if not (invocation.config and os.path.isfile(invocation.config)):
+        duration += profile.automagic
+
+    touch_image(invocation.file, profile.read_pages)
+    steps = max(profile.progress_steps, 1)
+    for step in range(steps):
+        sys.stderr.write(f"\rProgress: {100.0 * step / steps:7.2f}\t\tScanning FileLayer using FakeScanner")
+        sys.stderr.flush()
+        time.sleep(max(duration, 0) / steps)
+    sys.stderr.write(f"\rProgress: {100.0:7.2f}\t\tPDB scanning finished\n")
+
+    if rng.random() < profile.fail_rate:
+        sys.stderr.write("Unsatisfied requirement plugins.FakePlugin.kernel.layer_name\n")
+        return 1
+
+    if invocation.save_config:
+        with open(invocation.save_config, "w") as f:
+            json.dump({
+                "kernel.class": "volatility3.framework.contexts.Module",
+                "kernel.layer_name.class": "volatility3.framework.layers.intel.WindowsIntel32e",
+                "kernel.layer_name.memory_layer.location": "file://" + os.path.abspath(invocation.file),
+                "kernel.offset": 0xf80000000000,
+                "pid": invocation.plugin_args.get("pid", []),
+            }, f)
+
+    rows = make_rows(invocation, profile)
+    if invocation.renderer == "json":
+        sys.stdout.write(json.dumps(rows, indent=2))
+    else:
+        sys.stdout.write(render_text(rows))
+    sys.stdout.flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
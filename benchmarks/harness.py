@@ -0,0 +1,190 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.process_control import read_peak_rss, reset_peak_rss
+from core.runtime_stats import quantile
+
+from .scenarios import Scenario
+
+FAKE_VOL_SCRIPT = Path(__file__).with_name("fake_vol.py")
+
+@dataclass
+class ScenarioResult:
+    """Latency and resource figures of one scenario"""
+
+    name: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    # Completed calls per second
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    response_bytes: int
+    # Peak RSS of the server process during the scenario, and the largest peak of the
+    # volatility processes it ran (as reported by core/launcher.py)
+    server_peak_rss: int
+    child_peak_rss: int
+    first_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        for key in ("seconds", "throughput", "p50", "p95", "p99", "max"):
+            result[key] = round(result[key], 4)
+        return result
+
+def configure_environment(work_dir: str, images_dir: str, profile: Dict[str, Any]) -> None:
+    """
+    Point the server at fake_vol.py and a scratch cache before it is imported
+
+    The server reads its configuration when it is imported, so this has to run
+    first. Other settings (VOLATILITY_MAX_CONCURRENT, RESULT_CACHE, ...) are
+    taken from the environment as they are, to benchmark a given configuration,
+    except SCAN_INDEX and NORMALIZE_IMAGES: both rewrite invocations (to
+    indexedscan.* plugins or converted images) that fake_vol.py neither runs
+    nor profiles, so they are always off.
+    """
+    os.environ["VOLATILITY_BACKEND"] = "subprocess"
+    os.environ["VOLATILITY_PYTHON"] = sys.executable
+    os.environ["VOLATILITY_SCRIPT"] = str(FAKE_VOL_SCRIPT)
+    os.environ["VOLATILITY_DIR"] = os.path.join(work_dir, "volatility3")
+    os.environ["SYMBOLS_DIR"] = os.path.join(work_dir, "symbols")
+    os.environ["MEMORY_IMAGES_DIR"] = images_dir
+    os.environ["CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["FAKE_VOL_PROFILE"] = json.dumps(profile)
+    os.environ["SCAN_INDEX"] = "false"
+    os.environ["NORMALIZE_IMAGES"] = "false"
+    for directory in (os.environ["VOLATILITY_DIR"], os.environ["SYMBOLS_DIR"], images_dir):
+        os.makedirs(directory, exist_ok=True)
+
+class ChildUsage:
+    """
+    Largest peak RSS of the volatility processes a server ran
+
+    Wraps the server's RunMetrics.observe_run, which receives the usage the
+    launcher measured for each run. (RUSAGE_CHILDREN would count the server's
+    own pages in every child forked before exec.)
+    """
+
+    def __init__(self, run_metrics):
+        self.peak_rss = 0
+        observe_run = run_metrics.observe_run
+
+        def observe(plugin, family, seconds, outcome, usage=None):
+            if usage is not None:
+                self.peak_rss = max(self.peak_rss, usage.peak_rss)
+            observe_run(plugin, family, seconds, outcome, usage)
+
+        run_metrics.observe_run = observe
+
+def load_server():
+    """Import the server module (after configure_environment) with its logging switched off"""
+    root = str(Path(__file__).resolve().parent.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    server = importlib.import_module("volatility_mcp_server")
+    # The server logs every command it runs, which would dominate the timings of fast calls
+    logging.disable(logging.WARNING)
+    server.child_usage = ChildUsage(server.run_metrics)
+    return server
+
+async def run_scenario(client, scenario: Scenario, images: Sequence[str],
+                       child_usage: Optional[ChildUsage] = None) -> ScenarioResult:
+    """
+    Run one scenario through an MCP client
+
+    `scenario.concurrency` callers take call indices from a shared counter
+    until `scenario.requests` calls have been made; each call's latency is
+    measured from the client side.
+    """
+    for index in range(scenario.warmup):
+        await scenario.call(client, index, images)
+
+    reset_peak_rss()
+    if child_usage is not None:
+        child_usage.peak_rss = 0
+    latencies: List[float] = []
+    errors: List[str] = []
+    received = 0
+    next_index = 0
+
+    async def caller() -> None:
+        nonlocal next_index, received
+        while next_index < scenario.requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                text = await scenario.call(client, index, images)
+            except Exception as e:
+                text = f"Error: {type(e).__name__}: {e}"
+            latencies.append(time.perf_counter() - started)
+            received += len(text.encode("utf-8", errors="replace"))
+            if text.startswith("Error"):
+                errors.append(text)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(max(1, scenario.concurrency))))
+    seconds = time.perf_counter() - started
+
+    return ScenarioResult(
+        name=scenario.name,
+        concurrency=scenario.concurrency,
+        requests=len(latencies),
+        errors=len(errors),
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else 0.0,
+        p50=quantile(latencies, 0.5) if latencies else 0.0,
+        p95=quantile(latencies, 0.95) if latencies else 0.0,
+        p99=quantile(latencies, 0.99) if latencies else 0.0,
+        max=max(latencies, default=0.0),
+        response_bytes=received,
+        server_peak_rss=read_peak_rss(),
+        child_peak_rss=child_usage.peak_rss if child_usage is not None else 0,
+        first_error=errors[0][:300] if errors else None,
+    )
+
+async def run_suite(server, scenarios: Sequence[Scenario], images: Sequence[str],
+                    progress=None) -> List[ScenarioResult]:
+    """Run scenarios one after another against the server's FastMCP instance"""
+    from fastmcp import Client
+
+    results = []
+    async with Client(server.mcp) as client:
+        for scenario in scenarios:
+            if progress is not None:
+                progress(f"{scenario.name}: {scenario.description}")
+            results.append(await run_scenario(client, scenario, images, getattr(server, "child_usage", None)))
+    return results
+
+def _mib(value: int) -> str:
+    return f"{value / 1024 ** 2:.0f}"
+
+def format_table(results: Sequence[ScenarioResult]) -> str:
+    """Results as a fixed-width text table (latencies in milliseconds, RSS in MiB)"""
+    header = ("scenario", "conc", "reqs", "err", "req/s", "p50 ms", "p95 ms", "p99 ms",
+              "MiB out", "srv RSS", "vol RSS")
+    rows = [header] + [(
+        result.name, str(result.concurrency), str(result.requests), str(result.errors),
+        f"{result.throughput:.1f}", f"{result.p50 * 1000:.0f}", f"{result.p95 * 1000:.0f}",
+        f"{result.p99 * 1000:.0f}", f"{result.response_bytes / 1024 ** 2:.1f}",
+        _mib(result.server_peak_rss), _mib(result.child_peak_rss),
+    ) for result in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = []
+    for row in rows:
+        lines.append("  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))
+        ))
+    return "\n".join(lines)
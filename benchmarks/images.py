@@ -0,0 +1,70 @@
+import os
+import random
+from typing import Dict, Iterable, List
+
+PAGE_SIZE = 4096
+
+# Default image set: name -> size in bytes
+DEFAULT_IMAGES: Dict[str, int] = {
+    "bench-small.raw": 256 * 1024 ** 2,
+    "bench-medium.raw": 2 * 1024 ** 3,
+    "bench-large.raw": 8 * 1024 ** 3,
+}
+
+def create_sparse_image(path: str, size: int, data_pages: int = 64, seed: int = 0) -> str:
+    """
+    Create a sparse file standing in for a memory image
+
+    Only `data_pages` pages spread over the file hold (pseudo-random) data, so
+    multi-gigabyte images cost a few hundred KiB of disk and fingerprint
+    differently per seed. An existing file of the right size is kept.
+
+    Args:
+        path: File to create
+        size: Apparent size in bytes
+        data_pages: Number of non-zero pages
+        seed: Seed for the page contents
+
+    Returns:
+        The path
+    """
+    if os.path.isfile(path) and os.path.getsize(path) == size:
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = random.Random(seed)
+    pages = max(size // PAGE_SIZE, 1)
+    with open(path + ".tmp", "wb") as f:
+        f.truncate(size)
+        for index in range(min(data_pages, pages)):
+            f.seek(index * pages // max(data_pages, 1) * PAGE_SIZE)
+            f.write(rng.randbytes(min(PAGE_SIZE, size)))
+    os.replace(path + ".tmp", path)
+    return path
+
+def create_images(directory: str, images: Dict[str, int] = None) -> List[str]:
+    """Create the benchmark image set in a directory; returns the paths"""
+    images = DEFAULT_IMAGES if images is None else images
+    return [
+        create_sparse_image(os.path.join(directory, name), size, seed=index)
+        for index, (name, size) in enumerate(images.items())
+    ]
+
+def parse_sizes(specs: Iterable[str]) -> Dict[str, int]:
+    """
+    Parse image sizes such as "512M" or "4G" into an image set
+
+    Raises:
+        ValueError: a size cannot be parsed
+    """
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    images = {}
+    for spec in specs:
+        spec = spec.strip().upper().rstrip("B")
+        multiplier = units.get(spec[-1:], 1)
+        number = spec[:-1] if spec[-1:] in units else spec
+        try:
+            size = int(float(number) * multiplier)
+        except ValueError:
+            raise ValueError(f"Invalid image size '{spec}'; use e.g. 512M or 4G")
+        images[f"bench-{spec.lower()}.raw"] = size
+    return images
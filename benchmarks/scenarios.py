@@ -0,0 +1,111 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+TRIAGE_PLUGINS = ["windows.PsList", "windows.PsScan", "windows.NetScan", "windows.CmdLine",
+                  "windows.DllList", "windows.Malfind", "windows.SvcScan"]
+
+# fake_vol.py behaviour used unless the caller passes its own (see fake_vol.PluginProfile)
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "default": {"latency": 0.2, "jitter": 0.3, "automagic": 1.0, "rows": 200, "row_bytes": 40},
+    "plugins": {
+        "windows.pstree.PsTree": {"rows": 500, "tree_every": 4},
+        "windows.dlllist.DllList": {"rows": 5000, "row_bytes": 80},
+        "windows.filescan.FileScan": {"latency": 1.0, "rows": 20000, "row_bytes": 60, "read_pages": 4096},
+        "windows.malfind.Malfind": {"latency": 0.5, "rows": 50, "row_bytes": 400},
+    },
+}
+
+# Called with (client, call index, image paths); returns the tool result text
+Call = Callable[[Any, int, Sequence[str]], Awaitable[str]]
+
+async def call_tool(client, tool: str, arguments: Dict[str, Any]) -> str:
+    """Call an MCP tool; tool errors are returned as "Error: ..." like the server's own errors"""
+    result = await client.call_tool(tool, arguments, raise_on_error=False)
+    text = "".join(getattr(block, "text", "") for block in result.content)
+    return f"Error: {text}" if result.is_error else text
+
+@dataclass
+class Scenario:
+    """A load pattern: `requests` calls, `concurrency` of them in flight at a time"""
+
+    name: str
+    description: str
+    call: Call
+    concurrency: int = 1
+    requests: int = 20
+    # Calls made before measuring, e.g. to fill the result cache
+    warmup: int = 0
+
+def tool_call(tool: str, arguments: Callable[[int, Sequence[str]], Dict[str, Any]]) -> Call:
+    """Call of one tool with arguments derived from the call index and the images"""
+    async def call(client, index: int, images: Sequence[str]) -> str:
+        return await call_tool(client, tool, arguments(index, images))
+    return call
+
+def run_plugin(plugin: str, cached: bool = False, **extra: Any) -> Call:
+    """run_plugin round-robin over the images, bypassing the result cache unless `cached`"""
+    return tool_call("run_plugin", lambda index, images: {
+        "memory_dump_path": images[index % len(images)],
+        "plugin_name": plugin,
+        "no_cache": not cached,
+        **extra,
+    })
+
+def run_plugins(plugins: List[str]) -> Call:
+    # Shared-process batches load the real volatility framework, which the fake does not replace
+    return tool_call("run_plugins", lambda index, images: {
+        "memory_dump_path": images[index % len(images)],
+        "plugins": plugins,
+        "no_cache": True,
+        "shared_process": False,
+    })
+
+def submit_and_wait(plugin: str) -> Call:
+    """submit_plugin followed by get_job_result polling until the job has finished"""
+    async def call(client, index: int, images: Sequence[str]) -> str:
+        submitted = await call_tool(client, "submit_plugin", {
+            "memory_dump_path": images[index % len(images)], "plugin_name": plugin, "no_cache": True})
+        try:
+            job_id = json.loads(submitted)["job_id"]
+        except (ValueError, KeyError, TypeError):
+            return submitted if submitted.startswith("Error") else f"Error: {submitted}"
+        while True:
+            result = await call_tool(client, "get_job_result", {"job_id": job_id, "wait": 5})
+            try:
+                pending = json.loads(result).get("message") == "Job has not finished yet"
+            except (ValueError, AttributeError):
+                pending = False
+            if not pending:
+                return result
+    return call
+
+def default_scenarios(requests: int = 20) -> List[Scenario]:
+    """The standard suite; `requests` scales the number of calls per scenario"""
+    scenarios = [
+        Scenario("list_dumps", "list_memory_dumps over the image directory",
+                 tool_call("list_memory_dumps", lambda index, images: {}), 1, requests * 5),
+        Scenario("list_dumps_c8", "list_memory_dumps, 8 concurrent callers",
+                 tool_call("list_memory_dumps", lambda index, images: {}), 8, requests * 5),
+    ]
+    for concurrency in (1, 4, 16):
+        scenarios.append(Scenario(
+            f"pslist_c{concurrency}", f"run_plugin PsList without the result cache, {concurrency} concurrent",
+            run_plugin("windows.PsList"), concurrency, requests))
+    scenarios += [
+        Scenario("pslist_cached_c16", "run_plugin PsList answered from the result cache, 16 concurrent",
+                 run_plugin("windows.PsList", cached=True), 16, requests * 5, warmup=3),
+        Scenario("dlllist_json_c4", "run_plugin DllList, 5000 rows as JSON pages, 4 concurrent",
+                 run_plugin("windows.DllList", output_format="json"), 4, requests),
+        Scenario("dlllist_filtered_c4", "run_plugin DllList filtered on a PID range, 4 concurrent",
+                 run_plugin("windows.DllList", filters={"PID": {"min": 100, "max": 400}}), 4, requests),
+        Scenario("filescan_c2", "run_plugin FileScan, 20000 rows in one response, 2 concurrent",
+                 run_plugin("windows.FileScan", page_size=0), 2, max(requests // 4, 2)),
+        Scenario("triage_batch", "run_plugins with the 7-plugin triage set, one process per plugin",
+                 run_plugins(TRIAGE_PLUGINS), 1, max(requests // 4, 2)),
+        Scenario("triage_batch_c4", "run_plugins triage set, 4 concurrent batches",
+                 run_plugins(TRIAGE_PLUGINS), 4, max(requests // 2, 4)),
+        Scenario("jobs_c8", "submit_plugin PsTree and poll get_job_result, 8 concurrent",
+                 submit_and_wait("windows.PsTree"), 8, requests),
+    ]
+    return scenarios
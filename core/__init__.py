@@ -0,0 +1,101 @@
+from .invocation import VolatilityInvocation, parse_cmd_args
+from .runner import BaseVolatilityRunner, RunResult, VolatilityRunner
+from .inprocess_runner import InProcessVolatilityRunner, FrameworkSession
+from .worker_pool import ImageWorkerPool
+from .fingerprint import ImageFingerprinter
+from .config_cache import AutomagicConfigCache
+from .result_cache import ResultCache
+from .options import RunOptions, get_run_options, set_run_options, reset_run_options
+from .streaming import OutputSink
+from .rendering import OUTPUT_FORMATS, TabularResult, parse_json_output
+from .result_store import ResultStore, StoredResult
+from .scheduler import JobScheduler, Ticket, PRIORITIES
+from .filtering import PID_FILTER_PLUGINS, compile_condition, select_rows, filter_pids, push_down_pids
+from .batch import PluginBatch
+from .process_control import ResourceLimits, ProcessUsage, UsageReport, ProcessPool, spawn_options, terminate_process
+from .jobs import Job, JobManager, JOB_STATES
+from .fanout import SPLITTABLE_RENDERERS, split_by_pid, with_pids
+from .runtime_stats import RuntimeHistory, RuntimeEstimate, os_family
+from .metrics import MetricsRegistry, RunMetrics, Counter, Histogram, Collected
+from .profiling import ProfileStore, summarize_profile
+from .normalization import ImageNormalizer, detect_container, CONTAINER_PLUGINS
+from .decompression import DecompressionCache, compression_format, COMPRESSED_SUFFIXES
+from .sparse import ImageSparsifier, SparseReport, SparseWriter, allocated_bytes, punch_zero_pages, write_sparse, zero_runs
+from .memscan import PhysicalScanner, ScanRules, pattern_source
+from .scan_index import ScanIndex, INDEXED_PLUGINS
+from .symbol_index import SymbolIndex, IDENTIFIER_PATTERNS
+
+__all__ = [
+    'VolatilityInvocation',
+    'parse_cmd_args',
+    'BaseVolatilityRunner',
+    'RunResult',
+    'VolatilityRunner',
+    'InProcessVolatilityRunner',
+    'FrameworkSession',
+    'ImageWorkerPool',
+    'ImageFingerprinter',
+    'AutomagicConfigCache',
+    'ResultCache',
+    'RunOptions',
+    'get_run_options',
+    'set_run_options',
+    'reset_run_options',
+    'OutputSink',
+    'OUTPUT_FORMATS',
+    'TabularResult',
+    'parse_json_output',
+    'ResultStore',
+    'StoredResult',
+    'PID_FILTER_PLUGINS',
+    'compile_condition',
+    'select_rows',
+    'filter_pids',
+    'push_down_pids',
+    'JobScheduler',
+    'Ticket',
+    'PRIORITIES',
+    'PluginBatch',
+    'SPLITTABLE_RENDERERS',
+    'split_by_pid',
+    'with_pids',
+    'Job',
+    'JobManager',
+    'JOB_STATES',
+    'ResourceLimits',
+    'ProcessUsage',
+    'UsageReport',
+    'ProcessPool',
+    'spawn_options',
+    'terminate_process',
+    'RuntimeHistory',
+    'RuntimeEstimate',
+    'os_family',
+    'MetricsRegistry',
+    'RunMetrics',
+    'Counter',
+    'Histogram',
+    'Collected',
+    'ProfileStore',
+    'summarize_profile',
+    'ImageNormalizer',
+    'detect_container',
+    'CONTAINER_PLUGINS',
+    'DecompressionCache',
+    'compression_format',
+    'COMPRESSED_SUFFIXES',
+    'ImageSparsifier',
+    'SparseReport',
+    'SparseWriter',
+    'allocated_bytes',
+    'punch_zero_pages',
+    'write_sparse',
+    'zero_runs',
+    'PhysicalScanner',
+    'ScanRules',
+    'pattern_source',
+    'ScanIndex',
+    'INDEXED_PLUGINS',
+    'SymbolIndex',
+    'IDENTIFIER_PATTERNS',
+]
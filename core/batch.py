@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from .invocation import VolatilityInvocation
+from .runner import RunResult
+from .runtime_stats import os_family
+
+logger = logging.getLogger(__name__)
+
+class PluginBatch:
+    """
+    Gathers the invocations of plugins started together so the runner can
+    execute them in a single process sharing one volatility context.
+
+    Each member task either reaches the runner, which submits its invocation
+    here, or finishes without running volatility (cache hit, validation
+    error) and is withdrawn when it leaves `member()`. Once every member has
+    done one or the other, the collected invocations are executed as one batch.
+    A batch whose members have all been cancelled is cancelled too, which
+    kills its driver process.
+    """
+
+    def __init__(self, runner, members: int, threads: int = 1, priority: str = "interactive"):
+        """
+        Initialize PluginBatch
+
+        Args:
+            runner: Runner with `supports_batches` set
+            members: Number of member tasks that will join the batch
+            threads: Threads the driver runs plugins on after the first one
+            priority: Scheduling class of the batch
+        """
+        self.runner = runner
+        self.threads = threads
+        self.priority = priority
+        self._outstanding = members
+        self._pending: List[Tuple[VolatilityInvocation, int, asyncio.Future]] = []
+        self._submitted: Set[asyncio.Task] = set()
+        # Running batch -> its entries
+        self._tasks: Dict[asyncio.Task, List[Tuple[VolatilityInvocation, int, asyncio.Future]]] = {}
+
+    def member(self):
+        """Context manager wrapping the work of one member task"""
+        return _Membership(self)
+
+    async def submit(self, invocation: VolatilityInvocation, timeout: int) -> RunResult:
+        """Add an invocation to the batch and wait for its result"""
+        task = asyncio.current_task()
+        if task not in self._submitted:
+            # A member counts once, however many invocations it submits
+            self._submitted.add(task)
+            self._outstanding -= 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((invocation, timeout, future))
+        self._maybe_flush()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            future.cancel()
+            self._cancel_abandoned()
+            raise
+
+    def withdraw(self) -> None:
+        """Record that a member finished without submitting"""
+        self._outstanding -= 1
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if self._outstanding > 0 or not self._pending:
+            return
+        # Members cancelled while waiting for the others are left out
+        entries = [entry for entry in self._pending if not entry[2].done()]
+        self._pending = []
+        if not entries:
+            return
+        task = asyncio.ensure_future(self._run(entries))
+        self._tasks[task] = entries
+        task.add_done_callback(lambda done: self._tasks.pop(done, None))
+
+    def _cancel_abandoned(self) -> None:
+        """Cancel the batches no member is waiting for any more"""
+        for task, entries in list(self._tasks.items()):
+            if all(future.cancelled() for _, _, future in entries):
+                logger.info(f"Cancelling a plugin batch of {len(entries)} abandoned by all its members")
+                task.cancel()
+        self._maybe_flush()
+
+    async def _run(self, entries: List[Tuple[VolatilityInvocation, int, asyncio.Future]]) -> None:
+        invocations = [invocation for invocation, _, _ in entries]
+        timeout = max(timeout for _, timeout, _ in entries)
+
+        metrics = getattr(self.runner, "metrics", None)
+
+        def on_result(index: int, result: RunResult) -> None:
+            future = entries[index][2]
+            if not future.done():
+                future.set_result(result)
+                if metrics is not None and invocations[index].plugin:
+                    # Plugins in a batch share one process and are not timed one by one
+                    plugin = invocations[index].plugin
+                    family = os_family(plugin, self.runner.image_os(invocations[index].file))
+                    metrics.observe_run(plugin, family, None, "success" if result.success else "failure")
+
+        error: Optional[str] = None
+        try:
+            scheduler = getattr(self.runner, "scheduler", None)
+            if scheduler is not None:
+                async with scheduler.slot(invocations[0].file, self.priority) as ticket:
+                    if metrics is not None:
+                        metrics.observe_queue_wait(self.priority, ticket.wait_time)
+                    error = await self.runner._execute_batch(invocations, timeout, self.threads, on_result)
+            else:
+                error = await self.runner._execute_batch(invocations, timeout, self.threads, on_result)
+        except Exception as e:
+            logger.exception("Plugin batch failed")
+            error = f"Exception running plugin batch: {str(e)}"
+        finally:
+            for index in range(len(entries)):
+                on_result(index, RunResult(error or "Plugin driver returned no result", False))
+
+class _Membership:
+    def __init__(self, batch: PluginBatch):
+        self.batch = batch
+
+    async def __aenter__(self) -> PluginBatch:
+        return self.batch
+
+    async def __aexit__(self, *exc_info) -> None:
+        if asyncio.current_task() not in self.batch._submitted:
+            self.batch.withdraw()
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from typing import Dict, Optional
+
+from .fingerprint import ImageFingerprinter
+from .inprocess_runner import automagic_config
+from .invocation import VolatilityInvocation
+from .versioning import symbols_fingerprint, volatility_version
+
+logger = logging.getLogger(__name__)
+
+# Class of the kernel symbol table automagic chose, e.g. volatility3.framework.symbols.windows.WindowsKernelIntermedSymbols
+_KERNEL_SYMBOLS_CLASS = re.compile(r"^volatility3\.framework\.symbols\.(windows|linux|mac)\.\w*KernelIntermedSymbols$")
+
+class AutomagicConfigCache:
+    """
+    Per-image cache of the configuration volatility's automagics discover.
+
+    Plugin runs against an image are started with `--save-config`; the layer,
+    symbol table and module requirements they found are merged into a
+    configuration stored keyed by the image. Later runs get the stored file
+    through `--config`, which satisfies those requirements up front and skips
+    the page-table and kernel search. Entries record the volatility version and
+    symbol set they were produced with and are dropped when either changes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        volatility_dir: str,
+        symbols_dir: str,
+        fingerprinter: Optional[ImageFingerprinter] = None
+    ):
+        """
+        Initialize AutomagicConfigCache
+
+        Args:
+            cache_dir: Directory where configurations are stored
+            volatility_dir: Volatility 3 checkout, used to detect version changes
+            symbols_dir: Symbol directory, used to detect symbol set changes
+            fingerprinter: ImageFingerprinter identifying images (a private one if None)
+        """
+        self.cache_dir = cache_dir
+        self.volatility_dir = volatility_dir
+        self.symbols_dir = symbols_dir
+        self.fingerprinter = fingerprinter or ImageFingerprinter()
+        # SymbolIndex pointing stored configurations at decompressed copies of their ISFs
+        self.symbol_index = None
+        # Image key -> OS family of its kernel symbol table
+        self._image_os: Dict[str, str] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _environment(self) -> dict:
+        return {
+            "volatility_version": volatility_version(self.volatility_dir),
+            "symbols": symbols_fingerprint(self.symbols_dir),
+        }
+
+    def _key(self, image_path: str) -> str:
+        # The stored configuration embeds the image location, so the path is part of the key
+        identity = f"{self.fingerprinter.fingerprint(image_path)}\0{os.path.realpath(image_path)}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".config.json", base + ".meta.json"
+
+    def lookup(self, image_path: str) -> Optional[str]:
+        """
+        Return the stored configuration file for an image, if it is still valid
+        """
+        config_path, meta_path = self._paths(self._key(image_path))
+        if not os.path.isfile(config_path) or not os.path.isfile(meta_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta != self._environment():
+            logger.info(f"Discarding stale automagic configuration for {image_path}")
+            self.invalidate(image_path)
+            return None
+        return config_path
+
+    def image_os(self, image_path: str) -> Optional[str]:
+        """
+        OS family of an image ('windows', 'linux' or 'mac'), from the kernel symbol table in its stored configuration
+
+        Returns:
+            The family, or None if no run on the image has found its kernel yet
+        """
+        try:
+            key = self._key(image_path)
+        except OSError:
+            return None
+        family = self._image_os.get(key)
+        if family is None:
+            try:
+                with open(self._paths(key)[0]) as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                return None
+            for name, value in config.items():
+                match = _KERNEL_SYMBOLS_CLASS.match(value) if name.endswith(".class") and isinstance(value, str) else None
+                if match:
+                    family = self._image_os[key] = match.group(1)
+                    break
+        return family
+
+    def invalidate(self, image_path: str) -> None:
+        """Forget the stored configuration for an image"""
+        for path in self._paths(self._key(image_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def prepare(self, invocation: VolatilityInvocation) -> Optional[str]:
+        """
+        Point an invocation at the cached configuration and arrange to capture what it finds
+
+        Returns:
+            Path the run will save its configuration to, or None if the invocation is not cacheable
+        """
+        if not invocation.file or invocation.help or invocation.config or invocation.save_config:
+            return None
+        if not os.path.isfile(invocation.file):
+            return None
+
+        invocation.config = self.lookup(invocation.file)
+        if invocation.config and self.symbol_index is not None:
+            invocation.config = self.symbol_index.localize(invocation.config)
+        invocation.save_config = os.path.join(self.cache_dir, f"capture-{uuid.uuid4().hex}.json")
+        return invocation.save_config
+
+    def commit(self, invocation: VolatilityInvocation, capture_path: str, success: bool) -> None:
+        """Merge the requirement branches a successful run found into the image's cached configuration"""
+        try:
+            if not success or not os.path.isfile(capture_path):
+                return
+            with open(capture_path) as f:
+                captured = automagic_config(json.load(f))
+
+            config_path, meta_path = self._paths(self._key(invocation.file))
+            config = {}
+            if invocation.config and os.path.isfile(config_path):
+                with open(config_path) as f:
+                    config = json.load(f)
+
+            # Different plugins name their requirements differently (kernel, primary, ...);
+            # keep every branch seen so far and add only the ones that are new
+            known = {key.split(".", 1)[0] for key in config}
+            new = {key: value for key, value in captured.items() if key.split(".", 1)[0] not in known}
+            if not new:
+                return
+            config.update(new)
+
+            # Write to temporary files first so concurrent runs never read a partial config
+            # (under unique names, as runs on the same image may commit at once)
+            for path, data in ((meta_path, self._environment()), (config_path, config)):
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                try:
+                    with open(tmp_path, "w") as f:
+                        json.dump(data, f, sort_keys=True, indent=2)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            logger.info(f"Cached automagic configuration for {invocation.file}")
+        except Exception as e:
+            # The run itself succeeded; a configuration that cannot be cached only costs speed
+            logger.warning(f"Could not cache automagic configuration: {str(e)}")
+        finally:
+            try:
+                os.remove(capture_path)
+            except OSError:
+                pass
@@ -0,0 +1,311 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import os
+import shutil
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for .zst dumps
+    zstandard = None
+
+from .fingerprint import ImageFingerprinter
+from .sparse import write_sparse
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the supported compressed formats
+MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"PK\x03\x04", "zip"),
+)
+COMPRESSED_SUFFIXES = (".gz", ".gzip", ".xz", ".zst", ".zstd", ".zip")
+
+def compression_format(path: str) -> Optional[str]:
+    """The compression format of a file from its leading bytes ("gzip", "xz", "zstd", "zip"), or None"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(8)
+    except OSError:
+        return None
+    for magic, name in MAGIC:
+        if header.startswith(magic):
+            return name
+    return None
+
+class _HashingReader:
+    """File wrapper that hashes the compressed bytes as the decompressor reads them"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.digest.update(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        count = self.raw.readinto(buffer)
+        self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def readable(self) -> bool:
+        return True
+
+class DecompressionCache:
+    """
+    Decompressed copies of compressed memory dumps (.gz, .xz, .zst, .zip).
+
+    A compressed dump is stream-decompressed once into a sparse raw file under
+    `cache_dir`: runs of zero bytes become holes, so free physical memory costs
+    no disk. The SHA-256 of the decompressed image (and of the archive, except
+    for zip) is computed while writing and handed to the fingerprinter. Entries
+    are keyed by the archive's path and (device, inode, mtime, size), so a
+    replaced archive is decompressed again. Concurrent requests for the same
+    archive wait on one decompression. The disk space actually used is kept
+    under `max_bytes` by deleting the least recently used copies.
+    """
+
+    INDEX = "index.json"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        fingerprinter: Optional[ImageFingerprinter] = None,
+        chunk_bytes: int = 1024 * 1024
+    ):
+        """
+        Initialize DecompressionCache
+
+        Args:
+            cache_dir: Directory for the decompressed images
+            max_bytes: Budget for the disk space the images occupy
+            fingerprinter: ImageFingerprinter to give the full hashes to
+            chunk_bytes: Read size while decompressing
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprinter = fingerprinter
+        self.chunk_bytes = chunk_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Key -> record, least recently used first
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.decompressions = 0
+        self.hits = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.cache_dir, self.INDEX)
+        try:
+            with open(index_path) as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            records = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable decompression index {index_path}: {e}")
+            records = {}
+        for key, record in sorted(records.items(), key=lambda item: item[1].get("last_used", 0)):
+            if os.path.isfile(record.get("path", "")):
+                self._records[key] = record
+
+    def remove_orphans(self) -> None:
+        """
+        Remove copies a crash left unfinished or unindexed
+
+        Call once when the server starts, before any decompression: the work
+        directory of one in progress is not indexed yet either.
+        """
+        with self._lock:
+            keep = set(self._records) | set(self._tasks)
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and entry.name not in keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _save_index(self) -> None:
+        index_path = os.path.join(self.cache_dir, self.INDEX)
+        try:
+            with open(index_path + ".tmp", "w") as f:
+                json.dump(self._records, f, indent=2)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as e:
+            logger.warning(f"Could not save decompression index {index_path}: {e}")
+
+    @staticmethod
+    def _key(real_path: str) -> str:
+        stat = os.stat(real_path)
+        identity = f"{real_path}|{stat.st_dev}|{stat.st_ino}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _output_name(real_path: str, member: Optional[str] = None) -> str:
+        name = os.path.basename(member or real_path)
+        if member is None:
+            root, extension = os.path.splitext(name)
+            if extension.lower() in COMPRESSED_SUFFIXES:
+                name = root
+        return name if os.path.splitext(name)[1] else name + ".raw"
+
+    def lookup(self, path: str) -> Optional[str]:
+        """Decompressed copy of an archive, if one exists for its current contents"""
+        real_path = os.path.realpath(path)
+        try:
+            key = self._key(real_path)
+        except OSError:
+            return None
+        with self._lock:
+            record = self._records.get(key)
+            if record is None or not os.path.isfile(record["path"]):
+                return None
+            self._records.move_to_end(key)
+            if time.time() - record.get("last_used", 0) > 60:
+                # Persist the LRU order now and then rather than on every run
+                record["last_used"] = time.time()
+                self._save_index()
+            return record["path"]
+
+    async def extract(self, path: str) -> str:
+        """
+        Path of the decompressed image, decompressing the archive first if needed
+
+        Raises:
+            ValueError: the file is not a supported archive, or holds no file
+            OSError: reading the archive or writing the copy failed
+        """
+        cached = self.lookup(path)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        real_path = os.path.realpath(path)
+        key = self._key(real_path)
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._decompress, real_path, key))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # One caller giving up must not cancel the decompression the others wait for
+        return await asyncio.shield(task)
+
+    def _open(self, real_path: str, compression: str, raw):
+        """Decompressing stream over `raw` and the name of the image inside"""
+        if compression == "gzip":
+            return gzip.GzipFile(fileobj=raw, mode="rb"), self._output_name(real_path)
+        if compression == "xz":
+            return lzma.LZMAFile(raw, mode="rb"), self._output_name(real_path)
+        if compression == "zstd":
+            if zstandard is None:
+                raise ValueError("Decompressing .zst dumps requires the zstandard package (pip install zstandard)")
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            return reader, self._output_name(real_path)
+        if compression == "zip":
+            archive = zipfile.ZipFile(raw)
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if not members:
+                raise ValueError(f"{real_path} contains no files")
+            # Evidence archives hold the image, possibly next to notes and hashes
+            member = max(members, key=lambda info: info.file_size)
+            return archive.open(member), self._output_name(real_path, member.filename)
+        raise ValueError(f"{real_path} is not a gzip, xz, zstd or zip file")
+
+    def _decompress(self, real_path: str, key: str) -> str:
+        compression = compression_format(real_path)
+        if compression is None:
+            raise ValueError(f"{real_path} is not a gzip, xz, zstd or zip file")
+        work_dir = os.path.join(self.cache_dir, key)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        started = time.monotonic()
+        logger.info(f"Decompressing {compression} dump {real_path}")
+        try:
+            with open(real_path, "rb") as raw:
+                # zipfile seeks around the archive, so only streamed formats get an archive hash
+                source = raw if compression == "zip" else _HashingReader(raw)
+                stream, name = self._open(real_path, compression, source)
+                target = os.path.join(work_dir, name)
+                digest = hashlib.sha256()
+                with stream, open(target + ".part", "wb") as output:
+                    copied = write_sparse(stream, output, self.chunk_bytes, digest)
+            os.replace(target + ".part", target)
+        except BaseException:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        stat = os.stat(target)
+        record = {
+            "source": real_path,
+            "path": target,
+            "format": compression,
+            "size": copied["size"],
+            "disk_bytes": getattr(stat, "st_blocks", 0) * 512 or copied["size"],
+            "sha256": digest.hexdigest(),
+            "archive_sha256": source.digest.hexdigest() if isinstance(source, _HashingReader) else None,
+            "seconds": round(time.monotonic() - started, 1),
+            "last_used": time.time(),
+        }
+        logger.info(f"Decompressed {real_path} to {target}: {copied['size']} bytes, "
+                    f"{copied['zero_bytes']} of them zero and left sparse, in {record['seconds']}s")
+        if self.fingerprinter is not None:
+            try:
+                self.fingerprinter.record_full_hash(target, record["sha256"])
+            except OSError as e:
+                logger.warning(f"Could not fingerprint {target}: {e}")
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            self.decompressions += 1
+            self._evict(keep=key)
+            self._save_index()
+        return target
+
+    def _evict(self, keep: str) -> None:
+        """Delete least recently used copies until the rest fit the budget (lock held)"""
+        total = sum(record["disk_bytes"] for record in self._records.values())
+        for key in list(self._records):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                # The image just decompressed is about to be used, even if it alone exceeds the budget
+                continue
+            record = self._records.pop(key)
+            shutil.rmtree(os.path.dirname(record["path"]), ignore_errors=True)
+            total -= record["disk_bytes"]
+            self.evictions += 1
+            logger.info(f"Evicted decompressed copy of {record['source']}")
+
+    def info(self, path: str) -> Optional[Dict[str, Any]]:
+        """Record of the decompressed copy of an archive (sizes, hashes), or None"""
+        real_path = os.path.realpath(path)
+        try:
+            key = self._key(real_path)
+        except OSError:
+            return None
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": len(self._records),
+                "bytes": sum(record["size"] for record in self._records.values()),
+                "disk_bytes": sum(record["disk_bytes"] for record in self._records.values()),
+                "max_bytes": self.max_bytes,
+                "decompressing": len(self._tasks),
+                "decompressions": self.decompressions,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,87 @@
+import json
+from typing import Dict, List, Optional
+
+from .invocation import VolatilityInvocation
+
+# Renderers whose output split_by_pid can take apart ("quick" is vol.py's default text renderer)
+SPLITTABLE_RENDERERS = (None, "quick", "json")
+
+def with_pids(invocation: VolatilityInvocation, pids: List[int]) -> VolatilityInvocation:
+    """Copy of an invocation restricted to the given PIDs with --pid"""
+    plugin_args = {name: list(values) for name, values in invocation.plugin_args.items() if name != "pid"}
+    plugin_args["pid"] = [str(pid) for pid in pids]
+    return VolatilityInvocation(
+        plugin=invocation.plugin,
+        file=invocation.file,
+        config=invocation.config,
+        renderer=invocation.renderer,
+        output_dir=invocation.output_dir,
+        symbol_dirs=invocation.symbol_dirs,
+        save_config=invocation.save_config,
+        plugin_dirs=invocation.plugin_dirs,
+        plugin_args=plugin_args,
+        extra_global_args=list(invocation.extra_global_args),
+        help=invocation.help,
+    )
+
+def split_by_pid(output: str, renderer: Optional[str], pids: List[int], pid_column: str = "PID") -> Dict[int, str]:
+    """
+    Split the output of a multi-PID run into the outputs single-PID runs would have produced
+
+    Top-level rows are assigned by their `pid_column` value and child rows follow
+    their parent. Every requested PID gets an entry, with no rows if the run had none for it.
+
+    Args:
+        output: Output of the quick text or JSON renderer
+        renderer: Renderer that produced the output
+        pids: PIDs the run was restricted to
+        pid_column: Column holding the process ID
+
+    Returns:
+        Output per PID, in the order of `pids`
+
+    Raises:
+        ValueError: the output has no `pid_column` column or is not renderer output
+    """
+    if renderer not in SPLITTABLE_RENDERERS:
+        raise ValueError(f"Output of the '{renderer}' renderer cannot be split by PID")
+    if renderer == "json":
+        return _split_json(output, pids, pid_column)
+    return _split_text(output, pids, pid_column)
+
+def _split_json(output: str, pids: List[int], pid_column: str) -> Dict[int, str]:
+    rows = json.loads(output)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON list of rows")
+    groups: Dict[int, list] = {pid: [] for pid in pids}
+    for row in rows:
+        if not isinstance(row, dict) or pid_column not in row:
+            raise ValueError(f"Row without a '{pid_column}' column")
+        if row[pid_column] in groups:
+            groups[row[pid_column]].append(row)
+    return {pid: json.dumps(group, indent=2) + "\n" for pid, group in groups.items()}
+
+def _split_text(output: str, pids: List[int], pid_column: str) -> Dict[int, str]:
+    # Quick renderer layout: [banner]\n\n<header>\n\n<row>\n<row>\n, child rows prefixed with "*"
+    lines = output.split("\n")
+    header_index = next((i for i, line in enumerate(lines) if pid_column in line.split("\t")), None)
+    if header_index is None:
+        raise ValueError(f"No '{pid_column}' column in the output")
+    position = lines[header_index].split("\t").index(pid_column)
+
+    groups: Dict[int, List[str]] = {pid: [] for pid in pids}
+    current = None
+    for line in lines[header_index + 1:]:
+        if not line:
+            continue
+        if not line.startswith("*"):
+            values = line.split("\t")
+            try:
+                current = int(values[position]) if position < len(values) else None
+            except ValueError:
+                current = None
+        if current in groups:
+            groups[current].append(line)
+
+    head = lines[:header_index + 1] + [""]
+    return {pid: "\n".join(head + rows + [""]) for pid, rows in groups.items()}
@@ -0,0 +1,162 @@
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from .invocation import VolatilityInvocation
+from .rendering import TabularResult
+
+# Volatility plugins whose --pid option takes a list of PIDs and restricts the
+# output to rows of exactly those processes, so a PID filter can be handed to
+# volatility instead of being applied after the whole image was walked
+PID_FILTER_PLUGINS = {
+    "windows": {
+        "CmdLine", "DllList", "Envars", "GetSIDs", "Handles", "LdrModules",
+        "Malfind", "Privs", "PsList", "PsScan", "Sessions", "VadInfo", "VadWalk",
+    },
+    "linux": {"Bash", "Elfs", "Envars", "Lsof", "Malfind", "Maps", "PsAux", "PsList"},
+    "mac": {"Bash", "Lsof", "Malfind", "Maps", "Netstat", "Psaux", "PsList"},
+}
+
+CONDITION_KEYS = ("eq", "ne", "in", "min", "max", "regex")
+
+def _resolve_column(table: TabularResult, name: str) -> int:
+    """Index of a column, matched case-insensitively"""
+    lowered = [column.lower() for column in table.columns]
+    if name.lower() not in lowered:
+        raise ValueError(f"Unknown column '{name}'. Columns: {', '.join(table.columns)}")
+    return lowered.index(name.lower())
+
+def _coerce(value: Any, column_type: str) -> Any:
+    # Let callers write PIDs and offsets as strings ("4", "0x1000") against integer columns
+    if column_type == "int" and isinstance(value, str):
+        try:
+            return int(value, 0)
+        except ValueError:
+            return value
+    return value
+
+def compile_condition(condition: Any, column_type: str = "str") -> Callable[[Any], bool]:
+    """
+    Compile one column condition into a predicate
+
+    Args:
+        condition: A value (equality), a list (membership), or a dict combining
+            "eq", "ne", "in", "min", "max" (inclusive) and "regex" (searched in the value as text)
+        column_type: Type of the column as reported by TabularResult.types
+
+    Returns:
+        A function taking a cell value and returning whether it matches
+
+    Raises:
+        ValueError: the condition is malformed
+    """
+    if isinstance(condition, list):
+        condition = {"in": condition}
+    elif not isinstance(condition, dict):
+        condition = {"eq": condition}
+
+    unknown = set(condition) - set(CONDITION_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filter condition(s) {sorted(unknown)}. Use: {', '.join(CONDITION_KEYS)}")
+
+    predicates: List[Callable[[Any], bool]] = []
+    if "eq" in condition:
+        expected = _coerce(condition["eq"], column_type)
+        predicates.append(lambda value: value == expected)
+    if "ne" in condition:
+        excluded = _coerce(condition["ne"], column_type)
+        predicates.append(lambda value: value != excluded)
+    if "in" in condition:
+        if not isinstance(condition["in"], list):
+            raise ValueError("Filter condition 'in' expects a list")
+        allowed = {_coerce(item, column_type) for item in condition["in"]}
+        predicates.append(lambda value: value in allowed)
+    if "min" in condition:
+        low = _coerce(condition["min"], column_type)
+        predicates.append(lambda value: value is not None and value >= low)
+    if "max" in condition:
+        high = _coerce(condition["max"], column_type)
+        predicates.append(lambda value: value is not None and value <= high)
+    if "regex" in condition:
+        try:
+            pattern = re.compile(condition["regex"])
+        except re.error as e:
+            raise ValueError(f"Invalid regex '{condition['regex']}': {str(e)}")
+        predicates.append(lambda value: value is not None and pattern.search(str(value)) is not None)
+
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda value: all(predicate(value) for predicate in predicates)
+
+def select_rows(
+    table: TabularResult,
+    filters: Optional[Dict[str, Any]] = None,
+    columns: Optional[List[str]] = None
+) -> TabularResult:
+    """
+    Filter the rows of a table and project its columns
+
+    Conditions on different columns must all hold. Each predicate is applied
+    to its column array in turn, narrowing the surviving row indices, so
+    selective conditions listed first cut down the work of later ones.
+
+    Raises:
+        ValueError: a column is unknown or a condition is malformed
+    """
+    indices = range(table.row_count)
+    for name, condition in (filters or {}).items():
+        position = _resolve_column(table, name)
+        values = table.data[position]
+        try:
+            predicate = compile_condition(condition, table.types[position])
+            indices = [i for i in indices if predicate(values[i])]
+        except TypeError as e:
+            raise ValueError(f"Filter on column '{table.columns[position]}' does not fit its values: {str(e)}")
+
+    positions = [_resolve_column(table, name) for name in columns] if columns else range(len(table.columns))
+    return TabularResult(
+        columns=[table.columns[p] for p in positions],
+        types=[table.types[p] for p in positions],
+        data=[[table.data[p][i] for i in indices] for p in positions],
+        depth=[table.depth[i] for i in indices],
+    )
+
+def filter_pids(filters: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    PIDs a filter restricts the result to, if it pins the PID column to specific values
+
+    Returns:
+        The PIDs from an equality or list condition on a "pid" column, or None
+    """
+    for name, condition in (filters or {}).items():
+        if name.lower() != "pid":
+            continue
+        if isinstance(condition, dict):
+            if set(condition) == {"eq"}:
+                values = [condition["eq"]]
+            elif set(condition) == {"in"}:
+                values = condition["in"]
+            else:
+                return None
+        else:
+            values = condition if isinstance(condition, list) else [condition]
+        pids = [_coerce(value, "int") for value in values]
+        if not pids or not all(isinstance(pid, int) and not isinstance(pid, bool) for pid in pids):
+            return None
+        return pids
+    return None
+
+def push_down_pids(invocation: VolatilityInvocation, pids: Optional[List[int]]) -> bool:
+    """
+    Add --pid to an invocation whose plugin supports PID lists and has none yet
+
+    Returns:
+        True if the option was added
+    """
+    if not pids or not invocation.plugin or "pid" in invocation.plugin_args:
+        return False
+    os_name = invocation.plugin.split(".", 1)[0].lower()
+    class_name = invocation.plugin.rsplit(".", 1)[-1]
+    if class_name not in PID_FILTER_PLUGINS.get(os_name, ()):
+        return False
+    invocation.plugin_args["pid"] = [str(pid) for pid in pids]
+    return True
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ImageFingerprinter:
+    """
+    Fast identity for multi-GB memory images.
+
+    Instead of hashing the whole file, the fingerprint covers the file size,
+    the header and a deterministic set of pages sampled across the image via
+    mmap, so it costs a few hundred page reads regardless of image size.
+    Results are persisted next to the (device, inode, mtime, size) they were
+    computed for and only recomputed when the file changes. A full SHA-256
+    can be computed in the background on request.
+    """
+
+    HEADER_BYTES = 64 * 1024
+    PAGE_SIZE = 4096
+
+    def __init__(self, store_dir: Optional[str] = None, sample_pages: int = 256):
+        """
+        Initialize ImageFingerprinter
+
+        Args:
+            store_dir: Directory where fingerprint records are persisted (memory only if None)
+            sample_pages: Number of pages sampled across the image
+        """
+        self.store_dir = store_dir
+        self.sample_pages = sample_pages
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._hashing: Dict[str, threading.Thread] = {}
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    @staticmethod
+    def _stat_key(stat: os.stat_result) -> Dict[str, int]:
+        return {
+            "dev": stat.st_dev,
+            "ino": stat.st_ino,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _record_path(self, real_path: str) -> Optional[str]:
+        if not self.store_dir:
+            return None
+        name = hashlib.sha256(real_path.encode()).hexdigest()
+        return os.path.join(self.store_dir, name + ".json")
+
+    def _load(self, real_path: str, stat_key: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        record = self._records.get(real_path)
+        if record is None:
+            path = self._record_path(real_path)
+            if path and os.path.isfile(path):
+                try:
+                    with open(path) as f:
+                        record = json.load(f)
+                except (OSError, ValueError):
+                    record = None
+        if record is None or record.get("stat") != stat_key:
+            return None
+        self._records[real_path] = record
+        return record
+
+    def _save(self, real_path: str, record: Dict[str, Any]) -> None:
+        self._records[real_path] = record
+        path = self._record_path(real_path)
+        if path:
+            try:
+                with open(path + ".tmp", "w") as f:
+                    json.dump(record, f)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                logger.warning(f"Could not save fingerprint record {path}: {e}")
+
+    def sample_offsets(self, size: int):
+        """Page-aligned offsets sampled from an image of the given size"""
+        pages = size // self.PAGE_SIZE
+        if pages <= self.sample_pages:
+            return [page * self.PAGE_SIZE for page in range(pages)]
+        # Half evenly spaced, half pseudo-random; both depend only on the size
+        spaced = {(pages - 1) * i // (self.sample_pages // 2) for i in range(self.sample_pages // 2)}
+        rng = random.Random(size)
+        scattered = set(rng.sample(range(pages), self.sample_pages - len(spaced)))
+        return [page * self.PAGE_SIZE for page in sorted(spaced | scattered | {pages - 1})]
+
+    def _compute(self, image_path: str, size: int) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"size:{size}\n".encode())
+        if size == 0:
+            return digest.hexdigest()
+
+        with open(image_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            digest.update(view[:self.HEADER_BYTES])
+            for offset in self.sample_offsets(size):
+                digest.update(view[offset:offset + self.PAGE_SIZE])
+        return digest.hexdigest()
+
+    def fingerprint(self, image_path: str) -> str:
+        """
+        Return the sampled fingerprint of an image, computing it only if the file changed
+
+        Raises:
+            OSError: the image cannot be read
+        """
+        real_path = os.path.realpath(image_path)
+        stat_key = self._stat_key(os.stat(real_path))
+        with self._lock:
+            record = self._load(real_path, stat_key)
+        if record is not None:
+            return record["fingerprint"]
+
+        fingerprint = self._compute(real_path, stat_key["size"])
+        with self._lock:
+            self._save(real_path, {"path": real_path, "stat": stat_key, "fingerprint": fingerprint})
+        return fingerprint
+
+    def identity(self, image_path: str) -> str:
+        """
+        Key for results derived from an image's contents
+
+        Mixes the size and mtime of the file into the sampled fingerprint, so an
+        in-place change the sampled pages miss still yields a new key, while a
+        copy or move that keeps the mtime keeps it too.
+
+        Raises:
+            OSError: the image cannot be read
+        """
+        real_path = os.path.realpath(image_path)
+        stat = os.stat(real_path)
+        identity = {"fingerprint": self.fingerprint(real_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def full_hash(self, image_path: str) -> Optional[str]:
+        """Return the full SHA-256 of an image if it has been computed for its current contents"""
+        real_path = os.path.realpath(image_path)
+        with self._lock:
+            record = self._load(real_path, self._stat_key(os.stat(real_path)))
+        return record.get("sha256") if record else None
+
+    def record_full_hash(self, image_path: str, sha256: str) -> None:
+        """Store a full SHA-256 computed elsewhere, e.g. while the image was being written"""
+        real_path = os.path.realpath(image_path)
+        self.fingerprint(real_path)
+        with self._lock:
+            record = self._load(real_path, self._stat_key(os.stat(real_path)))
+            if record is not None:
+                record["sha256"] = sha256
+                self._save(real_path, record)
+
+    def start_full_hash(self, image_path: str) -> bool:
+        """
+        Compute the full SHA-256 of an image in a background thread
+
+        Returns:
+            True if a computation was started, False if one is running or the hash is known
+        """
+        real_path = os.path.realpath(image_path)
+        self.fingerprint(real_path)
+        if self.full_hash(real_path):
+            return False
+        with self._lock:
+            running = self._hashing.get(real_path)
+            if running is not None and running.is_alive():
+                return False
+            thread = threading.Thread(target=self._hash_file, args=(real_path,), daemon=True)
+            self._hashing[real_path] = thread
+        thread.start()
+        return True
+
+    def is_hashing(self, image_path: str) -> bool:
+        """Whether a background full hash is running for an image"""
+        with self._lock:
+            running = self._hashing.get(os.path.realpath(image_path))
+        return running is not None and running.is_alive()
+
+    def _hash_file(self, real_path: str) -> None:
+        try:
+            stat_key = self._stat_key(os.stat(real_path))
+            digest = hashlib.sha256()
+            with open(real_path, "rb") as f:
+                for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+                    digest.update(chunk)
+            with self._lock:
+                record = self._load(real_path, stat_key)
+                # The file may have changed while it was being read
+                if record is not None and self._stat_key(os.stat(real_path)) == stat_key:
+                    record["sha256"] = digest.hexdigest()
+                    self._save(real_path, record)
+            logger.info(f"Full SHA-256 computed for {real_path}")
+        except OSError as e:
+            logger.warning(f"Could not hash {real_path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._hashing.pop(real_path, None)
@@ -0,0 +1,689 @@
+import asyncio
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib import parse
+
+from .invocation import VolatilityInvocation
+from .options import get_run_options
+from .process_control import JobUsage, ProcessUsage, ResourceLimits, worker_context
+from .runner import BaseVolatilityRunner, RunResult
+from .streaming import OutputSink
+
+logger = logging.getLogger(__name__)
+
+class ThreadLocalStdout(io.TextIOBase):
+    """
+    sys.stdout replacement that sends each thread's writes to its own target.
+
+    Volatility's renderers print to sys.stdout, and contextlib.redirect_stdout
+    swaps it for the whole process, so plugins rendering on several threads
+    would interleave their output. Writes from threads without a target go to
+    `default`.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return (getattr(self._local, "target", None) or self._default).write(text)
+
+    def flush(self) -> None:
+        (getattr(self._local, "target", None) or self._default).flush()
+
+    @contextlib.contextmanager
+    def redirect(self, target):
+        previous = getattr(self._local, "target", None)
+        self._local.target = target
+        try:
+            yield target
+        finally:
+            self._local.target = previous
+
+def capture_stdout(target):
+    """Redirect renderer output to `target` for this thread if sys.stdout is a ThreadLocalStdout, else process-wide"""
+    if isinstance(sys.stdout, ThreadLocalStdout):
+        return sys.stdout.redirect(target)
+    return contextlib.redirect_stdout(target)
+
+class FrameworkSession:
+    """
+    Volatility 3 framework state owned by a single worker process.
+
+    The framework import, plugin discovery and renderer lookup happen once when
+    the session is created, so each run only pays for automagic and the plugin itself.
+    """
+
+    def __init__(self, volatility_dir: str, pinned_image: Optional[str] = None):
+        self.pinned_image = pinned_image
+        self._pinned_context = None
+        self._pinned_config: Optional[Dict[str, Any]] = None
+        # Held by the thread running on the pinned context (multi_driver runs plugins on threads)
+        self._pinned_lock = threading.Lock()
+
+        if volatility_dir and volatility_dir not in sys.path:
+            sys.path.insert(0, volatility_dir)
+
+        import volatility3.plugins
+        from volatility3 import framework
+        from volatility3.cli import text_renderer
+
+        framework.require_interface_version(2, 0, 0)
+        self.failures = framework.import_files(volatility3.plugins, True)
+        self.plugin_list = framework.list_plugins()
+        self.renderers = {
+            renderer.name.lower(): renderer
+            for renderer in framework.class_subclasses(text_renderer.CLIRenderer)
+        }
+
+        class OrderedJsonRenderer(text_renderer.JsonRenderer):
+            # vol.py sorts the keys of each row; keep the plugin's column order instead
+            def output_result(self, outfd, result):
+                outfd.write(f"{json.dumps(result, indent=2)}\n")
+
+        self.renderers["json"] = OrderedJsonRenderer
+
+    def run(
+        self,
+        invocation: VolatilityInvocation,
+        outfd: Optional[io.TextIOBase] = None,
+        progress: Optional[Callable[[float, str], None]] = None
+    ) -> str:
+        """
+        Run one invocation and return the rendered output
+
+        If `outfd` is given the renderer writes to it as rows are produced and
+        an empty string is returned. `progress` receives volatility's
+        (percent, description) progress reports.
+
+        Invocations against the pinned image share one context, so the layers,
+        symbol tables and modules stacked by the first run stay resident and are
+        handed to later plugins through their configuration instead of being
+        rediscovered by automagic. One thread at a time uses that context; runs
+        on other threads meanwhile get a private context with the same configuration.
+        """
+        from volatility3.framework import contexts
+
+        if self.pinned_image is None or invocation.file is None or invocation.help:
+            return self._run_in_context(contexts.Context(), invocation, outfd, progress=progress)
+        if os.path.realpath(invocation.file) != self.pinned_image:
+            return self._run_in_context(contexts.Context(), invocation, outfd, progress=progress)
+
+        if not self._pinned_lock.acquire(blocking=False):
+            # Another thread is running on the shared context, whose configuration and layer
+            # and symbol spaces are not thread-safe; use a private context seeded with the
+            # captured configuration, which lets automagic rebuild the layers without searching
+            return self._run_in_context(contexts.Context(), invocation, outfd, reuse_config=True, progress=progress)
+        try:
+            if self._pinned_context is None:
+                self._pinned_context = contexts.Context()
+            return self._run_in_context(self._pinned_context, invocation, outfd, reuse_config=True,
+                                        progress=progress)
+        finally:
+            self._pinned_lock.release()
+
+    def _run_in_context(
+        self,
+        ctx,
+        invocation: VolatilityInvocation,
+        outfd: Optional[io.TextIOBase] = None,
+        reuse_config: bool = False,
+        progress: Optional[Callable[[float, str], None]] = None
+    ) -> str:
+        import volatility3.symbols
+        from volatility3 import cli
+        from volatility3.framework import automagic, constants, exceptions, interfaces, plugins
+        from volatility3.framework.automagic import stacker
+        from volatility3.framework.configuration import requirements
+
+        if invocation.plugin_dirs:
+            self._add_plugin_dirs(invocation.plugin_dirs)
+        if invocation.plugin not in self.plugin_list:
+            raise ValueError(f"Volatility plugin '{invocation.plugin}' not found")
+        plugin = self.plugin_list[invocation.plugin]
+
+        if invocation.help:
+            return self._describe_requirements(plugin)
+
+        if invocation.symbol_dirs:
+            volatility3.symbols.__path__ = [
+                os.path.abspath(p) for p in invocation.symbol_dirs.split(";")
+            ] + constants.SYMBOL_BASEPATHS
+
+        base_config_path = "plugins"
+        plugin_config_path = interfaces.configuration.path_join(base_config_path, plugin.__name__)
+
+        if invocation.file:
+            ctx.config["automagic.LayerStacker.single_location"] = (
+                requirements.URIRequirement.location_from_file(invocation.file)
+            )
+
+        if invocation.config:
+            with open(invocation.config) as f:
+                ctx.config.splice(
+                    plugin_config_path,
+                    interfaces.configuration.HierarchicalDict(json.load(f)),
+                )
+        elif reuse_config:
+            # Splicing replaces the plugin's whole subtree, so options of an earlier run of
+            # this plugin on the shared context (--pid, --dump, ...) do not carry over
+            ctx.config.splice(
+                plugin_config_path,
+                interfaces.configuration.HierarchicalDict(self._pinned_config or {}),
+            )
+
+        automagics = automagic.choose_automagic(automagic.available(ctx), plugin)
+        if ctx.config.get("automagic.LayerStacker.stackers", None) is None:
+            ctx.config["automagic.LayerStacker.stackers"] = stacker.choose_os_stackers(plugin)
+
+        for name, value in self._plugin_options(plugin, invocation.plugin_args).items():
+            ctx.config[interfaces.configuration.path_join(plugin_config_path, name)] = value
+
+        # Reuse the CLI's file handlers so dumped files land where vol.py would put them
+        command_line = cli.CommandLine()
+        command_line.output_dir = invocation.output_dir or os.getcwd()
+
+        try:
+            constructed = plugins.construct_plugin(
+                ctx,
+                automagics,
+                plugin,
+                base_config_path,
+                progress or cli.MuteProgress(),
+                command_line.file_handler_class_factory(),
+            )
+        except exceptions.UnsatisfiedException as excp:
+            raise ValueError(
+                f"Unable to validate the plugin requirements: {[x for x in excp.unsatisfied]}"
+            )
+
+        if invocation.save_config:
+            with open(invocation.save_config, "w") as f:
+                json.dump(dict(constructed.build_configuration()), f, sort_keys=True, indent=2)
+                f.write("\n")
+        if reuse_config and not self._pinned_config:
+            self._pinned_config = automagic_config(dict(constructed.build_configuration()))
+
+        renderer_name = (invocation.renderer or "quick").lower()
+        if renderer_name not in self.renderers:
+            raise ValueError(f"Unknown renderer '{invocation.renderer}'")
+
+        output = outfd or io.StringIO()
+        with capture_stdout(output):
+            self.renderers[renderer_name]().render(constructed.run())
+        return "" if outfd is not None else output.getvalue()
+
+    def _add_plugin_dirs(self, plugin_dirs: str) -> None:
+        """Discover the plugins of extra directories (vol.py --plugin-dirs), once per directory"""
+        import volatility3.plugins
+        from volatility3 import framework
+
+        added = [
+            path for path in (os.path.abspath(p) for p in plugin_dirs.split(";"))
+            if path not in volatility3.plugins.__path__
+        ]
+        if not added:
+            return
+        volatility3.plugins.__path__ = added + list(volatility3.plugins.__path__)
+        self.failures.extend(framework.import_files(volatility3.plugins, True))
+        self.plugin_list = framework.list_plugins()
+
+    def _plugin_options(self, plugin, plugin_args: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Convert raw command line option values the same way vol.py's argparse setup does"""
+        from volatility3.framework import interfaces
+        from volatility3.framework.configuration import requirements
+
+        options = {}
+        known = {requirement.name: requirement for requirement in plugin.get_requirements()}
+        for name, raw_values in plugin_args.items():
+            requirement = known.get(name)
+            if requirement is None:
+                raise ValueError(f"Unrecognized argument for {plugin.__name__}: --{name.replace('_', '-')}")
+
+            if isinstance(requirement, requirements.BooleanRequirement):
+                value = True
+            elif isinstance(requirement, requirements.ListRequirement):
+                convert = (lambda x: int(x, 0)) if requirement.element_type is int else requirement.element_type
+                value = [convert(x) for x in raw_values]
+            elif not raw_values:
+                raise ValueError(f"Argument --{name.replace('_', '-')} expects a value")
+            elif isinstance(requirement, requirements.IntRequirement):
+                value = int(raw_values[0], 0)
+            elif isinstance(requirement, requirements.URIRequirement):
+                value = raw_values[0]
+                scheme = parse.urlparse(value).scheme
+                if not scheme or len(scheme) <= 1:
+                    value = Path(os.path.abspath(value)).as_uri()
+            elif isinstance(requirement, interfaces.configuration.SimpleTypeRequirement):
+                value = requirement.instance_type(raw_values[0])
+            else:
+                value = raw_values[0]
+            options[name] = value
+        return options
+
+    @staticmethod
+    def _describe_requirements(plugin) -> str:
+        """Plain-text equivalent of `vol.py <plugin> --help`"""
+        lines = [f"{plugin.__module__}.{plugin.__name__}", (plugin.__doc__ or "").strip(), "", "options:"]
+        for requirement in plugin.get_requirements():
+            flag = "--" + requirement.name.replace("_", "-")
+            optional = "" if requirement.optional else " (required)"
+            lines.append(f"  {flag}{optional}: {requirement.description}")
+        return "\n".join(lines) + "\n"
+
+def automagic_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep only the parts of a plugin configuration that automagic discovered
+
+    Plugin options such as `pid` or `dump` are top-level leaf values, whereas
+    layers, symbol tables and modules are requirement trees (`kernel`,
+    `kernel.layer_name`, ...). Only the latter are safe to hand to another plugin.
+    """
+    branches = {key.split(".", 1)[0] for key in config if "." in key}
+    return {
+        key: value
+        for key, value in config.items()
+        if key.split(".", 1)[0] in branches
+    }
+
+class _PipeWriter(io.TextIOBase):
+    """Text stream that forwards rendered output to the parent as ("chunk", text) messages"""
+
+    CHUNK_CHARS = 64 * 1024
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.CHUNK_CHARS:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        # send() blocks while the parent is behind, which pauses the plugin
+        if self._buffer:
+            self._conn.send(("chunk", "".join(self._buffer)))
+            self._buffer = []
+            self._buffered = 0
+
+class _PipeProgress:
+    """Progress callback forwarding volatility's reports to the parent as ("progress", (percent, stage)) messages"""
+
+    INTERVAL = 0.5
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._last_sent = 0.0
+        self._stage = None
+
+    def __call__(self, progress: float, description: Optional[str] = None) -> None:
+        # Volatility reports very often; send a stage change at once and updates at most every INTERVAL
+        now = time.monotonic()
+        if description == self._stage and now - self._last_sent < self.INTERVAL:
+            return
+        self._stage = description
+        self._last_sent = now
+        self._conn.send(("progress", (progress, description or "")))
+
+def _worker_main(
+    conn,
+    volatility_dir: str,
+    pinned_image: Optional[str] = None,
+    limits: Optional[ResourceLimits] = None
+) -> None:
+    """Entry point of a worker process: serve invocations over the pipe until told to stop"""
+    if os.name == "posix":
+        # Own process group, so stop() also reaches anything a plugin spawns
+        os.setsid()
+    if limits is not None:
+        limits.apply(time.process_time())
+    try:
+        session = FrameworkSession(volatility_dir, pinned_image)
+    except Exception as e:
+        conn.send(("error", f"Failed to initialise volatility3 framework: {str(e)}"))
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        if limits is not None:
+            # RLIMIT_CPU counts the worker's whole life; re-arm it for this job
+            limits.apply(time.process_time())
+        job_usage = JobUsage()
+        profiler = cProfile.Profile() if message.get("profile") else None
+        try:
+            with job_usage:
+                invocation = VolatilityInvocation(**message["invocation"])
+                progress = _PipeProgress(conn) if message.get("progress") else None
+                if profiler is not None:
+                    profiler.enable()
+                if message["stream"]:
+                    writer = _PipeWriter(conn)
+                    output = session.run(invocation, writer, progress)
+                    writer.flush()
+                else:
+                    output = session.run(invocation, progress=progress)
+            reply = ("ok", output)
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {str(e)}")
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                try:
+                    profiler.dump_stats(message["profile"])
+                except OSError as e:
+                    logger.warning(f"Could not write profile {message['profile']}: {e}")
+        conn.send(("usage", job_usage.usage.to_dict()))
+        conn.send(reply)
+
+class VolatilityWorker:
+    """A long-lived process holding an initialised FrameworkSession"""
+
+    # Seconds a new worker may take to import the framework and report ready
+    START_TIMEOUT = 120
+
+    def __init__(
+        self,
+        volatility_dir: str,
+        pinned_image: Optional[str] = None,
+        mp_context=None,
+        limits: Optional[ResourceLimits] = None
+    ):
+        self.volatility_dir = volatility_dir
+        self.pinned_image = pinned_image
+        self.limits = limits
+        self.last_used = time.monotonic()
+        # Peak RSS and CPU time of the last run
+        self.last_usage: Optional[ProcessUsage] = None
+        self._mp_context = mp_context or worker_context()
+        self._process = None
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def _start(self) -> None:
+        parent_conn, child_conn = self._mp_context.Pipe()
+        self._process = self._mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, self.volatility_dir, self.pinned_image, self.limits),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        # Importing the framework and discovering plugins takes seconds; a worker that hangs
+        # in it must not hold the caller forever
+        try:
+            ready = await asyncio.to_thread(self._conn.poll, self.START_TIMEOUT)
+            status, payload = self._conn.recv() if ready else (
+                "error", f"Volatility worker did not start within {self.START_TIMEOUT} seconds")
+        except (EOFError, OSError) as e:
+            status, payload = "error", f"Volatility worker exited while starting: {str(e)}"
+        if status != "ready":
+            self.stop()
+            raise RuntimeError(payload)
+
+    async def run(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink] = None,
+        on_progress: Optional[Callable[[float, str], None]] = None,
+        profile_path: Optional[str] = None
+    ) -> str:
+        """
+        Run an invocation in this worker
+
+        With a sink, output is forwarded to it while the plugin runs and an
+        empty string is returned. `on_progress` receives the plugin's
+        (percent, stage) progress reports. With `profile_path`, the run is
+        profiled with cProfile and the stats are written there.
+
+        Raises:
+            asyncio.TimeoutError: the worker did not answer in time; it is terminated
+            RuntimeError: the worker reported an error or died
+        """
+        async with self._lock:
+            if not self.alive:
+                await self._start()
+
+            self.last_usage = None
+            self._conn.send({
+                "invocation": asdict(invocation),
+                "stream": sink is not None,
+                "progress": on_progress is not None,
+                "profile": profile_path,
+            })
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    ready = await asyncio.to_thread(self._conn.poll, max(0, deadline - time.monotonic()))
+                    if not ready:
+                        raise asyncio.TimeoutError()
+                    status, payload = self._conn.recv()
+                    if status == "progress":
+                        on_progress(*payload)
+                    elif status == "usage":
+                        self.last_usage = ProcessUsage(**payload)
+                    elif status == "chunk":
+                        await sink.write(payload)
+                    else:
+                        break
+            except asyncio.TimeoutError:
+                self.stop()
+                raise
+            except (EOFError, OSError) as e:
+                self.stop()
+                raise RuntimeError(f"Volatility worker exited unexpectedly: {str(e)}")
+            except BaseException:
+                # Abandoned mid-run (cancelled, or the sink failed); the reply would desync the pipe
+                self.stop()
+                raise
+            finally:
+                self.last_used = time.monotonic()
+
+            if status != "ok":
+                raise RuntimeError(payload)
+            if sink is not None and payload:
+                # Help text and other early returns are not written through the stream
+                await sink.write(payload)
+                return ""
+            return payload
+
+    def stop(self) -> None:
+        """
+        Terminate the worker process
+
+        Does not block: the process is asked to exit, and waiting for it (then
+        SIGTERM, then SIGKILL) happens on a thread when an event loop is running.
+        """
+        if self._conn is not None:
+            with contextlib.suppress(Exception):
+                self._conn.send(None)
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            process, graceful = self._process, not self.busy
+            self._process = None
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is None:
+                _reap_process(process, graceful)
+            else:
+                task = loop.create_task(asyncio.to_thread(_reap_process, process, graceful))
+                _reaping.add(task)
+                task.add_done_callback(_reaping.discard)
+
+# Tasks waiting for stopped workers to exit (kept referenced until they finish)
+_reaping: set = set()
+
+def _reap_process(process, graceful: bool, kill_wait: float = 5) -> None:
+    """Wait for a worker process to exit, escalating to SIGTERM and then SIGKILL, each with a bounded wait"""
+    # An idle worker exits on the None sent by stop(); one stopped mid-run gets SIGTERM, then SIGKILL
+    process.join(timeout=1 if graceful else 0)
+    if process.is_alive():
+        process.terminate()
+        process.join(timeout=1)
+    if process.is_alive():
+        process.kill()
+        process.join(timeout=kill_wait)
+    if os.name == "posix":
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(process.pid, signal.SIGKILL)
+    if process.is_alive():
+        logger.warning(f"Volatility worker {process.pid} did not exit after SIGKILL")
+
+class InProcessVolatilityRunner(BaseVolatilityRunner):
+    """
+    Runs Volatility plugins through the volatility3 framework API inside
+    long-lived worker processes instead of forking `vol.py` for every call.
+
+    Exposes the same call interface as VolatilityRunner, so BasePlugin
+    subclasses work unchanged with either backend.
+    """
+
+    def __init__(
+        self,
+        volatility_dir: Path,
+        timeout: int,
+        max_workers: int = 2,
+        image_pool=None,
+        config_cache=None,
+        result_cache=None,
+        fingerprinter=None,
+        scheduler=None,
+        runtime_history=None,
+        metrics=None,
+        limits: Optional[ResourceLimits] = None,
+        log_level: int = logging.INFO
+    ):
+        """
+        Initialize InProcessVolatilityRunner
+
+        Args:
+            volatility_dir: Directory containing the volatility3 package
+            timeout: Default command timeout in seconds
+            max_workers: Number of general-purpose worker processes
+            image_pool: Optional ImageWorkerPool; calls against an image are routed
+                to the warm worker pinned to it
+            config_cache: Optional AutomagicConfigCache used to replay automagic results
+            result_cache: Optional ResultCache serving repeated runs
+            fingerprinter: Optional ImageFingerprinter shared with plugins for image validation
+            scheduler: Optional JobScheduler limiting concurrent plugin runs
+            runtime_history: Optional RuntimeHistory deriving timeouts from earlier runs
+            metrics: Optional RunMetrics recording plugin runs and queue waits
+            limits: Optional ResourceLimits applied to the worker processes (the CPU limit per job)
+            log_level: Logging level (default: logging.INFO)
+        """
+        self.volatility_dir = str(volatility_dir)
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.image_pool = image_pool
+        self.config_cache = config_cache
+        self.result_cache = result_cache
+        self.fingerprinter = fingerprinter
+        self.scheduler = scheduler
+        self.runtime_history = runtime_history
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(log_level)
+
+        self.limits = limits
+        self._workers = [VolatilityWorker(self.volatility_dir, limits=limits) for _ in range(self.max_workers)]
+        self._idle: Optional[asyncio.Queue] = None
+
+    def _idle_workers(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the server's running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def _execute(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink] = None
+    ) -> RunResult:
+        """Run an invocation in a warm pinned worker or the next free general worker"""
+        cmd_str = ' '.join(invocation.to_cmd_args())
+        self.logger.info(f"Running in-process: {cmd_str}")
+
+        pinned = None
+        if self.image_pool is not None and invocation.file and not invocation.help:
+            pinned = self.image_pool.acquire(invocation.file)
+
+        idle = self._idle_workers()
+        worker = pinned or await idle.get()
+        options = get_run_options()
+        try:
+            output = await worker.run(invocation, timeout, sink, options.on_progress, options.profile_path)
+            self.logger.debug(f"Command completed successfully: {cmd_str}")
+            return RunResult(output, True)
+        except asyncio.TimeoutError:
+            error_msg = f"Command timed out after {timeout} seconds: {cmd_str}"
+            self.logger.error(error_msg)
+            return RunResult(error_msg, False)
+        except RuntimeError as e:
+            error_msg = f"Command failed: {str(e)}"
+            self.logger.error(error_msg)
+            return RunResult(error_msg, False)
+        except Exception as e:
+            error_msg = f"Exception running command {cmd_str}: {str(e)}"
+            self.logger.exception(error_msg)
+            return RunResult(error_msg, False)
+        finally:
+            options.usage = worker.last_usage
+            if pinned is None:
+                idle.put_nowait(worker)
+
+    def active_processes(self) -> int:
+        """Worker processes currently running a plugin"""
+        workers = list(self._workers)
+        if self.image_pool is not None:
+            workers += self.image_pool.workers()
+        return sum(1 for worker in workers if worker.busy)
+
+    def shutdown(self) -> None:
+        """Stop all worker processes"""
+        for worker in self._workers:
+            worker.stop()
+        if self.image_pool is not None:
+            self.image_pool.shutdown()
@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Global vol.py options that consume a value, mapped to the invocation field they populate
+_VALUE_OPTIONS = {
+    "-f": "file",
+    "--file": "file",
+    "-c": "config",
+    "--config": "config",
+    "-r": "renderer",
+    "--renderer": "renderer",
+    "-o": "output_dir",
+    "--output-dir": "output_dir",
+    "-s": "symbol_dirs",
+    "--symbol-dirs": "symbol_dirs",
+    "--save-config": "save_config",
+    "-p": "plugin_dirs",
+    "--plugin-dirs": "plugin_dirs",
+}
+
+@dataclass
+class VolatilityInvocation:
+    """A vol.py command line split into global options, plugin name and plugin options"""
+
+    plugin: Optional[str] = None
+    file: Optional[str] = None
+    config: Optional[str] = None
+    renderer: Optional[str] = None
+    output_dir: Optional[str] = None
+    symbol_dirs: Optional[str] = None
+    save_config: Optional[str] = None
+    plugin_dirs: Optional[str] = None
+    plugin_args: Dict[str, List[str]] = field(default_factory=dict)
+    extra_global_args: List[str] = field(default_factory=list)
+    help: bool = False
+
+    def to_cmd_args(self) -> List[str]:
+        """Rebuild the vol.py argument list for this invocation"""
+        cmd_args = list(self.extra_global_args)
+        for flag, attr in (
+            ("-f", "file"),
+            ("--config", "config"),
+            ("-r", "renderer"),
+            ("-o", "output_dir"),
+            ("--symbol-dirs", "symbol_dirs"),
+            ("--save-config", "save_config"),
+            ("--plugin-dirs", "plugin_dirs"),
+        ):
+            value = getattr(self, attr)
+            if value is not None:
+                cmd_args.extend([flag, value])
+        if self.plugin:
+            cmd_args.append(self.plugin)
+        for name, values in self.plugin_args.items():
+            cmd_args.append("--" + name.replace("_", "-"))
+            cmd_args.extend(values)
+        if self.help:
+            cmd_args.append("--help")
+        return cmd_args
+
+def parse_cmd_args(cmd_args: List[str]) -> VolatilityInvocation:
+    """
+    Parse the argument list BasePlugin subclasses hand to the runner
+
+    Args:
+        cmd_args: vol.py arguments, e.g. ["-f", path, "windows.pslist.PsList", "--pid", "4"]
+
+    Returns:
+        The parsed invocation
+    """
+    invocation = VolatilityInvocation()
+    args = list(cmd_args)
+    index = 0
+
+    # Global options come before the plugin name
+    while index < len(args):
+        arg = args[index]
+        if arg in ("-h", "--help"):
+            invocation.help = True
+            index += 1
+        elif arg in _VALUE_OPTIONS and index + 1 < len(args):
+            setattr(invocation, _VALUE_OPTIONS[arg], args[index + 1])
+            index += 2
+        elif arg.startswith("-"):
+            invocation.extra_global_args.append(arg)
+            index += 1
+        else:
+            invocation.plugin = arg
+            index += 1
+            break
+
+    # Everything after the plugin name is a plugin option: --name [values...]
+    current = None
+    while index < len(args):
+        arg = args[index]
+        if arg in ("-h", "--help"):
+            invocation.help = True
+        elif arg.startswith("--"):
+            current = arg[2:].replace("-", "_")
+            invocation.plugin_args.setdefault(current, [])
+        elif current is not None:
+            invocation.plugin_args[current].append(arg)
+        index += 1
+
+    return invocation
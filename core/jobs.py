@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .process_control import ProcessUsage
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+@dataclass
+class Job:
+    """A plugin run executing in the background"""
+
+    job_id: str
+    description: str
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Volatility reports progress per stage (layer scanning, symbol search, the plugin's own
+    # scans), each running from 0 to 100; `stage` names the current one
+    progress: float = 0.0
+    stage: str = ""
+    stage_started_at: Optional[float] = None
+    result: Optional[str] = None
+    # Set by the job's work when it produced plugin output rather than an error
+    succeeded: bool = False
+    # Peak RSS and CPU time of the volatility run, when measured
+    usage: Optional[ProcessUsage] = None
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job started running (0 while queued)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the current stage completes, from its rate so far"""
+        if self.status != "running" or self.stage_started_at is None or not 0 < self.progress < 100:
+            return None
+        spent = time.time() - self.stage_started_at
+        return spent * (100 - self.progress) / self.progress
+
+    def update_progress(self, progress: float, stage: str) -> None:
+        """Record a volatility progress report"""
+        if stage != self.stage or progress < self.progress:
+            self.stage = stage
+            self.stage_started_at = time.time()
+        self.progress = progress
+
+    def to_dict(self) -> Dict[str, Any]:
+        eta = self.eta
+        return {
+            "job_id": self.job_id,
+            "description": self.description,
+            "status": self.status,
+            "progress": round(self.progress, 2),
+            "stage": self.stage,
+            "elapsed": round(self.elapsed, 1),
+            "eta": round(eta, 1) if eta is not None else None,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **(self.usage.to_dict() if self.usage is not None else {"peak_rss": None, "cpu_time": None}),
+        }
+
+class JobManager:
+    """
+    Background execution of long plugin runs.
+
+    A submitted job returns immediately with an ID; at most `max_running` jobs
+    run at once and the rest wait in submission order. Finished jobs and their
+    results are kept for `retention` seconds.
+    """
+
+    def __init__(self, max_running: int = 2, retention: int = 3600):
+        """
+        Initialize JobManager
+
+        Args:
+            max_running: Maximum jobs running at once
+            retention: Seconds a finished job is kept
+        """
+        self.max_running = max(1, max_running)
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running)
+        return self._slots
+
+    def submit(self, description: str, work: Callable[[Job], Awaitable[str]]) -> Job:
+        """
+        Start a job
+
+        Args:
+            description: What the job runs, for status listings
+            work: Called with the job once it may run; returns the output or error message
+                and sets `job.succeeded`
+
+        Returns:
+            The queued job
+        """
+        self.purge_expired()
+        job = Job(job_id=uuid.uuid4().hex[:12], description=description)
+        job._task = asyncio.ensure_future(self._run(job, work))
+        self._jobs[job.job_id] = job
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[str]]) -> None:
+        try:
+            async with self._semaphore():
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = await work(job)
+            job.status = "completed" if job.succeeded else "failed"
+            if job.succeeded:
+                job.progress = 100.0
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.result = "Error: Job was cancelled"
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} failed")
+            job.status = "failed"
+            job.result = f"Error running job: {str(e)}"
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job"""
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """All known jobs, oldest first"""
+        self.purge_expired()
+        return list(self._jobs.values())
+
+    async def wait(self, job: Job, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a job to finish; returns whether it has"""
+        if not job.finished and timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(job._done.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job.finished
+
+    async def cancel(self, job: Job) -> bool:
+        """Cancel a queued or running job; its volatility process is stopped"""
+        if job.finished:
+            return False
+        job._task.cancel()
+        await job._done.wait()
+        return True
+
+    def purge_expired(self) -> None:
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by state"""
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"max_running": self.max_running, "retention": self.retention, **counts}
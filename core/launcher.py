@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Run a command under resource limits and report what it used.
+
+    launcher.py --usage-fd FD [--address-space BYTES] [--cpu-time SECONDS] [--open-files N] -- COMMAND...
+
+The command is forked, limited with setrlimit and exec'd; the launcher waits
+for it with wait4() and writes {"peak_rss": bytes, "cpu_time": seconds} as
+JSON to file descriptor FD. The launcher exits like the command did (same
+exit code, or killed by the same signal). It ignores SIGTERM so that a
+group-wide SIGTERM stops only the command and its usage is still reported.
+POSIX only; standard library only, as it runs under VOLATILITY_PYTHON.
+"""
+import argparse
+import json
+import os
+import resource
+import signal
+import sys
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run a command under resource limits and report its usage")
+    parser.add_argument("--usage-fd", type=int, required=True)
+    parser.add_argument("--address-space", type=int, default=0)
+    parser.add_argument("--cpu-time", type=int, default=0)
+    parser.add_argument("--open-files", type=int, default=0)
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no command given")
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(args.usage_fd)
+            for limit, value in (
+                (resource.RLIMIT_AS, args.address_space),
+                (resource.RLIMIT_CPU, args.cpu_time),
+                (resource.RLIMIT_NOFILE, args.open_files),
+            ):
+                if value:
+                    _, hard = resource.getrlimit(limit)
+                    resource.setrlimit(limit, (value if hard == resource.RLIM_INFINITY else min(value, hard), hard))
+            os.execvp(command[0], command)
+        except BaseException as e:
+            sys.stderr.write(f"launcher: cannot run {command[0]}: {e}\n")
+        os._exit(127)
+
+    # Only after the fork: the command keeps the default SIGTERM handling
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    _, status, usage = os.wait4(pid, 0)
+    with os.fdopen(args.usage_fd, "w") as f:
+        json.dump({"peak_rss": usage.ru_maxrss * 1024, "cpu_time": usage.ru_utime + usage.ru_stime}, f)
+
+    if os.WIFSIGNALED(status):
+        sig = os.WTERMSIG(status)
+        signal.signal(sig, signal.SIG_DFL)
+        os.kill(os.getpid(), sig)
+    return os.WEXITSTATUS(status)
+
+if __name__ == "__main__":
+    sys.exit(main())
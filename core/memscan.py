@@ -0,0 +1,367 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import yara
+except ImportError:  # Optional: only needed for YARA rules
+    yara = None
+
+from .normalization import detect_container
+from .process_control import ProcessPool
+from .options import RunOptions, get_run_options, reset_run_options, set_run_options
+from .rendering import parse_json_output
+from .sparse import data_regions
+
+logger = logging.getLogger(__name__)
+
+# Volatility plugin mapping physical addresses to processes (core/volatility_plugins/physmap.py)
+PLUGIN_DIR = Path(__file__).with_name("volatility_plugins")
+OWNERS_PLUGIN = "physmap.PhysicalOwners"
+
+# YARA-style hex string: {4D 5A ?? 00}
+_HEX_STRING = re.compile(r"^\{([0-9A-Fa-f?\s]+)\}$")
+
+def pattern_source(pattern: str) -> bytes:
+    """
+    Regular expression for one entry of a pattern list
+
+    Entries are Python regular expressions matched against raw bytes, or
+    YARA-style hex strings in braces whose `??` bytes match anything.
+
+    Raises:
+        ValueError: the entry is not a valid pattern
+    """
+    match = _HEX_STRING.match(pattern.strip())
+    if match:
+        digits = "".join(match.group(1).split())
+        if len(digits) % 2:
+            raise ValueError(f"Hex pattern {pattern} has an odd number of digits")
+        return b"".join(
+            b"." if digits[i:i + 2] == "??" else re.escape(bytes.fromhex(digits[i:i + 2]))
+            for i in range(0, len(digits), 2)
+        )
+    return pattern.encode("utf-8", errors="surrogateescape")
+
+class ScanRules:
+    """
+    YARA rules and byte patterns, compiled once and shipped to scan workers.
+
+    Rules are compiled here so that errors surface before any worker starts;
+    the compiled YARA rules travel to the workers in yara's saved form, and
+    each worker loads them once per `key`.
+    """
+
+    def __init__(self, rules: Optional[str] = None, rule_files: Optional[Sequence[str]] = None,
+                 patterns: Optional[Sequence[str]] = None):
+        """
+        Initialize ScanRules
+
+        Args:
+            rules: YARA rule source text
+            rule_files: Paths of YARA rule files
+            patterns: Regular expressions or hex strings (see pattern_source)
+
+        Raises:
+            ValueError: nothing to scan for, invalid rules or patterns, or YARA
+                rules without the yara-python package
+        """
+        if not rules and not rule_files and not patterns:
+            raise ValueError("Give YARA rules, rule files or a list of patterns to scan for")
+        self.compiled_yara: Optional[bytes] = None
+        if rules or rule_files:
+            if yara is None:
+                raise ValueError("YARA rules require the yara-python package (pip install yara-python)")
+            sources = {}
+            if rules:
+                sources["rules"] = rules
+            for path in rule_files or []:
+                try:
+                    with open(path) as f:
+                        sources[os.path.splitext(os.path.basename(path))[0]] = f.read()
+                except OSError as e:
+                    raise ValueError(f"Cannot read YARA rule file {path}: {e}")
+            try:
+                compiled = yara.compile(sources=sources)
+            except yara.Error as e:
+                raise ValueError(f"Invalid YARA rules: {e}")
+            saved = io.BytesIO()
+            compiled.save(file=saved)
+            self.compiled_yara = saved.getvalue()
+        self.patterns: List[Tuple[str, bytes]] = []
+        for pattern in patterns or []:
+            source = pattern_source(pattern)
+            try:
+                re.compile(source, re.DOTALL)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {pattern}: {e}")
+            self.patterns.append((pattern, source))
+        digest = hashlib.sha256(self.compiled_yara or b"")
+        for _, source in self.patterns:
+            digest.update(b"\0" + source)
+        self.key = digest.hexdigest()
+
+    def load(self):
+        """(YARA rules or None, [(pattern, compiled regex)]) for use in a worker"""
+        compiled_yara = yara.load(file=io.BytesIO(self.compiled_yara)) if self.compiled_yara else None
+        return compiled_yara, [(pattern, re.compile(source, re.DOTALL)) for pattern, source in self.patterns]
+
+# Rules loaded by each worker process, by ScanRules.key, least recently used first
+_worker_rules: "OrderedDict[str, Any]" = OrderedDict()
+_WORKER_RULES_KEPT = 8
+
+def _load_rules(rules: ScanRules):
+    loaded = _worker_rules.get(rules.key)
+    if loaded is None:
+        loaded = _worker_rules[rules.key] = rules.load()
+        while len(_worker_rules) > _WORKER_RULES_KEPT:
+            _worker_rules.popitem(last=False)
+    _worker_rules.move_to_end(rules.key)
+    return loaded
+
+def _yara_hits(matches, base: int, limit: int) -> List[Tuple[int, str, str, bytes]]:
+    """(offset, rule, string identifier, data) of YARA matches, for old and new yara-python"""
+    hits = []
+    for match in matches:
+        for string in match.strings:
+            if isinstance(string, tuple):
+                # yara-python < 4.3: (offset, identifier, data)
+                offset, identifier, data = string
+                hits.append((offset, match.rule, identifier, data))
+            else:
+                for instance in string.instances:
+                    hits.append((instance.offset, match.rule, string.identifier, instance.matched_data))
+        if not match.strings:
+            # A rule with a condition but no strings matched the chunk as a whole
+            hits.append((0, match.rule, "", b""))
+    return [(base + offset, rule, identifier, data) for offset, rule, identifier, data in hits if offset < limit]
+
+def _scan_chunk(rules: ScanRules, path: str, start: int, end: int, stop: int, max_hits: int,
+                max_data: int) -> List[Dict[str, Any]]:
+    """
+    Scan [start, stop) of an image in a worker, keeping matches that start before `end`
+
+    The bytes between `end` and `stop` overlap the next chunk, so matches that
+    straddle the boundary are found exactly once. Returns the `max_hits` hits
+    at the lowest offsets over all patterns and rules, in offset order.
+    """
+    compiled_yara, regexes = _load_rules(rules)
+    hits = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        stop = min(stop, len(view))
+        for pattern, regex in regexes:
+            # Matches come in offset order, so a pattern's first max_hits are all it can contribute
+            found = 0
+            for match in regex.finditer(view, start, stop):
+                if match.start() >= end or found >= max_hits:
+                    break
+                hits.append({"offset": match.start(), "pattern": pattern,
+                             "data": match.group()[:max_data].hex()})
+                found += 1
+        if compiled_yara is not None:
+            for offset, rule, identifier, data in _yara_hits(compiled_yara.match(data=view[start:stop]),
+                                                                start, end - start):
+                hits.append({"offset": offset, "rule": rule, "string": identifier, "data": data[:max_data].hex()})
+    hits.sort(key=lambda hit: hit["offset"])
+    return hits[:max_hits]
+
+class PhysicalScanner:
+    """
+    Parallel YARA and regular expression scanner over raw memory images.
+
+    The image is split into overlapping chunks that a pool of worker
+    processes scan through their own mmap of the file, so a scan uses every
+    core instead of the one volatility's YaraScan and RegExScan run on. The
+    pool is kept between scans and can be shared with other components.
+    Holes in sparse images (zero pages) are skipped. Hit offsets are
+    physical addresses; one run of the bundled PhysicalOwners plugin then
+    maps them to the processes and virtual addresses they belong to.
+    Container images are scanned through their normalized raw layer, since
+    only there do file offsets equal physical addresses, and not at all until
+    ImageNormalizer has produced one. When a scan reaches `max_hits`, the hits
+    kept are those at the lowest offsets.
+    """
+
+    def __init__(self, runner=None, workers: Optional[int] = None, chunk_bytes: int = 64 * 1024 * 1024,
+                 overlap_bytes: int = 64 * 1024, max_hits: int = 10000, max_data_bytes: int = 64,
+                 pool: Optional[ProcessPool] = None):
+        """
+        Initialize PhysicalScanner
+
+        Args:
+            runner: BaseVolatilityRunner used to map hits to processes (no mapping if None)
+            workers: Worker processes of a private pool (default: number of CPUs)
+            chunk_bytes: Bytes each worker task scans
+            overlap_bytes: Bytes each chunk extends into the next; matches longer than
+                this can be missed where they cross a chunk boundary
+            max_hits: Default limit on the hits of one scan
+            max_data_bytes: Matched bytes returned per hit
+            pool: ProcessPool to scan in (a private one if None)
+        """
+        self.runner = runner
+        self.pool = pool or ProcessPool(workers)
+        self.workers = self.pool.workers
+        self.chunk_bytes = chunk_bytes
+        self.overlap_bytes = overlap_bytes
+        self.max_hits = max_hits
+        self.max_data_bytes = max_data_bytes
+        self.scans = 0
+        self.bytes_scanned = 0
+
+    def chunks(self, path: str) -> List[Tuple[int, int, int]]:
+        """(start, end, stop) of the chunks covering the allocated regions of an image"""
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            regions = list(data_regions(f.fileno(), size))
+        chunks = []
+        for region_start, region_end in regions:
+            for start in range(region_start, region_end, self.chunk_bytes):
+                end = min(start + self.chunk_bytes, region_end)
+                chunks.append((start, end, min(end + self.overlap_bytes, size)))
+        return chunks
+
+    async def scan(self, path: str, rules: Optional[str] = None, rule_files: Optional[Sequence[str]] = None,
+                   patterns: Optional[Sequence[str]] = None, max_hits: Optional[int] = None,
+                   map_processes: bool = True, max_data_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Scan an image and map the hits to processes
+
+        Args:
+            path: Image to scan
+            rules: YARA rule source text
+            rule_files: Paths of YARA rule files
+            patterns: Regular expressions or hex strings (see pattern_source)
+            max_hits: Stop after this many hits, keeping those at the lowest offsets
+            map_processes: Look up the processes owning each hit
+            max_data_bytes: Matched bytes reported per hit
+
+        Returns:
+            {"path", "scanned_path", "size", "scanned_bytes", "chunks", "workers",
+             "seconds", "hits", "truncated", ...} where each hit holds its physical
+            offset, the pattern or rule and string that matched, the matched bytes
+            (hex) and, when mapped, the owning processes
+
+        Raises:
+            OSError: the image cannot be read
+            ValueError: invalid rules or patterns (see ScanRules), or the image is a container
+                format without a normalized raw layer
+        """
+        scan_rules = await asyncio.to_thread(ScanRules, rules, rule_files, patterns)
+        max_hits = max_hits or self.max_hits
+        max_data_bytes = max_data_bytes or self.max_data_bytes
+        started = time.monotonic()
+        normalizer = getattr(self.runner, "normalizer", None)
+        scan_path = (normalizer.lookup(path) if normalizer is not None else None) or path
+        container = await asyncio.to_thread(detect_container, scan_path)
+        if container is not None:
+            raise ValueError(f"{path} is a {container} image, whose file offsets are not physical addresses; "
+                             f"normalize_memory_dump converts it so it can be scanned")
+        chunks = await asyncio.to_thread(self.chunks, scan_path)
+        workers = max(1, min(self.workers, len(chunks)))
+
+        hits: List[Dict[str, Any]] = []
+        truncated = False
+        if chunks:
+            tasks = [
+                self.pool.submit(_scan_chunk, scan_rules, scan_path, start, end, stop, max_hits, max_data_bytes)
+                for start, end, stop in chunks
+            ]
+            try:
+                # Chunks are in offset order and each reports only hits starting inside it,
+                # so once the chunks up to some point hold max_hits, later ones cannot
+                # contribute: stop there, whatever order the chunks finish in
+                positions = {task: index for index, task in enumerate(tasks)}
+                results: Dict[int, List[Dict[str, Any]]] = {}
+                done = 0
+                pending = set(tasks)
+                while pending and not truncated:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        results[positions[task]] = task.result()
+                    while done in results:
+                        hits.extend(results.pop(done))
+                        done += 1
+                    truncated = len(hits) >= max_hits
+            finally:
+                # Chunks still queued are not needed (or the scan was cancelled)
+                for task in tasks:
+                    task.cancel()
+        hits.sort(key=lambda hit: hit["offset"])
+        del hits[max_hits:]
+
+        scanned_bytes = sum(end - start for start, end, _ in chunks)
+        self.scans += 1
+        self.bytes_scanned += scanned_bytes
+        result: Dict[str, Any] = {
+            "path": path,
+            "scanned_path": scan_path,
+            "size": os.path.getsize(scan_path),
+            "scanned_bytes": scanned_bytes,
+            "chunks": len(chunks),
+            "workers": workers,
+            "seconds": round(time.monotonic() - started, 2),
+            "hit_count": len(hits),
+            "truncated": truncated,
+        }
+        logger.info(f"Scanned {scanned_bytes} bytes of {scan_path} on {workers} workers in "
+                    f"{result['seconds']}s: {len(hits)} hits")
+
+        if map_processes and hits and self.runner is not None:
+            try:
+                owners = await self.map_owners(scan_path, [hit["offset"] for hit in hits])
+                for hit in hits:
+                    hit["owners"] = owners.get(hit["offset"], [])
+                result["mapping"] = "ok"
+            except ValueError as e:
+                result["mapping"] = f"Error: Could not map hits to processes: {e}"
+            result["mapping_seconds"] = round(time.monotonic() - started - result["seconds"], 2)
+        result["hits"] = hits
+        return result
+
+    async def map_owners(self, path: str, offsets: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Processes (and kernel) mapping each physical offset, from one PhysicalOwners run
+
+        Returns:
+            offset -> [{"pid", "process", "virtual"}]; offsets nothing maps are absent
+
+        Raises:
+            ValueError: the volatility run failed
+        """
+        fd, offsets_file = tempfile.mkstemp(prefix="memscan-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(sorted(set(offsets)), f)
+        # Its own options: the caller's renderer, PID filter or sink do not apply to this run
+        token = set_run_options(RunOptions(no_cache=True, renderer="json", priority=get_run_options().priority))
+        try:
+            output = await self.runner(["-p", str(PLUGIN_DIR), "-f", path, OWNERS_PLUGIN,
+                                        "--offsets-file", offsets_file])
+        finally:
+            reset_run_options(token)
+            os.remove(offsets_file)
+        try:
+            table = parse_json_output(output)
+        except ValueError:
+            lines = (output or "no output").strip().splitlines()
+            raise ValueError(lines[-1][:300] if lines else "no output")
+        if not table.row_count:
+            return {}
+
+        owners: Dict[int, List[Dict[str, Any]]] = {}
+        for physical, pid, process, virtual in zip(*(table.column(name) for name in
+                                                      ("Physical", "PID", "Process", "Virtual"))):
+            owners.setdefault(physical, []).append({"pid": pid, "process": process, "virtual": virtual})
+        return owners
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "scans": self.scans, "bytes_scanned": self.bytes_scanned}
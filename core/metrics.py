@@ -0,0 +1,237 @@
+import bisect
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Plugin runs take from under a second to hours
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 10800, 21600)
+# Queue waits are usually short
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800)
+# Peak RSS of a volatility process, 64 MiB to 32 GiB
+RSS_BUCKETS = tuple(64 * 1024 ** 2 * 2 ** i for i in range(10))
+
+OUTCOMES = ("success", "failure", "timeout")
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(sample name, label names, label values, value) for the text format"""
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> Any:
+        """Current values for the JSON metrics"""
+        pass
+
+    def _keyed(self, values: Dict[Tuple[str, ...], Any]) -> Any:
+        if not self.labels:
+            return values.get((), 0)
+        return [dict(zip(self.labels, key), value=value) for key, value in sorted(values.items())]
+
+class Counter(_Metric):
+    """Monotonic count, per combination of label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, self.labels, key, value
+
+    def snapshot(self) -> Any:
+        return self._keyed(self._values)
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, per combination of label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", names, key + (_format_value(bound),), cumulative
+            yield self.name + "_sum", self.labels, key, total
+            yield self.name + "_count", self.labels, key, count
+
+    def snapshot(self) -> Any:
+        return self._keyed({
+            key: {"count": count, "sum": round(total, 3), "buckets": dict(zip(
+                [_format_value(bound) for bound in self.buckets + (math.inf,)],
+                [sum(counts[:i + 1]) for i in range(len(counts))]
+            ))}
+            for key, (counts, total, count) in self._values.items()
+        })
+
+class Collected(_Metric):
+    """Gauge or counter read from a callback at collection time, so updating it costs nothing"""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 collect: Callable[[], Any], labels: Tuple[str, ...] = ()):
+        """
+        Args:
+            kind: "gauge" or "counter"
+            collect: Returns the value, or with labels a dict of label value tuples to values
+        """
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def _values(self) -> Dict[Tuple[str, ...], float]:
+        values = self.collect()
+        return values if self.labels else {(): values}
+
+    def samples(self):
+        for key, value in sorted(self._values().items()):
+            yield self.name, self.labels, key, value
+
+    def snapshot(self) -> Any:
+        return self._keyed(self._values())
+
+class MetricsRegistry:
+    """
+    Metrics in the Prometheus text exposition format.
+
+    Counters and histograms are plain dict updates on the event loop thread,
+    with no locking; state owned by other components (cache counters, queue
+    lengths, running processes) is read through callbacks only when the
+    metrics are collected.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collected(self, name: str, documentation: str, kind: str,
+                  collect: Callable[[], Any], labels: Tuple[str, ...] = ()) -> Collected:
+        return self._register(Collected(name, documentation, kind, collect, labels))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, label_names, label_values, value in metric.samples():
+                lines.append(f"{name}{_label_text(label_names, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as JSON-friendly values, keyed by name"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+class RunMetrics:
+    """
+    The metric families updated on the plugin execution path.
+
+    Runners report each plugin run (duration by plugin and OS family, outcome,
+    resource usage) and each wait for an execution slot; the server reports
+    tool calls and the bytes it returns.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.plugin_duration = self.registry.histogram(
+            "volatility_plugin_duration_seconds", "Execution time of plugin runs, excluding queue wait",
+            ("plugin", "os"))
+        self.plugin_runs = self.registry.counter(
+            "volatility_plugin_runs_total", "Plugin runs by outcome (success, failure, timeout)",
+            ("plugin", "os", "outcome"))
+        self.plugin_peak_rss = self.registry.histogram(
+            "volatility_plugin_peak_rss_bytes", "Peak resident set size of plugin runs",
+            ("plugin", "os"), RSS_BUCKETS)
+        self.plugin_cpu = self.registry.counter(
+            "volatility_plugin_cpu_seconds_total", "CPU time used by plugin runs", ("plugin", "os"))
+        self.queue_wait = self.registry.histogram(
+            "volatility_queue_wait_seconds", "Time spent waiting for an execution slot",
+            ("priority",), WAIT_BUCKETS)
+        self.tool_calls = self.registry.counter(
+            "volatility_tool_calls_total", "MCP tool calls", ("tool",))
+        self.tool_duration = self.registry.histogram(
+            "volatility_tool_duration_seconds", "Duration of MCP tool calls", ("tool",))
+        self.response_bytes = self.registry.counter(
+            "volatility_response_bytes_total", "Bytes of tool output returned to clients", ("tool",))
+
+    def observe_run(self, plugin: str, family: str, seconds: Optional[float], outcome: str,
+                    usage: Any = None) -> None:
+        """
+        Record a plugin run
+
+        Args:
+            plugin: Volatility plugin name
+            family: OS family of the plugin
+            seconds: Execution time (None for runs inside a batch, which are not timed one by one)
+            outcome: "success", "failure" or "timeout"
+            usage: Optional ProcessUsage of the run
+        """
+        if seconds is not None:
+            self.plugin_duration.observe(seconds, plugin, family)
+        self.plugin_runs.inc(plugin, family, outcome)
+        if usage is not None:
+            self.plugin_peak_rss.observe(usage.peak_rss, plugin, family)
+            self.plugin_cpu.inc(plugin, family, amount=usage.cpu_time)
+
+    def observe_queue_wait(self, priority: str, seconds: float) -> None:
+        self.queue_wait.observe(seconds, priority)
+
+    def observe_tool(self, tool: str, seconds: float, response_bytes: int) -> None:
+        self.tool_calls.inc(tool)
+        self.tool_duration.observe(seconds, tool)
+        self.response_bytes.inc(tool, amount=response_bytes)
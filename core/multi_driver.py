@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Run several volatility plugins in one interpreter sharing one context.
+
+Reads {"invocations": [...], "threads": n} as JSON from stdin, where each
+invocation is a serialized VolatilityInvocation. The first invocation runs
+alone and performs the automagic pass; the others reuse the layers and
+symbol tables it stacked, sequentially or on `threads` threads. Each plugin
+gets its own options: the shared context's plugin subtree is replaced on
+every run, and only one thread at a time uses that context, the others
+running in private contexts seeded with the configuration it captured. Each result
+is written to stdout as one frame: a JSON header line
+{"index": i, "status": "ok" | "error", "length": n} followed by n bytes of
+UTF-8 payload (the rendered output or the error message), in completion order.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+if __package__ in (None, ""):
+    # Started as a script by VolatilityRunner: make the server's packages importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.inprocess_runner import FrameworkSession, ThreadLocalStdout
+from core.invocation import VolatilityInvocation
+
+def encode_frame(index: int, status: str, payload: str) -> bytes:
+    """Serialize one result frame"""
+    data = payload.encode("utf-8", errors="replace")
+    header = json.dumps({"index": index, "status": status, "length": len(data)})
+    return header.encode("utf-8") + b"\n" + data
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run several volatility plugins in one process")
+    parser.add_argument("--volatility-dir", default="", help="Directory containing the volatility3 package")
+    args = parser.parse_args(argv)
+
+    request = json.load(sys.stdin)
+    invocations = [VolatilityInvocation(**item) for item in request["invocations"]]
+    threads = max(1, int(request.get("threads", 1)))
+
+    # Frames own stdout; anything else printed while plugins run goes to stderr
+    out = sys.stdout.buffer
+    sys.stdout = ThreadLocalStdout(sys.stderr)
+    lock = threading.Lock()
+
+    def emit(index: int, status: str, payload: str) -> None:
+        frame = encode_frame(index, status, payload)
+        with lock:
+            out.write(frame)
+            out.flush()
+
+    pinned = next((os.path.realpath(inv.file) for inv in invocations if inv.file and not inv.help), None)
+    try:
+        session = FrameworkSession(args.volatility_dir, pinned)
+    except Exception as e:
+        for index in range(len(invocations)):
+            emit(index, "error", f"Failed to initialise volatility3 framework: {str(e)}")
+        return 1
+
+    def run(index: int) -> None:
+        try:
+            emit(index, "ok", session.run(invocations[index]))
+        except Exception as e:
+            emit(index, "error", f"{type(e).__name__}: {str(e)}")
+
+    if invocations:
+        run(0)
+    remaining = range(1, len(invocations))
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(run, remaining))
+    else:
+        for index in remaining:
+            run(index)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
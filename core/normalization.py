@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .invocation import VolatilityInvocation
+from .options import RunOptions, reset_run_options, set_run_options
+
+logger = logging.getLogger(__name__)
+
+# Plugins that read the container itself (crash dump header, hibernation file, layer list)
+# and so must see the original file
+CONTAINER_PLUGINS = ("layerwriter.", "crashinfo.", "hibernation.")
+
+# "Layer has been written to <name>" from LayerWriter
+_WRITTEN = re.compile(r"Layer has been written to (\S+)")
+
+def detect_container(path: str) -> Optional[str]:
+    """
+    Identify a memory image container format volatility re-parses on every run
+
+    Returns:
+        "lime", "avml", "elf", "crashdump", "hiberfil" or "vmware", or None for raw
+        images and anything unrecognised
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(64)
+    except OSError:
+        return None
+    if header[:4] == b"EMiL":
+        return "lime"
+    if header[:4] == b"AVML":
+        return "avml"
+    if header[:4] == b"\x7fELF" and len(header) >= 18 and struct.unpack_from("<H", header, 16)[0] == 4:
+        # ET_CORE: QEMU, VirtualBox and Xen dumps
+        return "elf"
+    if header[:8] in (b"PAGEDUMP", b"PAGEDU64"):
+        return "crashdump"
+    if header[:4].lower() in (b"hibr", b"wake", b"rstr"):
+        return "hiberfil"
+    root, extension = os.path.splitext(path)
+    if extension.lower() == ".vmem" and any(os.path.isfile(root + suffix) for suffix in (".vmss", ".vmsn")):
+        return "vmware"
+    return None
+
+class ImageNormalizer:
+    """
+    Converts container-format images (LiME, AVML, ELF core, crash dumps,
+    VMware vmem+vmss, hibernation files) to a raw physical layer once.
+
+    The first time a container image is seen, LayerWriter runs in the
+    background, at background priority, to write volatility's stacked
+    physical layer to a hidden `.<name>.normalized` file next to the original
+    (or in `cache_dir` if that directory is not writable). Once it exists,
+    runs against the image are pointed at the raw layer, so volatility no
+    longer re-parses the container. Runs started in the meantime use the
+    original. Conversions are recorded with the (device, inode, mtime, size)
+    of the source, and the raw layer is not used if the source has changed.
+    The raw layers are kept under `max_bytes` by evicting the least recently
+    used. Images LayerWriter cannot convert are remembered and left alone.
+    """
+
+    SUFFIX = ".normalized"
+
+    def __init__(self, runner, cache_dir: str, max_bytes: int, timeout: int = 6 * 3600):
+        """
+        Initialize ImageNormalizer
+
+        Args:
+            runner: BaseVolatilityRunner used to run LayerWriter
+            cache_dir: Directory for the index, and for raw layers that cannot go next to their source
+            max_bytes: Disk budget for all raw layers
+            timeout: Seconds a conversion may take
+        """
+        self.runner = runner
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        # Source path -> record, least recently used first
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Source path -> stat key of images found to be raw, so their header is read once
+        self._plain: Dict[str, Dict[str, int]] = {}
+        self.conversions = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        try:
+            with open(self._index_path) as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable normalization index {self._index_path}: {e}")
+            return
+        for source, record in sorted(records.items(), key=lambda item: item[1].get("last_used", 0)):
+            if record.get("status") == "ready" and not os.path.isfile(record.get("path", "")):
+                continue
+            self._records[source] = record
+
+    def _save_index(self) -> None:
+        try:
+            with open(self._index_path + ".tmp", "w") as f:
+                json.dump(self._records, f, indent=2)
+            os.replace(self._index_path + ".tmp", self._index_path)
+        except OSError as e:
+            logger.warning(f"Could not save normalization index {self._index_path}: {e}")
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[Dict[str, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return {"dev": stat.st_dev, "ino": stat.st_ino, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _target_path(self, source: str) -> str:
+        directory, name = os.path.split(source)
+        if not os.access(directory, os.W_OK):
+            directory = self.cache_dir
+        return os.path.join(directory, f".{name}{self.SUFFIX}")
+
+    def lookup(self, path: str) -> Optional[str]:
+        """Raw layer for an image if one is ready and the image is unchanged"""
+        source = os.path.realpath(path)
+        with self._lock:
+            record = self._records.get(source)
+            if record is None or record.get("status") != "ready":
+                return None
+            if record.get("stat") != self._stat_key(source) or not os.path.isfile(record["path"]):
+                self._records.pop(source)
+                self._save_index()
+                return None
+            self._records.move_to_end(source)
+            if time.time() - record.get("last_used", 0) > 60:
+                # Persist the LRU order now and then rather than on every run
+                record["last_used"] = time.time()
+                self._save_index()
+            return record["path"]
+
+    async def resolve(self, invocation: VolatilityInvocation) -> Optional[str]:
+        """
+        Point an invocation at the raw layer of its image, if there is one
+
+        Starts the conversion in the background when a container image is seen
+        for the first time.
+
+        Returns:
+            The raw layer the invocation now uses, or None if it was left unchanged
+        """
+        if not invocation.file or invocation.help or not invocation.plugin:
+            return None
+        plugin = "." + invocation.plugin.lower()
+        if any("." + marker in plugin for marker in CONTAINER_PLUGINS):
+            return None
+        raw_path = self.lookup(invocation.file)
+        if raw_path is not None:
+            invocation.file = raw_path
+            return raw_path
+        self.submit(invocation.file)
+        return None
+
+    def submit(self, path: str) -> Optional[asyncio.Task]:
+        """Start converting an image unless it is raw, converted, known to fail or being converted"""
+        source = os.path.realpath(path)
+        task = self._tasks.get(source)
+        if task is not None:
+            return task
+        with self._lock:
+            record = self._records.get(source)
+        stat_key = self._stat_key(source)
+        if stat_key is None or (record is not None and record.get("stat") == stat_key):
+            return None
+        if self._plain.get(source) == stat_key:
+            return None
+        container = detect_container(source)
+        if container is None:
+            self._plain[source] = stat_key
+            return None
+        if stat_key["size"] > self.max_bytes:
+            logger.info(f"Not normalizing {source}: larger than the normalization budget")
+            return None
+        directory = os.path.dirname(self._target_path(source))
+        if shutil.disk_usage(directory).free < 2 * stat_key["size"]:
+            # The raw layer may be larger than the container; try again once there is room
+            logger.info(f"Not normalizing {source}: not enough free space in {directory}")
+            return None
+        task = asyncio.ensure_future(self._convert(source, container, stat_key))
+        self._tasks[source] = task
+        task.add_done_callback(lambda _: self._tasks.pop(source, None))
+        return task
+
+    async def _convert(self, source: str, container: str, stat_key: Dict[str, int]) -> None:
+        target = self._target_path(source)
+        record = {"path": target, "stat": stat_key, "format": container, "created": time.time()}
+        work_dir = tempfile.mkdtemp(prefix=".normalize-", dir=os.path.dirname(target))
+        # Runs in its own context: the run that noticed the image must not share its options
+        token = set_run_options(RunOptions(no_cache=True, priority="background", timeout=self.timeout))
+        started = time.monotonic()
+        try:
+            logger.info(f"Normalizing {container} image {source} to a raw layer")
+            output = await self.runner(["-f", source, "-o", work_dir, "layerwriter.LayerWriter"])
+            match = _WRITTEN.search(output or "")
+            written = os.path.join(work_dir, match.group(1)) if match else None
+            if written is None or not os.path.isfile(written):
+                lines = (output or "no output").strip().splitlines()
+                raise ValueError(lines[-1][:300] if lines else "no output")
+            if os.path.basename(written).startswith("FileLayer"):
+                # Nothing was stacked on the file: volatility reads this image as raw already
+                raise ValueError(f"volatility does not stack a layer on this {container} image")
+            if self._stat_key(source) != stat_key:
+                raise ValueError("the image changed during the conversion")
+            os.replace(written, target)
+            record.update(status="ready", size=os.path.getsize(target), last_used=time.time(),
+                          seconds=round(time.monotonic() - started, 1))
+            self.conversions += 1
+            logger.info(f"Normalized {source} to {target} in {record['seconds']}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not normalize {source}; using it as it is: {e}")
+            record.update(status="failed", error=str(e), last_used=time.time())
+        finally:
+            reset_run_options(token)
+            shutil.rmtree(work_dir, ignore_errors=True)
+        with self._lock:
+            self._records[source] = record
+            self._records.move_to_end(source)
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        """Delete the least recently used raw layers until the rest fit the budget (lock held)"""
+        total = sum(record.get("size", 0) for record in self._records.values() if record.get("status") == "ready")
+        for source in list(self._records):
+            if total <= self.max_bytes:
+                break
+            record = self._records[source]
+            if record.get("status") != "ready":
+                continue
+            try:
+                os.remove(record["path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove normalized layer {record['path']}: {e}")
+                continue
+            total -= record.get("size", 0)
+            del self._records[source]
+            self.evictions += 1
+            logger.info(f"Evicted normalized layer of {source}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ready = [record for record in self._records.values() if record.get("status") == "ready"]
+            return {
+                "layers": len(ready),
+                "bytes": sum(record.get("size", 0) for record in ready),
+                "max_bytes": self.max_bytes,
+                "converting": len(self._tasks),
+                "unsupported": sum(1 for record in self._records.values() if record.get("status") == "failed"),
+                "conversions": self.conversions,
+                "evictions": self.evictions,
+            }
+
+    def status(self, path: str) -> Dict[str, Any]:
+        """What is known about one image: its container format and the state of its raw layer"""
+        source = os.path.realpath(path)
+        with self._lock:
+            record = dict(self._records.get(source) or {})
+        if source in self._tasks:
+            record["status"] = "converting"
+        record.setdefault("format", detect_container(source))
+        record.setdefault("status", "raw" if record["format"] is None else "pending")
+        record.pop("stat", None)
+        if "path" in record:
+            record["raw_path"] = record.pop("path")
+        return record
@@ -0,0 +1,65 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
+
+from .streaming import OutputSink
+
+if TYPE_CHECKING:
+    from .batch import PluginBatch
+    from .process_control import ProcessUsage
+    from .runner import RunResult
+
+@dataclass
+class RunOptions:
+    """
+    Per-call options set by MCP tools and read by the runner.
+
+    Plugins only pass vol.py arguments to the runner, so options that do not
+    map to a vol.py flag travel alongside the call in a context variable.
+    """
+
+    no_cache: bool = False
+    # Renderer used when the plugin does not pass -r itself
+    renderer: Optional[str] = None
+    # When set, output is streamed into this OutputSink and the runner returns
+    # only an error message (or an empty string on success)
+    sink: Optional[OutputSink] = None
+    # PIDs the caller filters on; passed to volatility as --pid where the plugin supports it
+    pids: Optional[List[int]] = None
+    # Scheduling class ("interactive" or "background") and an optional callback
+    # receiving (queue position, seconds waited) while the call is queued
+    priority: str = "interactive"
+    on_queue: Optional[Callable[[int, float], Awaitable[None]]] = None
+    # Called with (percent, stage description) as volatility reports progress
+    on_progress: Optional[Callable[[float, str], None]] = None
+    # Timeout in seconds for this call, instead of the runner's default
+    timeout: Optional[int] = None
+    # PluginBatch the call joins instead of starting its own process, if the backend supports it
+    batch: Optional["PluginBatch"] = None
+    # Write a cProfile of the volatility run to this file; the run bypasses the result cache
+    # and any batch so the profile covers exactly this plugin
+    profile_path: Optional[str] = None
+    # Filled in by the runner: whether the call returned plugin output rather than an error,
+    # and how long it waited for an execution slot
+    succeeded: Optional[bool] = None
+    queue_wait: float = 0.0
+    queue_position: int = 0
+    # Whether the call was executed as part of the batch
+    batched: bool = False
+    # Filled in by the runner: peak RSS and CPU time of the volatility run, when measured
+    usage: Optional["ProcessUsage"] = None
+    # Filled in by BaseVolatilityRunner.run_per_pid: the result for each requested PID
+    pid_results: Optional[Dict[int, "RunResult"]] = None
+
+_run_options: ContextVar[Optional[RunOptions]] = ContextVar("run_options", default=None)
+
+def get_run_options() -> RunOptions:
+    """Options for the current call (defaults if none were set)"""
+    return _run_options.get() or RunOptions()
+
+def set_run_options(options: RunOptions):
+    """Set options for the current call; returns a token for reset_run_options"""
+    return _run_options.set(options)
+
+def reset_run_options(token) -> None:
+    _run_options.reset(token)
@@ -0,0 +1,268 @@
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ResourceLimits:
+    """Limits applied to each volatility process; 0 leaves a limit unset"""
+
+    # Bytes of virtual address space (RLIMIT_AS)
+    address_space: int = 0
+    # Seconds of CPU time (RLIMIT_CPU); the process is killed with SIGXCPU when it is used up
+    cpu_time: int = 0
+    # Open file descriptors (RLIMIT_NOFILE)
+    open_files: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        return resource is not None and any((self.address_space, self.cpu_time, self.open_files))
+
+    def apply(self, cpu_used: float = 0.0) -> None:
+        """
+        Set the limits on the calling process
+
+        Args:
+            cpu_used: CPU seconds the process has already used; the CPU limit
+                is counted from there (for long-lived workers running one job after another)
+        """
+        if resource is None:
+            return
+        for limit, value in (
+            (resource.RLIMIT_AS, self.address_space),
+            (resource.RLIMIT_CPU, int(cpu_used) + self.cpu_time if self.cpu_time else 0),
+            (resource.RLIMIT_NOFILE, self.open_files),
+        ):
+            if not value:
+                continue
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, hard))
+
+@dataclass
+class ProcessUsage:
+    """Resources used by one plugin run"""
+
+    # Peak resident set size in bytes
+    peak_rss: int = 0
+    # User plus system CPU seconds
+    cpu_time: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        usage = asdict(self)
+        usage["cpu_time"] = round(self.cpu_time, 2)
+        return usage
+
+# Wrapper that applies the limits and reports usage of each volatility process
+LAUNCHER_SCRIPT = Path(__file__).with_name("launcher.py")
+
+def spawn_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for asyncio.create_subprocess_exec
+
+    The process starts in its own session, and so its own process group, so
+    terminate_process can stop it together with anything it spawned.
+    """
+    if os.name != "posix":
+        return {}
+    return {"start_new_session": True}
+
+# Modules the fork server imports once, so that worker processes start with them loaded
+WORKER_PRELOAD = ["core.worker_init", "core"]
+
+_worker_context = None
+
+def worker_context():
+    """
+    multiprocessing context for the server's worker processes
+
+    Workers are forked from a fork server that has this package preloaded and
+    does not re-run the server's main script in them (see worker_init), so a
+    new worker costs a fork rather than a fresh interpreter importing the
+    server. Falls back to spawn where fork servers are not available.
+    """
+    global _worker_context
+    if _worker_context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(WORKER_PRELOAD)
+            _start_fork_server()
+        else:
+            context = multiprocessing.get_context("spawn")
+        _worker_context = context
+    return _worker_context
+
+class ProcessPool:
+    """
+    Worker processes shared by the parallel scans and index builds.
+
+    The executor is created on first use from worker_context() and kept, so a
+    scan does not pay for starting its workers; one broken by a dead worker
+    is replaced. Tasks of concurrent callers share the workers, so callers
+    cancel their own futures rather than shutting the pool down.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialize ProcessPool
+
+        Args:
+            workers: Worker processes (default: number of CPUs)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, function, *args) -> asyncio.Future:
+        """Run a picklable function in a worker; cancelling the future drops the task if it has not started"""
+        with self._lock:
+            for attempt in range(2):
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+                try:
+                    return asyncio.wrap_future(self._executor.submit(function, *args))
+                except BrokenProcessPool:
+                    if attempt:
+                        raise
+                    logger.warning("A worker process died; starting a new process pool")
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def _start_fork_server() -> None:
+    # The fork server is a fresh interpreter that does not get our sys.path; let it find this package
+    root = str(Path(__file__).resolve().parent.parent)
+    previous = os.environ.get("PYTHONPATH")
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, (root, previous)))
+    try:
+        multiprocessing.forkserver.ensure_running()
+    finally:
+        if previous is None:
+            del os.environ["PYTHONPATH"]
+        else:
+            os.environ["PYTHONPATH"] = previous
+
+class UsageReport:
+    """Pipe on which core/launcher.py reports the resource usage of the command it ran"""
+
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+
+    def wrap(self, python: str, cmd: List[str], limits: Optional[ResourceLimits] = None) -> List[str]:
+        """Prefix a command with the launcher, which applies `limits` and writes the usage to the pipe"""
+        limits = limits or ResourceLimits()
+        return [
+            python, str(LAUNCHER_SCRIPT),
+            "--usage-fd", str(self.write_fd),
+            "--address-space", str(limits.address_space),
+            "--cpu-time", str(limits.cpu_time),
+            "--open-files", str(limits.open_files),
+            "--",
+        ] + cmd
+
+    def started(self) -> None:
+        """Close the parent's copy of the write end once the launcher holds it"""
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+            self.write_fd = None
+
+    def read(self) -> Optional[ProcessUsage]:
+        """Usage reported by the launcher; call after it exited (None if it was killed first)"""
+        self.started()
+        chunks = []
+        try:
+            while True:
+                data = os.read(self.read_fd, 4096)
+                if not data:
+                    break
+                chunks.append(data)
+        finally:
+            os.close(self.read_fd)
+        try:
+            return ProcessUsage(**json.loads(b"".join(chunks)))
+        except (ValueError, TypeError):
+            return None
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        if os.name == "posix":
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+
+async def terminate_process(process: asyncio.subprocess.Process, grace: float = 5.0) -> None:
+    """
+    Stop a process started with spawn_options and its process group, and reap it
+
+    Sends SIGTERM to the group, waits up to `grace` seconds, then sends
+    SIGKILL. Returns only once the process has been reaped. (The launcher
+    ignores SIGTERM and exits as soon as the command it runs has.)
+    """
+    if process.returncode is None:
+        _signal_group(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"Process {process.pid} ignored SIGTERM for {grace}s; killing it")
+    # Also catches group members that outlived the leader
+    _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+    await asyncio.shield(process.wait())
+
+def read_peak_rss(pid: Any = "self") -> int:
+    """Peak resident set size (VmHWM) of a process in bytes, 0 if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+def reset_peak_rss() -> None:
+    """Reset the calling process's VmHWM so it measures from now (Linux only)"""
+    with contextlib.suppress(OSError):
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+
+class JobUsage:
+    """Measures the peak RSS and CPU time of a job run inside the current process"""
+
+    def __enter__(self) -> "JobUsage":
+        reset_peak_rss()
+        self._started = time.process_time()
+        self.usage = ProcessUsage()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.usage.cpu_time = time.process_time() - self._started
+        self.usage.peak_rss = read_peak_rss()
+        if not self.usage.peak_rss and resource is not None:
+            # ru_maxrss is the lifetime peak in KiB; better than nothing where /proc is missing
+            self.usage.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,143 @@
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Volatility packages whose own (non-cumulative) time is summed per component, to tell
+# layer translation from symbol loading and output rendering at a glance
+COMPONENTS: Tuple[Tuple[str, str], ...] = (
+    ("layer translation", "volatility3/framework/layers/"),
+    ("symbol loading", "volatility3/framework/symbols/"),
+    ("automagic", "volatility3/framework/automagic/"),
+    ("object access", "volatility3/framework/objects/"),
+    ("plugin", "volatility3/framework/plugins/"),
+    ("rendering", "volatility3/framework/renderers/"),
+    ("rendering", "volatility3/cli/text_renderer"),
+    ("framework", "volatility3/"),
+    ("module imports", "<frozen importlib"),
+)
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+def _component(filename: str) -> str:
+    filename = filename.replace(os.sep, "/")
+    for component, marker in COMPONENTS:
+        if marker in filename:
+            return component
+    return "other"
+
+def _short_location(filename: str, line: int, name: str) -> str:
+    filename = filename.replace(os.sep, "/")
+    if "volatility3/" in filename:
+        filename = "volatility3/" + filename.rsplit("volatility3/", 1)[1]
+    elif filename not in ("~", ""):
+        filename = os.path.basename(filename)
+    return f"{filename}:{line}({name})" if filename not in ("~", "") else name
+
+def summarize_profile(path: str, top: int = 20, sort: str = "cumulative") -> Dict[str, Any]:
+    """
+    Summarize a cProfile stats file
+
+    Args:
+        path: File written by cProfile
+        top: Number of hotspots to list
+        sort: 'cumulative', 'tottime' or 'ncalls'
+
+    Returns:
+        Total time, own time per volatility component and the top functions
+
+    Raises:
+        ValueError: unknown sort key
+        OSError: the file cannot be read
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Use one of: {', '.join(SORT_KEYS)}")
+    stats = pstats.Stats(path)
+
+    components: Dict[str, float] = {}
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        component = _component(filename)
+        components[component] = components.get(component, 0.0) + tottime
+
+    index = {"ncalls": 1, "tottime": 2, "cumulative": 3}[sort]
+    ordered = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)
+    hotspots: List[Dict[str, Any]] = []
+    for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in ordered[:max(0, top)]:
+        hotspots.append({
+            "function": _short_location(filename, line, name),
+            "calls": calls if calls == primitive_calls else f"{calls}/{primitive_calls}",
+            "own_seconds": round(tottime, 4),
+            "cumulative_seconds": round(cumtime, 4),
+        })
+    return {
+        "total_seconds": round(stats.total_tt, 3),
+        "by_component": {
+            component: round(seconds, 3)
+            for component, seconds in sorted(components.items(), key=lambda item: item[1], reverse=True)
+        },
+        "sort": sort,
+        "hotspots": hotspots,
+    }
+
+class ProfileStore:
+    """
+    cProfile output of profiled plugin runs, kept on disk for download.
+
+    Each run gets an ID and a file `<id>.prof` readable with pstats or
+    snakeviz. Profiles are deleted `ttl` seconds after they were written.
+    """
+
+    SUFFIX = ".prof"
+
+    def __init__(self, store_dir: str, ttl: int = 86400):
+        """
+        Initialize ProfileStore
+
+        Args:
+            store_dir: Directory for the profile files
+            ttl: Seconds a profile is kept
+        """
+        self.store_dir = store_dir
+        self.ttl = ttl
+        os.makedirs(store_dir, exist_ok=True)
+
+    def new(self) -> Tuple[str, str]:
+        """Reserve a profile: returns its ID and the path the profiler should write to"""
+        self.purge_expired()
+        profile_id = uuid.uuid4().hex
+        return profile_id, os.path.join(self.store_dir, profile_id + self.SUFFIX)
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored profile, or None if the ID is unknown or expired"""
+        if not _PROFILE_ID.match(profile_id or ""):
+            return None
+        path = os.path.join(self.store_dir, profile_id + self.SUFFIX)
+        return path if os.path.isfile(path) else None
+
+    def summarize(self, profile_id: str, top: int = 20, sort: str = "cumulative") -> Optional[Dict[str, Any]]:
+        """summarize_profile for a stored profile, with its ID and size; None if it does not exist"""
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        return {"profile_id": profile_id, "bytes": os.path.getsize(path), **summarize_profile(path, top, sort)}
+
+    def purge_expired(self) -> None:
+        """Delete profiles older than the retention period"""
+        cutoff = time.time() - self.ttl
+        try:
+            entries = list(os.scandir(self.store_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith(self.SUFFIX) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError as e:
+                logger.debug(f"Could not remove expired profile {entry.path}: {e}")
@@ -0,0 +1,118 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+OUTPUT_FORMATS = ("text", "json")
+
+def _json_type(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "json"
+
+@dataclass
+class TabularResult:
+    """
+    Plugin output held column-wise.
+
+    `data[i]` holds every value of `columns[i]`, and `depth[r]` is the tree
+    depth of row `r` (0 for top-level rows; PsTree-like plugins nest children
+    below their parent). Keeping columns as flat arrays avoids repeating the
+    column names in every row and makes projection and filtering cheap.
+    """
+
+    columns: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    data: List[List[Any]] = field(default_factory=list)
+    depth: List[int] = field(default_factory=list)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.depth)
+
+    def column(self, name: str) -> List[Any]:
+        return self.data[self.columns.index(name)]
+
+    def rows(self) -> Iterator[List[Any]]:
+        """Iterate over rows as lists in column order"""
+        return (list(row) for row in zip(*self.data))
+
+    def to_text(self) -> str:
+        """Tab-separated table in the layout of volatility's quick text renderer"""
+        lines = ["\t".join(self.columns), ""]
+        for level, row in zip(self.depth, self.rows()):
+            cells = ["N/A" if value is None else str(value) for value in row]
+            if level and cells:
+                cells[0] = "*" * level + " " + cells[0]
+            lines.append("\t".join(cells))
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "types": self.types,
+            "row_count": self.row_count,
+            "depth": self.depth,
+            "data": self.data,
+        }
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "TabularResult":
+        return cls(
+            columns=list(value["columns"]),
+            types=list(value["types"]),
+            data=[list(column) for column in value["data"]],
+            depth=list(value["depth"]),
+        )
+
+def parse_json_output(output: str) -> TabularResult:
+    """
+    Parse the output of volatility's JSON renderer into a TabularResult
+
+    The renderer emits a list of row objects whose nested rows sit in
+    `__children`; rows are flattened depth-first so parents precede their children.
+
+    Raises:
+        ValueError: the output is not JSON renderer output
+    """
+    nodes = json.loads(output)
+    if not isinstance(nodes, list) or not all(isinstance(node, dict) for node in nodes):
+        raise ValueError("Expected a list of rows from the JSON renderer")
+
+    columns: List[str] = []
+    index: Dict[str, int] = {}
+    data: List[List[Any]] = []
+    depth: List[int] = []
+
+    stack = [(node, 0) for node in reversed(nodes)]
+    while stack:
+        node, level = stack.pop()
+        row_number = len(depth)
+        for name, value in node.items():
+            if name == "__children":
+                continue
+            if name not in index:
+                # A column first seen late is absent (None) in earlier rows
+                index[name] = len(columns)
+                columns.append(name)
+                data.append([None] * row_number)
+            data[index[name]].append(value)
+        depth.append(level)
+        for column in data:
+            if len(column) <= row_number:
+                column.append(None)
+        stack.extend((child, level + 1) for child in reversed(node.get("__children", [])))
+
+    types = []
+    for column in data:
+        seen = {_json_type(value) for value in column} - {None}
+        types.append(seen.pop() if len(seen) == 1 else ("mixed" if seen else "null"))
+
+    return TabularResult(columns=columns, types=types, data=data, depth=depth)
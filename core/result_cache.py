@@ -0,0 +1,298 @@
+import asyncio
+import codecs
+import hashlib
+import json
+import logging
+import os
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .fingerprint import ImageFingerprinter
+from .invocation import VolatilityInvocation
+from .streaming import OutputSink
+from .versioning import symbols_fingerprint, volatility_version
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    Disk-backed, content-addressed cache of plugin output.
+
+    Entries are keyed by (image identity, plugin name, normalized plugin
+    arguments, renderer, volatility version, symbol set) and stored
+    zlib-compressed, one file per entry. The total stored size is kept under
+    `max_bytes` by evicting the least recently used entries. Access times are
+    persisted through file mtimes so the LRU order survives restarts.
+    """
+
+    SUFFIX = ".out.z"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        volatility_dir: str,
+        symbols_dir: str,
+        max_bytes: int,
+        fingerprinter: Optional[ImageFingerprinter] = None
+    ):
+        """
+        Initialize ResultCache
+
+        Args:
+            cache_dir: Directory where results are stored
+            volatility_dir: Volatility 3 checkout, part of every key
+            symbols_dir: Symbol directory, part of every key
+            max_bytes: Budget for the compressed entries on disk
+            fingerprinter: ImageFingerprinter identifying images (a private one if None)
+        """
+        self.cache_dir = cache_dir
+        self.volatility_dir = volatility_dir
+        self.symbols_dir = symbols_dir
+        self.max_bytes = max_bytes
+        self.fingerprinter = fingerprinter or ImageFingerprinter()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from the files on disk, oldest access first"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(self.SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def key_for(self, invocation: VolatilityInvocation) -> Optional[str]:
+        """
+        Compute the cache key for an invocation
+
+        Returns:
+            The key, or None if the invocation must not be cached (no image,
+            help output, or options that write files such as --dump)
+        """
+        if not invocation.plugin or not invocation.file or invocation.help:
+            return None
+        if not os.path.isfile(invocation.file):
+            return None
+        if any(name.startswith("dump") for name in invocation.plugin_args):
+            return None
+
+        identity = {
+            "image": self.fingerprinter.identity(invocation.file),
+            "plugin": invocation.plugin,
+            "args": {name: invocation.plugin_args[name] for name in sorted(invocation.plugin_args)},
+            "renderer": (invocation.renderer or "quick").lower(),
+            "volatility_version": volatility_version(self.volatility_dir),
+            "symbols": symbols_fingerprint(self.symbols_dir),
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached output for a key, or None on a miss"""
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        try:
+            output = await asyncio.to_thread(self._read, key)
+        except (OSError, zlib.error) as e:
+            logger.warning(f"Dropping unreadable result cache entry {key}: {str(e)}")
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return output
+
+    def _read(self, key: str) -> str:
+        path = self._path(key)
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        return zlib.decompress(data).decode("utf-8")
+
+    async def put(self, key: str, output: str) -> None:
+        """Store the output for a key and evict old entries if over budget"""
+        data = await asyncio.to_thread(zlib.compress, output.encode("utf-8"), 1)
+        if len(data) > self.max_bytes:
+            logger.info(f"Result of {len(data)} bytes exceeds the cache budget; not caching")
+            return
+        try:
+            await asyncio.to_thread(self._write, key, data)
+        except OSError as e:
+            # The result is already in hand; failing to cache it is not a failed run
+            logger.warning(f"Could not write result cache entry {key}: {str(e)}")
+            return
+        self._add(key, len(data))
+
+    def _add(self, key: str, size: int) -> None:
+        if key in self._entries:
+            self._total_bytes -= self._entries[key]
+        self._entries[key] = size
+        self._entries.move_to_end(key)
+        self._total_bytes += size
+        self._evict()
+
+    async def stream(self, key: str, sink: OutputSink) -> bool:
+        """
+        Feed a cached result into a sink without decompressing it all at once
+
+        Returns:
+            True if the entry was found and streamed, False on a miss
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return False
+        try:
+            f = open(self._path(key), "rb")
+        except OSError as e:
+            logger.warning(f"Dropping unreadable result cache entry {key}: {str(e)}")
+            self._remove(key)
+            self.misses += 1
+            return False
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        decompressor = zlib.decompressobj()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with f:
+            os.utime(self._path(key))
+            while True:
+                data = await asyncio.to_thread(f.read, 1024 * 1024)
+                if not data:
+                    break
+                await sink.write(decoder.decode(decompressor.decompress(data)))
+            await sink.write(decoder.decode(decompressor.flush(), final=True))
+        return True
+
+    def open_writer(self, key: str) -> "ResultCacheWriter":
+        """Start an entry that is compressed and written as output streams in"""
+        return ResultCacheWriter(self, key)
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        # A unique name, as concurrent runs may store the same key
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            _remove_quietly(tmp_path)
+            raise
+
+    def _remove(self, key: str) -> None:
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for diagnostics"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached result"""
+        for key in list(self._entries):
+            self._remove(key)
+
+class ResultCacheWriter:
+    """
+    Incrementally written result cache entry.
+
+    Output is compressed as it is written and only becomes visible to readers
+    on `commit`. Entries that outgrow the cache budget are dropped on the fly,
+    and write errors drop the entry with a warning rather than failing the run.
+    """
+
+    def __init__(self, cache: ResultCache, key: str):
+        self.cache = cache
+        self.key = key
+        self.size = 0
+        self._tmp_path = f"{cache._path(key)}.{uuid.uuid4().hex}.tmp"
+        self._compressor = zlib.compressobj(1)
+        try:
+            self._file = open(self._tmp_path, "wb")
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry {key}: {str(e)}")
+            self._file = None
+
+    def write(self, text: str) -> None:
+        if self._file is None:
+            return
+        data = self._compressor.compress(text.encode("utf-8"))
+        try:
+            self._file.write(data)
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry {self.key}: {str(e)}")
+            self.discard()
+            return
+        self.size += len(data)
+        if self.size > self.cache.max_bytes:
+            logger.info("Streamed result exceeds the cache budget; not caching")
+            self.discard()
+
+    def commit(self) -> None:
+        """Publish the entry"""
+        if self._file is None:
+            return
+        try:
+            data = self._compressor.flush()
+            self._file.write(data)
+            self.size += len(data)
+            self._file.close()
+            self._file = None
+            if self.size > self.cache.max_bytes:
+                _remove_quietly(self._tmp_path)
+                return
+            os.replace(self._tmp_path, self.cache._path(self.key))
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry {self.key}: {str(e)}")
+            self.discard()
+            _remove_quietly(self._tmp_path)
+            return
+        self.cache._add(self.key, self.size)
+
+    def discard(self) -> None:
+        """Abandon the entry"""
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        _remove_quietly(self._tmp_path)
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .rendering import TabularResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StoredResult:
+    """A plugin result held on disk for paging; one row per line of the data file"""
+
+    handle: str
+    kind: str
+    path: str
+    offsets: array
+    expires_at: float
+    header: Optional[str] = None
+    columns: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.offsets) - 1
+
+class ResultStore:
+    """
+    Paged access to large plugin results without re-running the plugin.
+
+    A result is written once to a data file with one row per line, and the
+    byte offset of every row is kept in memory, so any page is a single seek
+    and read. Text results keep their column header and repeat it on every
+    page; JSON results keep their columns and types. Results expire `ttl`
+    seconds after they were last read.
+    """
+
+    BANNER_PREFIX = "Volatility 3 Framework"
+
+    def __init__(self, store_dir: str, ttl: int = 3600):
+        """
+        Initialize ResultStore
+
+        Args:
+            store_dir: Directory for the stored results (handles do not survive restarts; see remove_stale)
+            ttl: Seconds a result is kept after its last access
+        """
+        self.store_dir = store_dir
+        self.ttl = ttl
+        self._results: Dict[str, StoredResult] = {}
+        self._lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    def remove_stale(self) -> None:
+        """Delete the results a previous server process left behind; call once, before storing any"""
+        with self._lock:
+            known = {stored.path for stored in self._results.values()}
+        for entry in os.scandir(self.store_dir):
+            if entry.path not in known:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    @classmethod
+    def split_text(cls, output: str):
+        """Split text renderer output into its header line and row lines, dropping the banner and blank lines"""
+        lines = [line for line in output.splitlines() if line.strip()]
+        if lines and lines[0].startswith(cls.BANNER_PREFIX):
+            lines = lines[1:]
+        if not lines:
+            return None, []
+        return lines[0], lines[1:]
+
+    def put_text(self, header: Optional[str], rows: List[str]) -> StoredResult:
+        """Store text renderer output split by split_text"""
+        return self._store("text", rows, header=header)
+
+    def put_table(self, result: TabularResult) -> StoredResult:
+        """Store a parsed JSON result; each line holds the row's depth followed by its values"""
+        rows = (
+            json.dumps([depth] + row, separators=(",", ":"))
+            for depth, row in zip(result.depth, result.rows())
+        )
+        return self._store("table", rows, columns=result.columns, types=result.types)
+
+    def _store(self, kind: str, rows, **details) -> StoredResult:
+        self.purge_expired()
+        handle = uuid.uuid4().hex
+        path = os.path.join(self.store_dir, handle + ".rows")
+        offsets = array("Q", [0])
+        with open(path, "wb") as f:
+            for row in rows:
+                data = row.encode("utf-8") + b"\n"
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+
+        stored = StoredResult(
+            handle=handle,
+            kind=kind,
+            path=path,
+            offsets=offsets,
+            expires_at=time.time() + self.ttl,
+            **details
+        )
+        with self._lock:
+            self._results[handle] = stored
+        return stored
+
+    def get(self, handle: str) -> Optional[StoredResult]:
+        """Look up a stored result and extend its lifetime"""
+        self.purge_expired()
+        with self._lock:
+            stored = self._results.get(handle)
+            if stored is not None:
+                stored.expires_at = time.time() + self.ttl
+        return stored
+
+    def read_rows(self, stored: StoredResult, offset: int, limit: int) -> List[str]:
+        """Read `limit` rows starting at row `offset`"""
+        end = min(offset + limit, stored.row_count)
+        if offset >= end:
+            return []
+        with open(stored.path, "rb") as f:
+            f.seek(stored.offsets[offset])
+            data = f.read(stored.offsets[end] - stored.offsets[offset])
+        # Rows never contain "\n"; splitlines() would also break on other separators
+        return data.decode("utf-8").split("\n")[:-1]
+
+    def render_page(self, stored: StoredResult, offset: int, limit: int) -> str:
+        """
+        Render one page of a stored result
+
+        Text results are returned as text with the header and a trailer naming
+        the next cursor; table results as column-oriented JSON with paging fields.
+        """
+        rows = self.read_rows(stored, offset, limit)
+        end = offset + len(rows)
+        next_cursor = str(end) if end < stored.row_count else None
+        expires_in = max(0, int(stored.expires_at - time.time()))
+
+        if stored.kind == "table":
+            values = [json.loads(row) for row in rows]
+            page = TabularResult(
+                columns=stored.columns,
+                types=stored.types,
+                data=[[value[i + 1] for value in values] for i in range(len(stored.columns))],
+                depth=[value[0] for value in values],
+            )
+            return json.dumps({
+                "handle": stored.handle,
+                "offset": offset,
+                "total_rows": stored.row_count,
+                "next_cursor": next_cursor,
+                "expires_in": expires_in,
+                **page.to_dict(),
+            }, separators=(",", ":"))
+
+        if next_cursor is not None:
+            trailer = (f"[Rows {offset + 1}-{end} of {stored.row_count}. Next page: "
+                       f"get_result_page(handle=\"{stored.handle}\", cursor=\"{next_cursor}\"). "
+                       f"Expires in {expires_in}s]")
+        else:
+            trailer = f"[Rows {offset + 1}-{end} of {stored.row_count}. End of result]"
+        return "\n".join([stored.header or ""] + rows + ["", trailer])
+
+    def discard(self, handle: str) -> bool:
+        """Delete a stored result"""
+        with self._lock:
+            stored = self._results.pop(handle, None)
+        if stored is None:
+            return False
+        try:
+            os.remove(stored.path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def purge_expired(self) -> None:
+        """Delete results whose TTL has passed"""
+        now = time.time()
+        with self._lock:
+            expired = [handle for handle, stored in self._results.items() if stored.expires_at <= now]
+        for handle in expired:
+            logger.info(f"Result {handle} expired")
+            self.discard(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Store counters for diagnostics"""
+        with self._lock:
+            results = list(self._results.values())
+        return {
+            "results": len(results),
+            "rows": sum(stored.row_count for stored in results),
+            "bytes": sum(stored.offsets[-1] for stored in results),
+            "ttl": self.ttl,
+        }
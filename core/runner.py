@@ -0,0 +1,682 @@
+import asyncio
+import codecs
+import contextlib
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .fanout import SPLITTABLE_RENDERERS, split_by_pid, with_pids
+from .filtering import push_down_pids
+from .invocation import VolatilityInvocation, parse_cmd_args
+from .options import RunOptions, get_run_options, reset_run_options, set_run_options
+from .process_control import ProcessUsage, ResourceLimits, UsageReport, spawn_options, terminate_process
+from .runtime_stats import os_family
+from .streaming import OutputSink
+
+# How much of a streamed process's stderr is kept for error messages
+STDERR_TAIL_BYTES = 64 * 1024
+
+# Driver that runs a batch of plugins in one interpreter (see PluginBatch)
+MULTI_DRIVER_SCRIPT = Path(__file__).with_name("multi_driver.py")
+
+@dataclass
+class RunResult:
+    """Outcome of one Volatility execution: the output or error message, and whether it succeeded"""
+
+    output: str
+    success: bool
+
+# vol.py progress lines on stderr, e.g. "\rProgress:   42.10\t\tScanning FileLayer using PageMapScanner"
+PROGRESS_PATTERN = re.compile(rb"Progress:\s+([\d.]+)\t+([^\r\n]*)")
+
+async def read_tail(
+    stream: asyncio.StreamReader,
+    limit: int = STDERR_TAIL_BYTES,
+    on_progress: Optional[Callable[[float, str], None]] = None
+) -> bytes:
+    """
+    Read a stream to EOF keeping only its last `limit` bytes
+
+    With `on_progress`, vol.py progress lines in the stream are reported as
+    (percent, stage description) while it is read.
+    """
+    tail = b""
+    partial = b""
+    while True:
+        data = await stream.read(64 * 1024)
+        if not data:
+            return tail
+        tail = (tail + data)[-limit:]
+        if on_progress is not None:
+            # Progress lines are terminated by "\r"; keep an unterminated one for the next read
+            *lines, partial = re.split(rb"[\r\n]", partial + data)
+            for line in lines:
+                match = PROGRESS_PATTERN.search(line)
+                if match:
+                    on_progress(float(match.group(1)), match.group(2).decode("utf-8", errors="replace").strip())
+
+class BaseVolatilityRunner(ABC):
+    """
+    Common front end of the execution backends.
+
+    BasePlugin subclasses call a runner with vol.py-style arguments and get the
+    output or an error message back. Shared concerns (result caching,
+    automagic configuration reuse) are handled here; backends only implement
+    `_execute`.
+    """
+
+    timeout: int
+    config_cache = None
+    result_cache = None
+    fingerprinter = None
+    scheduler = None
+    runtime_history = None
+    metrics = None
+    # ImageNormalizer pointing runs at raw layers of container-format images
+    normalizer = None
+    # PhysicalScanner for the parallel mode of YaraScan and RegExScan
+    memory_scanner = None
+    # ScanIndex narrowing pool-tag and MFT scans to the pages holding their signatures
+    scan_index = None
+    # Whether the backend implements _execute_batch(invocations, timeout, threads, on_result) for PluginBatch
+    supports_batches = False
+
+    async def __call__(
+        self,
+        cmd_args: List[str],
+        timeout: Optional[int] = None
+    ) -> Union[str, Exception]:
+        """
+        Run a Volatility command
+
+        Args:
+            cmd_args: List of command arguments
+            timeout: Command timeout in seconds
+
+        Returns:
+            Command output or error message
+        """
+        invocation = parse_cmd_args(cmd_args)
+        options = get_run_options()
+        if options.renderer and not invocation.renderer:
+            invocation.renderer = options.renderer
+        push_down_pids(invocation, options.pids)
+        if self.normalizer is not None:
+            await self.normalizer.resolve(invocation)
+        if self.scan_index is not None:
+            await self.scan_index.resolve(invocation)
+
+        sink = options.sink
+
+        cache_key = None
+        if self.result_cache is not None:
+            # Fingerprinting reads sampled pages of the image; keep it off the event loop
+            cache_key = await asyncio.to_thread(self.result_cache.key_for, invocation)
+            if cache_key is not None and not options.no_cache and not options.profile_path:
+                if sink is not None:
+                    if await self.result_cache.stream(cache_key, sink):
+                        await sink.flush()
+                        options.succeeded = True
+                        return ""
+                else:
+                    cached = await self.result_cache.get(cache_key)
+                    if cached is not None:
+                        options.succeeded = True
+                        return cached
+
+        capture_path = None
+        if self.config_cache is not None:
+            capture_path = self.config_cache.prepare(invocation)
+
+        writer = None
+        if sink is not None and cache_key is not None:
+            # Streamed output is never held in full; compress it into the cache as it passes
+            writer = self.result_cache.open_writer(cache_key)
+            sink.observers.append(writer.write)
+        try:
+            result = await self._schedule(invocation, self._timeout_for(invocation, timeout, options), sink, options)
+            if sink is not None:
+                await sink.flush()
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+        finally:
+            if writer is not None:
+                sink.observers.remove(writer.write)
+
+        if capture_path is not None:
+            self.config_cache.commit(invocation, capture_path, result.success)
+        if writer is not None:
+            if result.success:
+                writer.commit()
+            else:
+                writer.discard()
+        elif cache_key is not None and result.success:
+            await self.result_cache.put(cache_key, result.output)
+        options.succeeded = result.success
+        return result.output
+
+    async def run_per_pid(
+        self,
+        cmd_args: List[str],
+        pids: List[int],
+        pid_column: Optional[str] = None,
+        timeout: Optional[int] = None
+    ) -> Dict[int, RunResult]:
+        """
+        Run a plugin for several PIDs, serving each PID from the result cache when possible
+
+        With `pid_column`, the PIDs that are not cached are passed to the plugin in
+        one invocation (a --pid list) and its output is split into per-PID results
+        by that column. Plugins taking a single --pid (such as MemMap) get one
+        invocation per PID instead, run in one shared process when the backend
+        supports batches. Every per-PID result lands in the result cache under
+        the key of the equivalent single-PID invocation.
+
+        Args:
+            cmd_args: Command arguments without --pid
+            pids: Process IDs
+            pid_column: Output column holding the process ID, if the plugin accepts a PID list
+            timeout: Command timeout in seconds
+
+        Returns:
+            Result per PID, in the order of `pids`; also stored in RunOptions.pid_results
+        """
+        options = get_run_options()
+        # Make sure the calls below report success through this same options object
+        token = set_run_options(options)
+        try:
+            if options.sink is not None:
+                raise ValueError("Error: Streaming is not supported with a list of PIDs")
+            base = parse_cmd_args(cmd_args)
+            if options.renderer and not base.renderer:
+                base.renderer = options.renderer
+            if self.normalizer is not None:
+                await self.normalizer.resolve(base)
+            if self.scan_index is not None:
+                await self.scan_index.resolve(base)
+            pids = list(dict.fromkeys(pids))
+            singles = {pid: with_pids(base, [pid]) for pid in pids}
+
+            results: Dict[int, RunResult] = {}
+            keys: Dict[int, Optional[str]] = {}
+            if self.result_cache is not None:
+                for pid, invocation in singles.items():
+                    keys[pid] = await asyncio.to_thread(self.result_cache.key_for, invocation)
+                    if keys[pid] is not None and not options.no_cache:
+                        cached = await self.result_cache.get(keys[pid])
+                        if cached is not None:
+                            results[pid] = RunResult(cached, True)
+
+            missing = [pid for pid in pids if pid not in results]
+            if len(missing) > 1 and pid_column and base.renderer in SPLITTABLE_RENDERERS:
+                results.update(await self._run_pid_list(base, missing, pid_column, keys, timeout, options))
+            elif missing:
+                results.update(await self._run_pids_separately(singles, missing, timeout, options))
+
+            options.pid_results = {pid: results[pid] for pid in pids}
+            options.succeeded = any(result.success for result in results.values())
+            return options.pid_results
+        finally:
+            reset_run_options(token)
+
+    async def _run_pid_list(
+        self,
+        base: VolatilityInvocation,
+        pids: List[int],
+        pid_column: str,
+        keys: Dict[int, Optional[str]],
+        timeout: Optional[int],
+        options: RunOptions
+    ) -> Dict[int, RunResult]:
+        """Run one invocation for all PIDs and split its output"""
+        output = await self(with_pids(base, pids).to_cmd_args(), timeout)
+        if not options.succeeded:
+            return {pid: RunResult(output, False) for pid in pids}
+        try:
+            outputs = split_by_pid(output, base.renderer, pids, pid_column)
+        except ValueError as e:
+            error_msg = f"Error: Could not split the {base.plugin} output by {pid_column}: {str(e)}"
+            return {pid: RunResult(error_msg, False) for pid in pids}
+        for pid, pid_output in outputs.items():
+            if keys.get(pid) is not None:
+                await self.result_cache.put(keys[pid], pid_output)
+        return {pid: RunResult(pid_output, True) for pid, pid_output in outputs.items()}
+
+    async def _run_pids_separately(
+        self,
+        singles: Dict[int, VolatilityInvocation],
+        pids: List[int],
+        timeout: Optional[int],
+        options: RunOptions
+    ) -> Dict[int, RunResult]:
+        """Run one invocation per PID, as one batch when the backend supports it"""
+        if len(pids) == 1:
+            output = await self(singles[pids[0]].to_cmd_args(), timeout)
+            return {pids[0]: RunResult(output, bool(options.succeeded))}
+
+        # batch imports this module
+        from .batch import PluginBatch
+
+        batch = None
+        if self.supports_batches:
+            batch = PluginBatch(self, members=len(pids), priority=options.priority)
+
+        async def run_one(pid: int) -> RunResult:
+            # Each task runs in a copy of the context, so it gets its own options
+            pid_options = replace(options, batch=batch, succeeded=None, batched=False)
+            set_run_options(pid_options)
+            async with batch.member() if batch is not None else contextlib.AsyncExitStack():
+                output = await self(singles[pid].to_cmd_args(), timeout)
+            return RunResult(output, bool(pid_options.succeeded))
+
+        results = await asyncio.gather(*(run_one(pid) for pid in pids))
+        return dict(zip(pids, results))
+
+    def _timeout_for(self, invocation: VolatilityInvocation, timeout: Optional[int], options: RunOptions) -> int:
+        """Explicit timeout, else one derived from the plugin's run history, else the default"""
+        if timeout or options.timeout:
+            return timeout or options.timeout
+        if self.runtime_history is not None:
+            adaptive = self.runtime_history.timeout_for(invocation.plugin, invocation.file,
+                                                        self.image_os(invocation.file))
+            if adaptive is not None:
+                self.logger.debug(f"Adaptive timeout for {invocation.plugin}: {adaptive}s")
+                return adaptive
+        return self.timeout
+
+    async def _schedule(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink],
+        options: RunOptions
+    ) -> RunResult:
+        """Wait for an execution slot, if a scheduler is configured, and execute"""
+        if options.batch is not None and self.supports_batches and sink is None and not options.profile_path:
+            # The batch holds one slot for all of its plugins
+            options.batched = True
+            return await options.batch.submit(invocation, timeout)
+        if self.scheduler is None:
+            return await self._timed_execute(invocation, timeout, sink, options)
+        async with self.scheduler.slot(invocation.file, options.priority, options.on_queue) as ticket:
+            options.queue_wait = ticket.wait_time
+            options.queue_position = ticket.position
+            if self.metrics is not None:
+                self.metrics.observe_queue_wait(options.priority, ticket.wait_time)
+            # The timeout covers execution only, not time spent queued
+            return await self._timed_execute(invocation, timeout, sink, options)
+
+    async def _timed_execute(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink],
+        options: RunOptions
+    ) -> RunResult:
+        """Execute, then add the run to the run history and the metrics"""
+        options.usage = None
+        started = time.monotonic()
+        result = await self._execute(invocation, timeout, sink)
+        elapsed = time.monotonic() - started
+        timed_out = not result.success and elapsed >= timeout
+        if not invocation.plugin:
+            return result
+        image_os = self.image_os(invocation.file)
+        if self.metrics is not None:
+            outcome = "success" if result.success else "timeout" if timed_out else "failure"
+            self.metrics.observe_run(invocation.plugin, os_family(invocation.plugin, image_os), elapsed, outcome,
+                                     options.usage)
+        # Failures other than timeouts say nothing about how long the plugin takes
+        if self.runtime_history is not None and invocation.file and (result.success or timed_out):
+            try:
+                image_size = os.path.getsize(invocation.file)
+            except OSError:
+                return result
+            self.runtime_history.record(invocation.plugin, image_size, elapsed, timed_out, image_os)
+        return result
+
+    def image_os(self, image_path: Optional[str]) -> Optional[str]:
+        """OS family of an image as far as earlier runs found it (None without an automagic cache)"""
+        if self.config_cache is None or not image_path:
+            return None
+        return self.config_cache.image_os(image_path)
+
+    def active_processes(self) -> int:
+        """Volatility processes currently running a plugin"""
+        return 0
+
+    @abstractmethod
+    async def _execute(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink] = None
+    ) -> RunResult:
+        """Run an invocation; with a sink, output goes to the sink and RunResult.output is empty on success"""
+        pass
+
+class VolatilityRunner(BaseVolatilityRunner):
+    """Class to handle Volatility command execution with proper error handling and logging"""
+
+    supports_batches = True
+
+    def __init__(
+        self,
+        volatility_python: Path,
+        volatility_script: Path,
+        volatility_dir: Path,   
+        timeout: int,
+        config_cache=None,
+        result_cache=None,
+        fingerprinter=None,
+        scheduler=None,
+        runtime_history=None,
+        metrics=None,
+        limits: Optional[ResourceLimits] = None,
+        kill_grace: float = 5.0,
+        log_level: int = logging.INFO
+    ):
+        """
+        Initialize VolatilityRunner
+
+        Args:
+            volatility_python: Path to Python executable
+            volatility_script: Path to Volatility script
+            volatility_dir: Working directory for Volatility
+            config_cache: Optional AutomagicConfigCache used to replay automagic results
+            result_cache: Optional ResultCache serving repeated runs
+            fingerprinter: Optional ImageFingerprinter shared with plugins for image validation
+            scheduler: Optional JobScheduler limiting concurrent vol.py processes
+            runtime_history: Optional RuntimeHistory deriving timeouts from earlier runs
+            metrics: Optional RunMetrics recording plugin runs and queue waits
+            limits: Optional ResourceLimits applied to every vol.py process
+            kill_grace: Seconds a timed-out or cancelled vol.py gets between SIGTERM and SIGKILL
+            log_level: Logging level (default: logging.INFO)
+        """
+        self.volatility_python = str(volatility_python)
+        self.volatility_script = str(volatility_script)
+        self.volatility_dir = str(volatility_dir)
+        self.timeout = timeout
+        self.config_cache = config_cache
+        self.result_cache = result_cache
+        self.fingerprinter = fingerprinter
+        self.scheduler = scheduler
+        self.runtime_history = runtime_history
+        self.metrics = metrics
+        self.limits = limits
+        self.kill_grace = kill_grace
+        # Spawned processes, for active_processes; reaped ones drop out on their own
+        self._processes = weakref.WeakSet()
+
+        # Set up logging
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(log_level)
+
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+
+        # Validate paths
+        self._validate_paths()
+
+    def _validate_paths(self) -> None:
+        """Validate that all required paths exist"""
+        paths = {
+            "Volatility Python": self.volatility_python,
+            "Volatility Script": self.volatility_script,
+            "Volatility Directory": self.volatility_dir
+        }
+
+        for name, path in paths.items():
+            if not Path(path).exists():
+                error_msg = f"{name} path does not exist: {path}"
+                self.logger.error(error_msg)
+                raise FileNotFoundError(error_msg)
+
+    async def _spawn(self, cmd: List[str], limits: Optional[ResourceLimits] = None, **kwargs):
+        """
+        Start a process in its own process group, under the resource limits
+
+        On POSIX the command runs under core/launcher.py, which applies the
+        limits and reports the command's peak RSS and CPU time.
+
+        Returns:
+            The process and the UsageReport to read once it exited (None without the launcher)
+        """
+        report = UsageReport() if os.name == "posix" else None
+        if report is not None:
+            cmd = report.wrap(self.volatility_python, cmd, limits or self.limits)
+            kwargs["pass_fds"] = (report.write_fd,)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.volatility_dir,
+                **spawn_options(),
+                **kwargs
+            )
+        except BaseException:
+            if report is not None:
+                report.read()
+            raise
+        self._processes.add(process)
+        if report is not None:
+            report.started()
+        return process, report
+
+    def active_processes(self) -> int:
+        """vol.py and plugin driver processes that have not exited yet"""
+        return sum(1 for process in list(self._processes) if process.returncode is None)
+
+    def _read_usage(self, report: Optional[UsageReport], cmd_str: str) -> Optional[ProcessUsage]:
+        """Collect the usage of a finished process"""
+        usage = report.read() if report is not None else None
+        if usage is not None:
+            self.logger.debug(f"Peak RSS {usage.peak_rss} bytes, CPU {usage.cpu_time:.2f}s: {cmd_str}")
+        return usage
+
+    def _record_usage(self, report: Optional[UsageReport], cmd_str: str) -> None:
+        """Store the usage of a finished run in the call's options"""
+        usage = self._read_usage(report, cmd_str)
+        if usage is not None:
+            get_run_options().usage = usage
+
+    async def _execute(
+        self,
+        invocation: VolatilityInvocation,
+        timeout: int,
+        sink: Optional[OutputSink] = None
+    ) -> RunResult:
+        """Run vol.py in a subprocess"""
+        options = get_run_options()
+        cmd = [self.volatility_python, self.volatility_script] + invocation.to_cmd_args()
+        if options.profile_path:
+            cmd[1:1] = ["-m", "cProfile", "-o", options.profile_path]
+        cmd_str = ' '.join(cmd)
+
+        self.logger.info(f"Running command: {cmd_str}")
+        on_progress = options.on_progress
+        if sink is not None:
+            return await self._execute_streaming(cmd, cmd_str, timeout, sink, on_progress)
+
+        try:
+            process, report = await self._spawn(cmd)
+
+            async def communicate():
+                # Like process.communicate(), but stderr is scanned for progress as it arrives
+                output = await asyncio.gather(process.stdout.read(), read_tail(process.stderr, on_progress=on_progress))
+                await process.wait()
+                return output
+
+            try:
+                stdout, stderr = await asyncio.wait_for(communicate(), timeout=timeout)
+            except BaseException as e:
+                # Also reached when the call is cancelled; never leave vol.py or its children running
+                await terminate_process(process, self.kill_grace)
+                self._record_usage(report, cmd_str)
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                error_msg = f"Command timed out after {timeout} seconds: {cmd_str}"
+                self.logger.error(error_msg)
+                return RunResult(error_msg, False)
+            self._record_usage(report, cmd_str)
+
+            if process.returncode != 0:
+                stderr_text = stderr.decode('utf-8', errors='replace')
+                error_msg = f"Command failed with return code {process.returncode}: {stderr_text}"
+                self.logger.error(error_msg)
+                return RunResult(error_msg, False)
+
+            output = stdout.decode('utf-8', errors='replace')
+            self.logger.debug(f"Command completed successfully: {cmd_str}")
+            return RunResult(output, True)
+
+        except Exception as e:
+            error_msg = f"Exception running command {cmd_str}: {str(e)}"
+            self.logger.exception(error_msg)
+            return RunResult(error_msg, False)
+
+    async def _execute_streaming(
+        self,
+        cmd: List[str],
+        cmd_str: str,
+        timeout: int,
+        sink: OutputSink,
+        on_progress: Optional[Callable[[float, str], None]] = None
+    ) -> RunResult:
+        """Run vol.py in a subprocess, forwarding stdout to the sink as it is produced"""
+        try:
+            process, report = await self._spawn(cmd)
+
+            async def pump_stdout() -> None:
+                # Reading only after the previous chunk was sent gives backpressure
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                while True:
+                    data = await process.stdout.read(64 * 1024)
+                    if not data:
+                        break
+                    await sink.write(decoder.decode(data))
+                await sink.write(decoder.decode(b"", final=True))
+                await process.wait()
+
+            # stderr must be read concurrently or vol.py blocks once the pipe fills
+            stderr_task = asyncio.ensure_future(read_tail(process.stderr, on_progress=on_progress))
+            try:
+                await asyncio.wait_for(pump_stdout(), timeout=timeout)
+            except BaseException as e:
+                await terminate_process(process, self.kill_grace)
+                self._record_usage(report, cmd_str)
+                stderr_task.cancel()
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                error_msg = f"Command timed out after {timeout} seconds: {cmd_str}"
+                self.logger.error(error_msg)
+                return RunResult(error_msg, False)
+            self._record_usage(report, cmd_str)
+            stderr = await stderr_task
+
+            if process.returncode != 0:
+                stderr_text = stderr.decode('utf-8', errors='replace')
+                error_msg = f"Command failed with return code {process.returncode}: {stderr_text}"
+                self.logger.error(error_msg)
+                return RunResult(error_msg, False)
+
+            self.logger.debug(f"Command completed successfully: {cmd_str}")
+            return RunResult("", True)
+
+        except Exception as e:
+            error_msg = f"Exception running command {cmd_str}: {str(e)}"
+            self.logger.exception(error_msg)
+            return RunResult(error_msg, False)
+
+    async def _execute_batch(
+        self,
+        invocations: List[VolatilityInvocation],
+        timeout: int,
+        threads: int,
+        on_result: Callable[[int, RunResult], None]
+    ) -> Optional[str]:
+        """
+        Run the invocations through the multi-plugin driver, which shares one volatility context
+
+        on_result(index, result) is called as each invocation finishes.
+
+        Returns:
+            Error message for invocations that produced no result, or None
+        """
+        cmd = [self.volatility_python, str(MULTI_DRIVER_SCRIPT), "--volatility-dir", self.volatility_dir]
+        plugins = ", ".join(invocation.plugin or "--help" for invocation in invocations)
+        request = json.dumps({
+            "invocations": [asdict(invocation) for invocation in invocations],
+            "threads": threads,
+        }).encode("utf-8")
+        # Plugins after the first skip the automagic pass, but still each get the full timeout
+        batch_timeout = timeout * len(invocations)
+
+        self.logger.info(f"Running {len(invocations)} plugins in one process: {plugins}")
+        limits = self.limits
+        if limits is not None and limits.cpu_time:
+            # The CPU limit is per plugin; the batch process runs them all
+            limits = replace(limits, cpu_time=limits.cpu_time * len(invocations))
+        try:
+            process, report = await self._spawn(cmd, limits, stdin=subprocess.PIPE)
+
+            async def read_frames() -> None:
+                process.stdin.write(request)
+                await process.stdin.drain()
+                process.stdin.close()
+                while True:
+                    header = await process.stdout.readline()
+                    if not header:
+                        break
+                    frame = json.loads(header)
+                    payload = (await process.stdout.readexactly(frame["length"])).decode("utf-8", errors="replace")
+                    if frame["status"] == "ok":
+                        on_result(frame["index"], RunResult(payload, True))
+                    else:
+                        error_msg = f"Command failed: {payload}"
+                        self.logger.error(f"{invocations[frame['index']].plugin}: {error_msg}")
+                        on_result(frame["index"], RunResult(error_msg, False))
+                await process.wait()
+
+            stderr_task = asyncio.ensure_future(read_tail(process.stderr))
+            try:
+                await asyncio.wait_for(read_frames(), timeout=batch_timeout)
+            except BaseException as e:
+                await terminate_process(process, self.kill_grace)
+                self._read_usage(report, plugins)
+                stderr_task.cancel()
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                error_msg = f"Plugin batch timed out after {batch_timeout} seconds: {plugins}"
+                self.logger.error(error_msg)
+                return error_msg
+            self._read_usage(report, plugins)
+            stderr = await stderr_task
+
+            if process.returncode != 0:
+                stderr_text = stderr.decode('utf-8', errors='replace')
+                error_msg = f"Plugin driver failed with return code {process.returncode}: {stderr_text}"
+                self.logger.error(error_msg)
+                return error_msg
+            return None
+
+        except Exception as e:
+            error_msg = f"Exception running plugin batch {plugins}: {str(e)}"
+            self.logger.exception(error_msg)
+            return error_msg
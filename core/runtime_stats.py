@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024 ** 3
+OS_FAMILIES = ("windows", "linux", "mac")
+
+def os_family(plugin: str, image_os: Optional[str] = None) -> str:
+    """
+    OS family of a plugin run
+
+    The OS of the image when it is known (see AutomagicConfigCache.image_os), else the
+    one the plugin targets by its name prefix ('any' for OS-independent plugins).
+    """
+    if image_os in OS_FAMILIES:
+        return image_os
+    prefix = plugin.split(".", 1)[0].lower()
+    return prefix if prefix in OS_FAMILIES else "any"
+
+def quantile(values: List[float], q: float) -> float:
+    """Linearly interpolated quantile of a non-empty list"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+@dataclass
+class RuntimeEstimate:
+    """Predicted runtime of a plugin on an image of a given size"""
+
+    plugin: str
+    os_family: str
+    samples: int
+    # Median and 99th percentile runtime in seconds
+    expected: float
+    p99: float
+    # Timeout derived from p99, clamped to the configured range
+    timeout: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plugin": self.plugin,
+            "os": self.os_family,
+            "samples": self.samples,
+            "expected_seconds": round(self.expected, 1),
+            "p99_seconds": round(self.p99, 1),
+            "timeout": self.timeout,
+        }
+
+class RuntimeHistory:
+    """
+    Runtime statistics per plugin and OS family, used for adaptive timeouts.
+
+    Runs are grouped by the OS of the image where it is known, so e.g.
+    banners.Banners on Windows and on Linux images are fitted separately.
+    Every completed run is recorded with the image size. Runtime is modelled
+    as fixed cost plus cost per GiB, fitted by least squares over the recent
+    samples, so a plugin that walks process lists and one that scans the whole
+    image both extrapolate sensibly to image sizes not seen before. The spread
+    of the samples around the fit gives the median and p99 estimates, and the
+    timeout is p99 times `factor`. Runs that timed out are kept out of the fit;
+    each one makes later timeouts at least twice the time it had, so a plugin
+    that outgrew its history recovers. History is persisted as one JSON file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        factor: float = 3.0,
+        min_samples: int = 3,
+        min_timeout: int = 30,
+        max_timeout: int = 6 * 3600,
+        max_samples: int = 50,
+        adaptive_timeouts: bool = True
+    ):
+        """
+        Initialize RuntimeHistory
+
+        Args:
+            path: JSON file the history is persisted in (memory only if None)
+            factor: Timeout as a multiple of the p99 runtime
+            min_samples: Runs needed before a plugin gets an estimate
+            min_timeout: Lower bound for derived timeouts in seconds
+            max_timeout: Upper bound for derived timeouts in seconds
+            max_samples: Most recent runs kept per plugin and OS family
+            adaptive_timeouts: Whether timeout_for derives timeouts (runs are recorded either way)
+        """
+        self.path = path
+        self.factor = factor
+        self.min_samples = max(1, min_samples)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_samples = max_samples
+        self.adaptive_timeouts = adaptive_timeouts
+        self._lock = threading.Lock()
+        # "plugin|os" -> [[image size in GiB, seconds, timed out], ...]
+        self._samples: Dict[str, List[List[Any]]] = {}
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._samples = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable runtime history {path}: {e}")
+
+    @staticmethod
+    def _key(plugin: str, family: str) -> str:
+        return f"{plugin}|{family}"
+
+    def record(self, plugin: str, image_size: int, seconds: float, timed_out: bool = False,
+               image_os: Optional[str] = None) -> None:
+        """
+        Record a plugin run
+
+        Args:
+            plugin: Volatility plugin name (e.g. windows.filescan.FileScan)
+            image_size: Image size in bytes
+            seconds: Execution time, or the timeout the run hit
+            timed_out: Whether the run was stopped by its timeout
+            image_os: OS family of the image, if known
+        """
+        key = self._key(plugin, os_family(plugin, image_os))
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            samples.append([round(image_size / GIB, 3), round(seconds, 3), timed_out])
+            del samples[:-self.max_samples]
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(self._samples, f)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not save runtime history {self.path}: {e}")
+
+    @staticmethod
+    def _fit(samples: List[Tuple[float, float]]) -> Tuple[float, float]:
+        """Fixed seconds and seconds per GiB, both non-negative"""
+        xs = [x for x, _ in samples]
+        ys = [y for _, y in samples]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        if variance < 1e-6 or max(xs) < 2 * min(xs):
+            # All images about the same size: assume runtime grows with size from here,
+            # which errs towards longer timeouts on bigger images
+            return 0.0, mean_y / max(mean_x, 1e-3)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance
+        if slope <= 0:
+            return mean_y, 0.0
+        intercept = mean_y - slope * mean_x
+        if intercept < 0:
+            return 0.0, sum(x * y for x, y in samples) / sum(x * x for x in xs)
+        return intercept, slope
+
+    def estimate(self, plugin: str, image_size: int, image_os: Optional[str] = None) -> Optional[RuntimeEstimate]:
+        """
+        Predict the runtime of a plugin on an image
+
+        Args:
+            plugin: Volatility plugin name
+            image_size: Image size in bytes
+            image_os: OS family of the image, if known
+
+        Returns:
+            The estimate, or None with fewer than `min_samples` recorded runs
+        """
+        family = os_family(plugin, image_os)
+        with self._lock:
+            recorded = list(self._samples.get(self._key(plugin, family), []))
+        samples = [(max(x, 1e-3), y) for x, y, timed_out in recorded if not timed_out]
+        if len(samples) < self.min_samples:
+            return None
+        intercept, slope = self._fit(samples)
+        size = image_size / GIB
+
+        def predict(x: float) -> float:
+            return max(intercept + slope * x, 0.1)
+
+        # How far actual runtimes fall from the fit, as a ratio
+        ratios = [y / predict(x) for x, y in samples]
+        base = predict(size)
+        expected = base * quantile(ratios, 0.5)
+        p99 = base * max(quantile(ratios, 0.99), 1.0)
+        timeout = p99 * self.factor
+        for x, y, timed_out in recorded:
+            if timed_out:
+                # Give at least twice the time a run on an image this size would have had
+                timeout = max(timeout, 2 * y * max(1.0, size / max(x, 1e-3)))
+        timeout = int(min(max(timeout, self.min_timeout), self.max_timeout))
+        return RuntimeEstimate(plugin, family, len(samples), expected, p99, timeout)
+
+    def find(self, name: str) -> List[str]:
+        """
+        Recorded volatility plugin names matching a server plugin name
+
+        A server name such as 'windows.PsList' matches windows.pslist.PsList,
+        and 'Banners' matches banners.Banners.
+        """
+        family = os_family(name)
+        class_name = name.rsplit(".", 1)[-1].lower()
+        with self._lock:
+            plugins = {key.split("|", 1)[0] for key in self._samples}
+        return sorted(
+            plugin for plugin in plugins
+            if plugin == name or (
+                plugin.rsplit(".", 1)[-1].lower() == class_name and os_family(plugin) == family
+            )
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of recorded runs and timeouts per plugin and OS family"""
+        with self._lock:
+            return {
+                key.replace("|", " on "): {
+                    "runs": len(samples),
+                    "timeouts": sum(1 for sample in samples if sample[2]),
+                }
+                for key, samples in sorted(self._samples.items())
+            }
+
+    def timeout_for(self, plugin: Optional[str], image_path: Optional[str],
+                    image_os: Optional[str] = None) -> Optional[int]:
+        """Adaptive timeout for a run, or None when there is not enough history"""
+        if not self.adaptive_timeouts or not plugin or not image_path:
+            return None
+        try:
+            image_size = os.path.getsize(image_path)
+        except OSError:
+            return None
+        estimate = self.estimate(plugin, image_size, image_os)
+        return estimate.timeout if estimate is not None else None
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+from .fingerprint import ImageFingerprinter
+from .invocation import VolatilityInvocation
+from .memscan import PLUGIN_DIR
+from .normalization import detect_container
+from .process_control import ProcessPool
+from .sparse import data_regions
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 4096
+
+# Signatures volatility's Windows scanners search physical memory (or the kernel
+# address space backed by it) for: the pool tags of windows.poolscanner's built-in
+# constraints and of netscan, svcscan's service record tags, and MFT record headers
+SCAN_TAGS = (
+    b"Proc", b"Pro\xe3", b"File", b"Fil\xe5", b"Thre", b"Thr\xe5", b"Muta", b"Mut\xe1",
+    b"Driv", b"Dri\xf6", b"Symb", b"Sym\xe2", b"MmLd", b"AtmT", b"CM10",
+    b"TcpL", b"TcpE", b"UdpA", b"TTcb",
+    b"sErv", b"serH",
+    b"FILE0", b"FILE*", b"BAAD",
+)
+
+# Volatility plugin -> (narrowed plugin in core/volatility_plugins/indexedscan.py, signatures it scans for)
+INDEXED_PLUGINS = {
+    "windows.psscan.PsScan": ("indexedscan.PsScan", (b"Proc", b"Pro\xe3")),
+    "windows.filescan.FileScan": ("indexedscan.FileScan", (b"File", b"Fil\xe5")),
+    "windows.netscan.NetScan": ("indexedscan.NetScan", (b"TcpL", b"TcpE", b"UdpA", b"TTcb")),
+    "windows.svcscan.SvcScan": ("indexedscan.SvcScan", (b"sErv", b"serH")),
+    "windows.mftscan.MFTScan": ("indexedscan.MFTScan", (b"FILE0", b"FILE*", b"BAAD")),
+    "windows.mftscan.ADS": ("indexedscan.ADS", (b"FILE0", b"FILE*", b"BAAD")),
+    "windows.mftscan.ResidentData": ("indexedscan.ResidentData", (b"FILE0", b"FILE*", b"BAAD")),
+}
+
+_OVERLAP = max(len(tag) for tag in SCAN_TAGS) - 1
+
+def _index_chunk(path: str, start: int, end: int) -> Dict[bytes, Any]:
+    """
+    Pages of [start, end) holding each signature, and the number of occurrences
+
+    A signature crossing a page boundary marks both pages, so a scan of the
+    pages alone still sees it whole.
+    """
+    regex = re.compile(b"|".join(re.escape(tag) for tag in sorted(SCAN_TAGS, key=len, reverse=True)))
+    found: Dict[bytes, Any] = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        stop = min(end + _OVERLAP, len(view))
+        for match in regex.finditer(view, start, stop):
+            offset = match.start()
+            if offset >= end:
+                break
+            pages, count = found.setdefault(match.group(), (set(), [0]))
+            pages.add(offset // PAGE_SIZE)
+            pages.add((match.end() - 1) // PAGE_SIZE)
+            count[0] += 1
+    return {tag: (array("I", sorted(pages)).tobytes(), count[0]) for tag, (pages, count) in found.items()}
+
+class ScanIndex:
+    """
+    One-pass index of the pages holding the signatures of Windows scan plugins.
+
+    Volatility's PsScan, FileScan, NetScan, SvcScan and MFTScan each sweep
+    the whole image for their own pool tags or record headers. A ScanIndex
+    reads the image once, in parallel chunks through mmap, and records for
+    every signature the pages it occurs on (as a sorted array of 32-bit page
+    numbers) under `cache_dir/<image identity>`. Once an image has an index,
+    runs of those plugins are rewritten to their indexedscan.* counterparts,
+    which scan only the indexed pages (in physical memory, or the virtual
+    pages mapping them) and otherwise behave identically. Indexes are keyed
+    by the image's fingerprint, size and mtime, so a changed image is
+    indexed again. Only raw
+    images are indexed, as only their file offsets are physical addresses.
+    """
+
+    def __init__(self, cache_dir: str, fingerprinter: ImageFingerprinter, workers: Optional[int] = None,
+                 chunk_bytes: int = 64 * 1024 * 1024, auto_build: bool = True, pool: Optional[ProcessPool] = None):
+        """
+        Initialize ScanIndex
+
+        Args:
+            cache_dir: Directory for the indexes
+            fingerprinter: ImageFingerprinter identifying images
+            workers: Worker processes of a private pool (default: number of CPUs)
+            chunk_bytes: Bytes each worker task indexes
+            auto_build: Build an image's index in the background the first time
+                an indexable plugin runs on it
+            pool: ProcessPool to index in, e.g. the PhysicalScanner's (a private one if None)
+        """
+        self.cache_dir = cache_dir
+        self.fingerprinter = fingerprinter
+        self.pool = pool or ProcessPool(workers)
+        self.chunk_bytes = chunk_bytes
+        self.auto_build = auto_build
+        os.makedirs(cache_dir, exist_ok=True)
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.builds = 0
+        self.narrowed_runs = 0
+
+    def remove_partial_builds(self) -> None:
+        """Remove builds a crash left unfinished; call once when the server starts, as running builds look the same"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and entry.name.endswith(".part"):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _index_dir(self, path: str) -> str:
+        return os.path.join(self.cache_dir, self.fingerprinter.identity(path))
+
+    def lookup(self, path: str) -> Optional[str]:
+        """Index directory of an image, if its current contents have been indexed"""
+        try:
+            index_dir = self._index_dir(path)
+        except OSError:
+            return None
+        return index_dir if os.path.isfile(os.path.join(index_dir, "index.json")) else None
+
+    def info(self, path: str) -> Optional[Dict[str, Any]]:
+        """Summary of an image's index: build time and occurrences and pages per signature"""
+        index_dir = self.lookup(path)
+        if index_dir is None:
+            return None
+        try:
+            with open(os.path.join(index_dir, "index.json")) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        index["tags"] = {
+            bytes.fromhex(tag).decode("latin-1"): {"count": entry["count"], "pages": entry["pages"]}
+            for tag, entry in index["tags"].items()
+        }
+        return index
+
+    async def resolve(self, invocation: VolatilityInvocation) -> bool:
+        """
+        Rewrite a scan plugin invocation to its index-narrowed counterpart
+
+        Starts building the index in the background when an indexable plugin runs
+        on an image without one (if auto_build is set).
+
+        Returns:
+            Whether the invocation was rewritten
+        """
+        if not invocation.file or invocation.help or invocation.plugin not in INDEXED_PLUGINS:
+            return False
+        # Fingerprinting reads sampled pages of the image; keep it off the event loop
+        index_dir = await asyncio.to_thread(self.lookup, invocation.file)
+        if index_dir is None:
+            if self.auto_build:
+                self.submit(invocation.file)
+            return False
+        plugin, tags = INDEXED_PLUGINS[invocation.plugin]
+        invocation.plugin = plugin
+        invocation.plugin_dirs = str(PLUGIN_DIR)
+        invocation.plugin_args["index_dir"] = [index_dir]
+        invocation.plugin_args["index_tags"] = [tag.hex() for tag in tags]
+        self.narrowed_runs += 1
+        return True
+
+    def submit(self, path: str) -> Optional[asyncio.Future]:
+        """Start building an image's index unless it exists, is being built, or the image is not raw"""
+        real_path = os.path.realpath(path)
+        task = self._tasks.get(real_path)
+        if task is not None or self.lookup(real_path) is not None or detect_container(real_path) is not None:
+            return task
+        task = asyncio.ensure_future(self.build(real_path))
+        task.add_done_callback(self._log_failure)
+        return task
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Scan index build failed: {future.exception()}")
+
+    async def build(self, path: str) -> str:
+        """
+        Index an image unless it already is; concurrent calls share one build
+
+        Returns:
+            The index directory
+
+        Raises:
+            ValueError: the image is a container format
+            OSError: the image cannot be read or the index written
+        """
+        real_path = os.path.realpath(path)
+        index_dir = self.lookup(real_path)
+        if index_dir is not None:
+            return index_dir
+        if detect_container(real_path) is not None:
+            raise ValueError(f"{real_path} is a container image; normalize it to index its physical memory")
+        task = self._tasks.get(real_path)
+        if task is None:
+            task = asyncio.ensure_future(self._build(real_path))
+            self._tasks[real_path] = task
+            task.add_done_callback(lambda _: self._tasks.pop(real_path, None))
+        return await asyncio.shield(task)
+
+    async def _build(self, real_path: str) -> str:
+        started = time.monotonic()
+        index_dir = await asyncio.to_thread(self._index_dir, real_path)
+        size = os.path.getsize(real_path)
+        with open(real_path, "rb") as f:
+            chunks = [
+                (start, min(start + self.chunk_bytes, region_end))
+                for region_start, region_end in data_regions(f.fileno(), size)
+                for start in range(region_start, region_end, self.chunk_bytes)
+            ]
+        logger.info(f"Building the scan index of {real_path} ({len(chunks)} chunks)")
+
+        pages: Dict[bytes, set] = {tag: set() for tag in SCAN_TAGS}
+        counts: Dict[bytes, int] = dict.fromkeys(SCAN_TAGS, 0)
+        if chunks:
+            tasks = [self.pool.submit(_index_chunk, real_path, start, end) for start, end in chunks]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    for tag, (page_bytes, count) in (await task).items():
+                        values = array("I")
+                        values.frombytes(page_bytes)
+                        pages[tag].update(values)
+                        counts[tag] += count
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        await asyncio.to_thread(self._write, real_path, index_dir, pages, counts, size,
+                                round(time.monotonic() - started, 1))
+        self.builds += 1
+        logger.info(f"Indexed {real_path} in {round(time.monotonic() - started, 1)}s: "
+                    f"{sum(counts.values())} signatures on {len(set().union(*pages.values()))} pages")
+        return index_dir
+
+    def _write(self, real_path: str, index_dir: str, pages: Dict[bytes, set], counts: Dict[bytes, int],
+               size: int, seconds: float) -> None:
+        work_dir = index_dir + ".part"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        tags = {}
+        for tag in SCAN_TAGS:
+            name = tag.hex() + ".pages"
+            with open(os.path.join(work_dir, name), "wb") as f:
+                f.write(array("I", sorted(pages[tag])).tobytes())
+            tags[tag.hex()] = {"file": name, "count": counts[tag], "pages": len(pages[tag])}
+        with open(os.path.join(work_dir, "index.json"), "w") as f:
+            json.dump({"path": real_path, "size": size, "created": time.time(), "seconds": seconds,
+                       "tags": tags}, f, indent=2)
+        shutil.rmtree(index_dir, ignore_errors=True)
+        os.replace(work_dir, index_dir)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "building": len(self._tasks),
+            "builds": self.builds,
+            "narrowed_runs": self.narrowed_runs,
+        }
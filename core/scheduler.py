@@ -0,0 +1,179 @@
+import asyncio
+import contextlib
+import os
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+# Dispatch order: every waiting interactive call is considered before any background one
+PRIORITIES = ("interactive", "background")
+
+@dataclass
+class Ticket:
+    """A request for an execution slot"""
+
+    image: Optional[str]
+    priority: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    # 1-based queue position when the request had to wait, 0 if it started immediately
+    position: int = 0
+    _future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def wait_time(self) -> float:
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+class JobScheduler:
+    """
+    Admission control in front of the execution backends.
+
+    At most `max_slots` plugin runs execute at once, and at most
+    `per_image_limit` of them against the same image. Waiting requests are
+    served by priority class (interactive before background) and first in,
+    first out within a class. A request whose image is at its limit does not
+    hold up requests for other images behind it.
+    """
+
+    def __init__(self, max_slots: int, per_image_limit: int = 0, report_interval: float = 5.0):
+        """
+        Initialize JobScheduler
+
+        Args:
+            max_slots: Maximum concurrent plugin runs
+            per_image_limit: Maximum concurrent runs per image (0 for no limit)
+            report_interval: Seconds between queue position reports to waiting callers
+        """
+        self.max_slots = max(1, max_slots)
+        self.per_image_limit = per_image_limit
+        self.report_interval = report_interval
+        self._queues: Dict[str, Deque[Ticket]] = {priority: deque() for priority in PRIORITIES}
+        self._running = 0
+        self._running_per_image: Counter = Counter()
+        self.total_started = 0
+        self.total_wait = 0.0
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based position of a waiting ticket in dispatch order, 0 if it is not waiting"""
+        ahead = 0
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            if priority == ticket.priority:
+                return ahead + queue.index(ticket) + 1 if ticket in queue else 0
+            ahead += len(queue)
+        return 0
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            for ticket in list(queue):
+                if self._running >= self.max_slots:
+                    return
+                if (self.per_image_limit and ticket.image
+                        and self._running_per_image[ticket.image] >= self.per_image_limit):
+                    continue
+                queue.remove(ticket)
+                self._start(ticket)
+                ticket._future.set_result(None)
+
+    def _start(self, ticket: Ticket) -> None:
+        self._running += 1
+        if ticket.image:
+            self._running_per_image[ticket.image] += 1
+        ticket.started_at = time.monotonic()
+        self.total_started += 1
+        self.total_wait += ticket.wait_time
+
+    async def acquire(
+        self,
+        image: Optional[str],
+        priority: str = "interactive",
+        on_wait: Optional[Callable[[int, float], Awaitable[None]]] = None
+    ) -> Ticket:
+        """
+        Wait for an execution slot
+
+        Args:
+            image: Image the run reads (None if it reads none)
+            priority: "interactive" or "background"
+            on_wait: Called with (queue position, seconds waited) when the request is queued
+                and every `report_interval` seconds while it waits
+
+        Returns:
+            The ticket to pass to release()
+
+        Raises:
+            ValueError: unknown priority
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}")
+
+        ticket = Ticket(image=os.path.realpath(image) if image else None, priority=priority)
+        ticket._future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(ticket)
+        self._dispatch()
+        if ticket._future.done():
+            return ticket
+
+        ticket.position = self.position(ticket)
+        try:
+            while not ticket._future.done():
+                if on_wait is not None:
+                    await on_wait(self.position(ticket), ticket.wait_time)
+                await asyncio.wait({ticket._future}, timeout=self.report_interval)
+        except BaseException:
+            if ticket._future.done() and not ticket._future.cancelled():
+                self.release(ticket)
+            else:
+                ticket._future.cancel()
+                with contextlib.suppress(ValueError):
+                    self._queues[priority].remove(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Free the slot held by a ticket and start the next eligible waiter"""
+        self._running -= 1
+        if ticket.image:
+            self._running_per_image[ticket.image] -= 1
+            if not self._running_per_image[ticket.image]:
+                del self._running_per_image[ticket.image]
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        image: Optional[str],
+        priority: str = "interactive",
+        on_wait: Optional[Callable[[int, float], Awaitable[None]]] = None
+    ):
+        """Hold an execution slot for the duration of the block"""
+        ticket = await self.acquire(image, priority, on_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler state for diagnostics"""
+        now = time.monotonic()
+        return {
+            "max_slots": self.max_slots,
+            "per_image_limit": self.per_image_limit,
+            "running": self._running,
+            "running_per_image": dict(self._running_per_image),
+            "queued": {priority: len(queue) for priority, queue in self._queues.items()},
+            "waiting": [
+                {
+                    "position": self.position(ticket),
+                    "priority": ticket.priority,
+                    "image": ticket.image,
+                    "waited": round(now - ticket.enqueued_at, 3),
+                }
+                for priority in PRIORITIES for ticket in self._queues[priority]
+            ],
+            "started": self.total_started,
+            "average_wait": round(self.total_wait / self.total_started, 3) if self.total_started else 0.0,
+        }
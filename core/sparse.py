@@ -0,0 +1,363 @@
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 4096
+# Pages are compared in blocks first; a zero block is skipped whole, a mixed one page by page
+BLOCK_SIZE = 64 * 1024
+CHUNK_SIZE = 4 * 1024 * 1024
+_ZEROS = bytes(CHUNK_SIZE)
+
+# fallocate(2) modes
+_FALLOC_FL_KEEP_SIZE = 0x01
+_FALLOC_FL_PUNCH_HOLE = 0x02
+
+def zero_runs(data) -> List[Tuple[int, int]]:
+    """
+    Page-aligned runs of zero bytes in a buffer, as (start, end) offsets
+
+    Comparisons run as memcmp against a zero buffer, a block at a time, so
+    zero and data blocks cost one call each; only blocks holding both are
+    looked at page by page. A trailing partial page counts if it is all zero.
+    """
+    view = memoryview(data)
+    length = len(view)
+    if length <= CHUNK_SIZE and view == _ZEROS[:length]:
+        return [(0, length)] if length else []
+    runs: List[Tuple[int, int]] = []
+
+    def add(start: int, end: int) -> None:
+        if runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+
+    for block in range(0, length, BLOCK_SIZE):
+        block_end = min(block + BLOCK_SIZE, length)
+        if view[block:block_end] == _ZEROS[:block_end - block]:
+            add(block, block_end)
+            continue
+        for page in range(block, block_end, PAGE_SIZE):
+            page_end = min(page + PAGE_SIZE, block_end)
+            if view[page:page_end] == _ZEROS[:page_end - page]:
+                add(page, page_end)
+    return runs
+
+class SparseWriter:
+    """
+    Writes a stream to a file, seeking over zero pages instead of writing them
+
+    The file must be new (or empty) and opened for binary writing. Data is
+    handled in whole pages, so callers may write chunks of any size; close()
+    writes the remainder and sets the final size, which a trailing hole would
+    otherwise leave short.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.size = 0
+        self.zero_bytes = 0
+        self._pending = bytearray()
+
+    def write(self, data) -> None:
+        self._pending += data
+        if len(self._pending) >= CHUNK_SIZE:
+            usable = len(self._pending) - len(self._pending) % PAGE_SIZE
+            self._flush(usable)
+
+    def _flush(self, length: int) -> None:
+        view = memoryview(self._pending)[:length]
+        position = 0
+        for start, end in zero_runs(view):
+            if start > position:
+                self.output.write(view[position:start])
+            self.output.seek(end - start, os.SEEK_CUR)
+            self.zero_bytes += end - start
+            position = end
+        if position < length:
+            self.output.write(view[position:length])
+        view.release()
+        self.size += length
+        del self._pending[:length]
+
+    def close(self) -> None:
+        self._flush(len(self._pending))
+        self.output.truncate(self.size)
+
+def write_sparse(stream, output, chunk_bytes: int = 1024 * 1024, digest=None) -> Dict[str, int]:
+    """
+    Copy a stream to a file with SparseWriter
+
+    Args:
+        stream: Readable binary stream
+        output: Writable binary file positioned at 0
+        chunk_bytes: Read size
+        digest: Optional hashlib object updated with every byte read
+
+    Returns:
+        {"size": bytes copied, "zero_bytes": bytes left as holes}
+    """
+    writer = SparseWriter(output)
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            break
+        if digest is not None:
+            digest.update(chunk)
+        writer.write(chunk)
+    writer.close()
+    return {"size": writer.size, "zero_bytes": writer.zero_bytes}
+
+def allocated_bytes(path: str) -> int:
+    """Bytes a file occupies on disk (its apparent size where block counts are unavailable)"""
+    stat = os.stat(path)
+    blocks = getattr(stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else stat.st_size
+
+def data_regions(fd: int, size: int) -> Iterator[Tuple[int, int]]:
+    """Allocated (start, end) regions of a file; the whole file where SEEK_DATA is unsupported"""
+    if not hasattr(os, "SEEK_DATA"):
+        yield 0, size
+        return
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # Only a hole remains
+                return
+            yield offset, size
+            return
+        end = os.lseek(fd, start, os.SEEK_HOLE)
+        yield start, min(end, size)
+        offset = end
+
+def _fallocate():
+    """libc fallocate, or None where there is none (non-Linux)"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        function = libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong)
+    function.restype = ctypes.c_int
+    return function
+
+@dataclass
+class SparseReport:
+    """Result of rewriting an image with holes for its zero pages"""
+
+    path: str
+    size: int
+    # Bytes on disk before and after
+    disk_bytes_before: int
+    disk_bytes_after: int
+    # Zero bytes found in allocated regions and deallocated
+    zero_bytes: int
+    # "punch_hole" (in place), "copy" (rewritten to a sparse copy that replaced the file)
+    # or "download" (written sparse as it arrived)
+    method: str
+    seconds: float
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return max(self.disk_bytes_before - self.disk_bytes_after, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = asdict(self)
+        report["reclaimed_bytes"] = self.reclaimed_bytes
+        report["zero_ratio"] = round(self.zero_bytes / self.size, 3) if self.size else 0.0
+        return report
+
+def punch_zero_pages(path: str) -> SparseReport:
+    """
+    Deallocate the zero pages of a file, keeping its contents byte for byte
+
+    Allocated regions are scanned in chunks and zero runs are punched out with
+    fallocate(FALLOC_FL_PUNCH_HOLE), in place. Where that is not supported
+    the file is rewritten through SparseWriter into a copy that replaces it.
+    Either way the modification time is kept, so caches keyed on the file's
+    identity stay valid.
+
+    Raises:
+        OSError: the file cannot be read or rewritten (e.g. too little free space for a copy)
+    """
+    started = time.monotonic()
+    stat = os.stat(path)
+    before = allocated_bytes(path)
+    fallocate = _fallocate()
+    zero_bytes = 0
+    method = "punch_hole"
+    try:
+        if fallocate is None:
+            raise OSError(errno.EOPNOTSUPP, "fallocate is not available")
+        with open(path, "r+b") as f:
+            fd = f.fileno()
+            for region_start, region_end in data_regions(fd, stat.st_size):
+                for offset in range(region_start, region_end, CHUNK_SIZE):
+                    length = min(CHUNK_SIZE, region_end - offset)
+                    data = os.pread(fd, length, offset)
+                    for start, end in zero_runs(data):
+                        if end - start < PAGE_SIZE:
+                            # A zero tail shorter than a page frees nothing
+                            continue
+                        if fallocate(fd, _FALLOC_FL_PUNCH_HOLE | _FALLOC_FL_KEEP_SIZE,
+                                     offset + start, end - start) != 0:
+                            code = ctypes.get_errno()
+                            raise OSError(code, os.strerror(code))
+                        zero_bytes += end - start
+    except OSError as e:
+        if e.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL) or zero_bytes:
+            raise
+        zero_bytes = _rewrite_sparse(path)
+        method = "copy"
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return SparseReport(path, stat.st_size, before, allocated_bytes(path), zero_bytes, method,
+                        round(time.monotonic() - started, 2))
+
+def _rewrite_sparse(path: str) -> int:
+    temp_path = path + ".sparse.tmp"
+    free = shutil.disk_usage(os.path.dirname(os.path.abspath(path))).free
+    try:
+        with open(path, "rb") as source, open(temp_path, "wb") as output:
+            writer = SparseWriter(output)
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+                if output.tell() > free - 64 * 1024 * 1024:
+                    raise OSError(errno.ENOSPC, f"Not enough free space to rewrite {path}")
+            writer.close()
+        shutil.copystat(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return writer.zero_bytes
+
+class ImageSparsifier:
+    """
+    Rewrites memory images as sparse files once, and remembers the result.
+
+    Reports are kept per image path together with the (device, inode, mtime,
+    size) the image had afterwards, so an image is processed again only when
+    it changes. Concurrent requests for one image share a single pass.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize ImageSparsifier
+
+        Args:
+            path: JSON file the reports are persisted in (memory only if None)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._reports = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable sparse image reports {path}: {e}")
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(self._reports, f, indent=2)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not save sparse image reports {self.path}: {e}")
+
+    def report(self, path: str) -> Optional[Dict[str, Any]]:
+        """The report of the last pass over an image, if the image has not changed since"""
+        real_path = os.path.realpath(path)
+        with self._lock:
+            entry = self._reports.get(real_path)
+        if entry is None or entry.get("stat") != self._stat_key(real_path):
+            return None
+        return entry["report"]
+
+    def record(self, report: SparseReport) -> Dict[str, Any]:
+        """Remember a report, e.g. of an image that was written sparse to begin with"""
+        real_path = os.path.realpath(report.path)
+        result = report.to_dict()
+        with self._lock:
+            self._reports[real_path] = {"stat": self._stat_key(real_path), "report": result}
+            self._save()
+        return result
+
+    async def sparsify(self, path: str) -> Dict[str, Any]:
+        """
+        Punch out the zero pages of an image unless that was done for its current contents
+
+        Raises:
+            OSError: the image cannot be read or rewritten
+        """
+        real_path = os.path.realpath(path)
+        known = self.report(real_path)
+        if known is not None:
+            return known
+        task = self._tasks.get(real_path)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(punch_zero_pages, real_path))
+            self._tasks[real_path] = task
+            task.add_done_callback(lambda _: self._tasks.pop(real_path, None))
+        report = await asyncio.shield(task)
+        logger.info(f"Sparse rewrite of {real_path}: {report.zero_bytes} zero bytes, "
+                    f"{report.reclaimed_bytes} bytes of disk reclaimed in {report.seconds}s")
+        return self.record(report)
+
+    def submit(self, path: str) -> Optional[asyncio.Future]:
+        """Start sparsify in the background unless the image was already processed or is read-only"""
+        real_path = os.path.realpath(path)
+        if real_path in self._tasks or self.report(real_path) is not None:
+            return self._tasks.get(real_path)
+        if not os.access(real_path, os.W_OK):
+            # Read-only evidence is left as it is
+            return None
+        future = asyncio.ensure_future(self.sparsify(real_path))
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Sparse rewrite failed: {future.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reports = [entry["report"] for entry in self._reports.values()]
+        return {
+            "images": len(reports),
+            "zero_bytes": sum(report["zero_bytes"] for report in reports),
+            "reclaimed_bytes": sum(report["reclaimed_bytes"] for report in reports),
+            "running": len(self._tasks),
+        }
@@ -0,0 +1,53 @@
+from typing import Awaitable, Callable, List
+
+class OutputSink:
+    """
+    Forwards plugin output to a consumer in line-aligned chunks.
+
+    Backends feed decoded output as it arrives; complete lines are grouped
+    into chunks of about `chunk_bytes` characters and handed to `send`. Each
+    send is awaited before more output is read, so a slow client pauses the
+    plugin through the pipe instead of output piling up in the server.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], chunk_bytes: int = 16 * 1024):
+        """
+        Initialize OutputSink
+
+        Args:
+            send: Coroutine function receiving each chunk
+            chunk_bytes: Target chunk size; chunks end at a line boundary when possible
+        """
+        self._send = send
+        self.chunk_bytes = chunk_bytes
+        self._pending = ""
+        # Synchronous callbacks that get a copy of every chunk (e.g. a result cache writer)
+        self.observers: List[Callable[[str], None]] = []
+        self.lines = 0
+        self.chars = 0
+        self.chunks = 0
+
+    async def write(self, text: str) -> None:
+        """Queue output and send every complete chunk"""
+        self._pending += text
+        while len(self._pending) >= self.chunk_bytes:
+            cut = self._pending.rfind("\n", 0, self.chunk_bytes) + 1
+            if not cut:
+                # A single line longer than a chunk goes out whole
+                cut = self._pending.find("\n", self.chunk_bytes) + 1 or len(self._pending)
+            chunk, self._pending = self._pending[:cut], self._pending[cut:]
+            await self._emit(chunk)
+
+    async def flush(self) -> None:
+        """Send whatever output is still queued"""
+        if self._pending:
+            chunk, self._pending = self._pending, ""
+            await self._emit(chunk)
+
+    async def _emit(self, chunk: str) -> None:
+        self.lines += chunk.count("\n")
+        self.chars += len(chunk)
+        self.chunks += 1
+        for observer in self.observers:
+            observer(chunk)
+        await self._send(chunk)
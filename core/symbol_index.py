@@ -0,0 +1,479 @@
+import asyncio
+import base64
+import bz2
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from .process_control import ProcessPool
+from .versioning import symbols_fingerprint
+
+logger = logging.getLogger(__name__)
+
+ISF_OPENERS = {".json": open, ".json.xz": lzma.open, ".json.gz": gzip.open, ".json.bz2": bz2.open}
+
+# Kernel PDB names volatility's Windows stacker looks for
+WINDOWS_KERNEL_PDBS = ("ntkrnlmp.pdb", "ntoskrnl.pdb", "ntkrnlpa.pdb", "ntkrpamp.pdb")
+
+# Windows ISFs are stored as <pdb name>/<GUID>-<age>.json.xz, which identifies them without opening them
+_WINDOWS_ISF = re.compile(r"^(?P<pdb>[^/]+\.pdb)/(?P<guid>[0-9A-Fa-f]{32})-(?P<age>[0-9]+)\.json")
+
+# Kernel identifiers in an image: Windows kernel CodeView records, Linux and macOS version banners
+IDENTIFIER_PATTERNS = {
+    "windows": rb"RSDS.{20}(?:" + b"|".join(re.escape(name.encode()) for name in WINDOWS_KERNEL_PDBS) + rb")\x00",
+    "linux": rb"Linux version [0-9][ -~]{8,400}\n?\x00",
+    "mac": rb"Darwin Kernel Version [0-9][ -~]{8,400}\x00",
+}
+
+def isf_suffix(path: str) -> Optional[str]:
+    """The ISF extension of a path (.json, .json.xz, ...), or None if it is not a symbol file"""
+    for suffix in ISF_OPENERS:
+        if path.endswith(suffix):
+            return suffix
+    return None
+
+def windows_identifier(pdb_name: str, guid: str, age: int) -> str:
+    """Identifier of a Windows symbol table, as volatility's identifier cache forms it"""
+    return f"{pdb_name}|{guid.upper()}|{age}"
+
+def banner_identifier(banner: bytes) -> str:
+    """Identifier of a Linux or macOS symbol table: its version banner, without the trailing newline and NUL"""
+    return banner.rstrip(b"\x00\n\r ").decode("latin-1")
+
+def _identify_isf(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """(operating system, identifier) of an ISF file, read the way volatility's identifier cache does"""
+    try:
+        with ISF_OPENERS[isf_suffix(path)](path, "rb") as f:
+            isf = json.load(f)
+    except (OSError, EOFError, ValueError, lzma.LZMAError) as e:
+        logger.debug(f"Cannot read symbol file {path}: {e}")
+        return None, None
+    pdb = isf.get("metadata", {}).get("windows", {}).get("pdb", {})
+    if pdb.get("GUID") and pdb.get("age") and pdb.get("database"):
+        return "windows", windows_identifier(pdb["database"], pdb["GUID"], pdb["age"])
+    symbols = isf.get("symbols", {})
+    for operating_system, symbol in (("mac", "version"), ("linux", "linux_banner")):
+        banner = symbols.get(symbol, {}).get("constant_data")
+        if banner:
+            return operating_system, banner_identifier(base64.b64decode(banner))
+    return None, None
+
+def _image_identifier(operating_system: str, data: bytes) -> str:
+    """Identifier of the symbol table an image needs, from a match of IDENTIFIER_PATTERNS"""
+    if operating_system == "windows":
+        data1, data2, data3 = struct.unpack("<IHH", data[4:12])
+        guid = f"{data1:08X}{data2:04X}{data3:04X}{data[12:20].hex().upper()}"
+        age = struct.unpack("<I", data[20:24])[0]
+        return windows_identifier(data[24:].rstrip(b"\x00").decode("latin-1"), guid, age)
+    return banner_identifier(data)
+
+class SymbolIndex:
+    """
+    Persistent identifier index of SYMBOLS_DIR, with decompressed copies of hot ISFs.
+
+    Volatility finds the symbol table of an image by its identifier: the
+    kernel PDB name, GUID and age on Windows, the version banner on Linux
+    and macOS. The index maps each identifier to its ISF file. Windows
+    entries are read from the file names; the others are decompressed once,
+    in parallel, and only new or changed files are read again on refresh.
+    resolve_image finds the identifiers in an image and reports the ISF
+    each resolves to before any plugin runs.
+
+    ISFs are mostly stored xz-compressed, and every run that loads one
+    decompresses it again. ISFs that images resolve to are kept decompressed
+    under `cache_dir/hot`, least recently used first out within
+    `hot_max_bytes`. Cached automagic configurations are pointed at those
+    copies (localize), so later runs load plain JSON. A copy handed out within
+    the last `hot_grace_seconds` is not evicted, as a queued or starting run
+    may not have opened it yet, so the budget can be exceeded meanwhile.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, symbols_dir: str, cache_dir: str, scanner=None, workers: Optional[int] = None,
+                 hot_max_bytes: int = 2 * 1024 ** 3, hot_grace_seconds: float = 3600,
+                 pool: Optional[ProcessPool] = None):
+        """
+        Initialize SymbolIndex
+
+        Args:
+            symbols_dir: Symbol directory to index
+            cache_dir: Directory for the index, the hot ISF copies and localized configurations
+            scanner: PhysicalScanner used to find identifiers in images
+            workers: Worker processes of a private pool reading ISFs (default: number of CPUs)
+            hot_max_bytes: Disk budget of the decompressed ISF copies
+            hot_grace_seconds: How long a copy stays after it was last handed out
+            pool: ProcessPool reading ISFs, e.g. the scanner's (a private one if None)
+        """
+        self.symbols_dir = os.path.realpath(symbols_dir)
+        self.cache_dir = cache_dir
+        self.hot_dir = os.path.join(cache_dir, "hot")
+        self.configs_dir = os.path.join(cache_dir, "configs")
+        self.scanner = scanner
+        self.pool = pool or ProcessPool(workers)
+        self.hot_max_bytes = hot_max_bytes
+        self.hot_grace_seconds = hot_grace_seconds
+        os.makedirs(self.hot_dir, exist_ok=True)
+        os.makedirs(self.configs_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Relative ISF path -> {"size", "mtime_ns", "os", "identifier"}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        # (operating system, identifier) -> relative ISF path
+        self._by_identifier: Dict[Tuple[str, str], str] = {}
+        # Relative ISF path -> {"bytes", "last_used"}, least recently used first
+        self._hot: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._symbols_fingerprint: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._warming: Dict[str, asyncio.Task] = {}
+        self.last_refresh: Dict[str, Any] = {}
+        self.hot_hits = 0
+        self.decompressions = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("symbols_dir") != self.symbols_dir:
+            return
+        self._set_files(index.get("files", {}))
+        self._symbols_fingerprint = index.get("symbols_fingerprint")
+        for relative, entry in sorted(index.get("hot", {}).items(), key=lambda item: item[1]["last_used"]):
+            if os.path.isfile(self._hot_path(relative)):
+                self._hot[relative] = entry
+
+    def _save_index(self) -> None:
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        with self._lock:
+            index = {"symbols_dir": self.symbols_dir, "symbols_fingerprint": self._symbols_fingerprint,
+                     "files": self._files, "hot": dict(self._hot)}
+            try:
+                with open(path + ".tmp", "w") as f:
+                    json.dump(index, f)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                logger.warning(f"Could not save symbol index {path}: {e}")
+
+    def _set_files(self, files: Dict[str, Dict[str, Any]]) -> None:
+        self._files = files
+        self._by_identifier = {(entry["os"], entry["identifier"]): relative
+                               for relative, entry in sorted(files.items()) if entry.get("identifier")}
+
+    def _scan_symbols_dir(self) -> Dict[str, Tuple[int, int]]:
+        """Relative path -> (size, mtime_ns) of every ISF under the symbols directory"""
+        found = {}
+        for directory, _, names in os.walk(self.symbols_dir):
+            for name in names:
+                if isf_suffix(name) is None:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[os.path.relpath(path, self.symbols_dir).replace(os.sep, "/")] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def is_stale(self) -> bool:
+        """Whether symbol packs were added, removed or re-extracted since the last refresh"""
+        return symbols_fingerprint(self.symbols_dir) != self._symbols_fingerprint
+
+    async def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Bring the index up to date with the symbols directory; concurrent calls share one refresh
+
+        Args:
+            force: Walk the symbols directory even if its fingerprint is unchanged
+
+        Returns:
+            Statistics of the refresh: files indexed, added, removed and read
+        """
+        if not force and self._symbols_fingerprint is not None and not self.is_stale():
+            return self.last_refresh or {"files": len(self._files)}
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(lambda _: setattr(self, "_refresh_task", None))
+        return await asyncio.shield(self._refresh_task)
+
+    def submit_refresh(self) -> Optional[asyncio.Task]:
+        """Start refreshing the index in the background unless a refresh is running"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(lambda _: setattr(self, "_refresh_task", None))
+        return self._refresh_task
+
+    async def _refresh(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        fingerprint = await asyncio.to_thread(symbols_fingerprint, self.symbols_dir)
+        found = await asyncio.to_thread(self._scan_symbols_dir)
+        with self._lock:
+            files = {relative: entry for relative, entry in self._files.items()
+                     if found.get(relative) == (entry["size"], entry["mtime_ns"])}
+        removed = len(self._files.keys() - found.keys())
+        changed = [relative for relative in found if relative not in files]
+
+        to_read = []
+        for relative in changed:
+            size, mtime_ns = found[relative]
+            match = _WINDOWS_ISF.match("/".join(relative.split("/")[-2:]))
+            if match:
+                files[relative] = {"size": size, "mtime_ns": mtime_ns, "os": "windows",
+                                   "identifier": windows_identifier(match["pdb"], match["guid"], int(match["age"]))}
+            else:
+                to_read.append(relative)
+
+        if to_read:
+            logger.info(f"Reading the identifiers of {len(to_read)} symbol files")
+            tasks = {self.pool.submit(_identify_isf, os.path.join(self.symbols_dir, relative)): relative
+                     for relative in to_read}
+            try:
+                for task, relative in tasks.items():
+                    operating_system, identifier = await task
+                    size, mtime_ns = found[relative]
+                    files[relative] = {"size": size, "mtime_ns": mtime_ns, "os": operating_system,
+                                       "identifier": identifier}
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        with self._lock:
+            self._set_files(files)
+            self._symbols_fingerprint = fingerprint
+            for relative in [relative for relative in self._hot if relative not in files]:
+                self._drop_hot(relative)
+        await asyncio.to_thread(self._save_index)
+        self.last_refresh = {
+            "files": len(files),
+            "added_or_changed": len(changed),
+            "removed": removed,
+            "read": len(to_read),
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        logger.info(f"Symbol index refreshed: {self.last_refresh}")
+        return self.last_refresh
+
+    def lookup(self, operating_system: str, identifier: str) -> Optional[str]:
+        """Path of the ISF for an identifier, or None if the symbols directory has none"""
+        with self._lock:
+            relative = self._by_identifier.get((operating_system, identifier))
+        return os.path.join(self.symbols_dir, relative) if relative is not None else None
+
+    async def resolve_image(self, path: str, max_hits: int = 1000) -> Dict[str, Any]:
+        """
+        Find the kernel identifiers in an image and the ISFs they resolve to
+
+        Identifiers found are ordered with the ones an ISF exists for first, then by
+        how often they occur. ISFs found are decompressed into the hot cache in the
+        background, ready for the runs that follow.
+
+        Returns:
+            {"path", "scanned_bytes", "seconds", "candidates": [{"os", "identifier",
+             "offset", "occurrences", "isf", "hot"}], "resolved": first candidate's ISF}
+
+        Raises:
+            OSError: the image cannot be read
+            ValueError: there is no scanner, or the image is a container format that has not been normalized
+        """
+        if self.scanner is None:
+            raise ValueError("No physical memory scanner to search images with")
+        await self.refresh()
+        patterns = [pattern.decode("latin-1") for pattern in IDENTIFIER_PATTERNS.values()]
+        report = await self.scanner.scan(path, patterns=patterns, max_hits=max_hits, map_processes=False,
+                                         max_data_bytes=512)
+        operating_systems = {pattern.decode("latin-1"): name for name, pattern in IDENTIFIER_PATTERNS.items()}
+
+        found: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for hit in report["hits"]:
+            operating_system = operating_systems[hit["pattern"]]
+            identifier = _image_identifier(operating_system, bytes.fromhex(hit["data"]))
+            entry = found.setdefault((operating_system, identifier), {
+                "os": operating_system, "identifier": identifier, "offset": hit["offset"], "occurrences": 0,
+            })
+            entry["occurrences"] += 1
+
+        candidates = []
+        for (operating_system, identifier), entry in found.items():
+            isf = self.lookup(operating_system, identifier)
+            entry["isf"] = isf
+            entry["hot"] = isf is not None and self.hot_path(isf) is not None
+            if isf is not None:
+                self.warm(isf)
+            candidates.append(entry)
+        candidates.sort(key=lambda entry: (entry["isf"] is None, -entry["occurrences"]))
+        return {
+            "path": path,
+            "scanned_bytes": report["scanned_bytes"],
+            "seconds": report["seconds"],
+            "truncated": report["truncated"],
+            "resolved": candidates[0]["isf"] if candidates else None,
+            "candidates": candidates,
+        }
+
+    def _relative(self, isf_path: str) -> Optional[str]:
+        path = os.path.realpath(isf_path)
+        if not path.startswith(self.symbols_dir + os.sep):
+            return None
+        return os.path.relpath(path, self.symbols_dir).replace(os.sep, "/")
+
+    def _hot_path(self, relative: str) -> str:
+        return os.path.join(self.hot_dir, relative[:-len(isf_suffix(relative))] + ".json")
+
+    def hot_path(self, isf_path: str) -> Optional[str]:
+        """Decompressed copy of an ISF from the symbols directory, if it is in the hot cache"""
+        relative = self._relative(isf_path)
+        with self._lock:
+            if relative is None or relative not in self._hot:
+                return None
+            if not os.path.isfile(self._hot_path(relative)):
+                # Removed behind our back; fall back to the original
+                self._hot.pop(relative)
+                return None
+            self._hot.move_to_end(relative)
+            self._hot[relative]["last_used"] = time.time()
+        return self._hot_path(relative)
+
+    def warm(self, isf_path: str) -> Optional[asyncio.Task]:
+        """Start decompressing an ISF into the hot cache unless it is there, plain JSON already, or too large"""
+        relative = self._relative(isf_path)
+        if relative is None or isf_suffix(relative) == ".json" or relative in self._hot:
+            return None
+        task = self._warming.get(relative)
+        if task is None:
+            try:
+                task = asyncio.ensure_future(asyncio.to_thread(self._decompress, relative))
+            except RuntimeError:
+                # No event loop to decompress in the background from
+                return None
+            self._warming[relative] = task
+            task.add_done_callback(lambda _: self._warming.pop(relative, None))
+        return task
+
+    def _decompress(self, relative: str) -> None:
+        source = os.path.join(self.symbols_dir, relative)
+        target = self._hot_path(relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        size = 0
+        try:
+            with ISF_OPENERS[isf_suffix(relative)](source, "rb") as src, open(target + ".tmp", "wb") as dst:
+                while True:
+                    chunk = src.read(4 * 1024 * 1024)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.hot_max_bytes:
+                        raise OSError(f"{relative} decompresses to more than the hot ISF budget")
+                    dst.write(chunk)
+            os.replace(target + ".tmp", target)
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            logger.warning(f"Could not decompress {relative} into the hot ISF cache: {e}")
+            if os.path.exists(target + ".tmp"):
+                os.remove(target + ".tmp")
+            return
+        with self._lock:
+            self._hot[relative] = {"bytes": size, "last_used": time.time()}
+            self.decompressions += 1
+            self._evict()
+        self._save_index()
+
+    def _drop_hot(self, relative: str) -> None:
+        self._hot.pop(relative, None)
+        try:
+            os.remove(self._hot_path(relative))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used copies until the hot cache fits its budget (called with the lock held)"""
+        total = sum(entry["bytes"] for entry in self._hot.values())
+        cutoff = time.time() - self.hot_grace_seconds
+        for relative, entry in list(self._hot.items())[:-1]:
+            if total <= self.hot_max_bytes:
+                break
+            if entry["last_used"] > cutoff:
+                # Recently handed out to a run that may still have to load it
+                continue
+            self._drop_hot(relative)
+            total -= entry["bytes"]
+
+    def localize(self, config_path: str) -> str:
+        """
+        Point the ISF URLs of a volatility configuration at hot decompressed copies
+
+        ISFs not in the hot cache yet are decompressed in the background for later
+        runs, and URLs of copies that have been evicted are pointed back at the
+        symbols directory.
+
+        Returns:
+            Path of the rewritten configuration, or `config_path` if nothing changed
+        """
+        try:
+            with open(config_path) as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return config_path
+
+        changed = False
+        hot_root = os.path.realpath(self.hot_dir) + os.sep
+        for key, value in config.items():
+            if not key.endswith("isf_url") or not isinstance(value, str) or not value.startswith("file:"):
+                continue
+            path = os.path.realpath(unquote(urlparse(value).path))
+            if path.startswith(hot_root):
+                # A hot copy: find the ISF it was made from
+                stem = os.path.relpath(path, hot_root).replace(os.sep, "/")[:-len(".json")]
+                with self._lock:
+                    relative = next((relative for relative in self._files
+                                     if relative[:-len(isf_suffix(relative))] == stem), None)
+                if relative is None:
+                    continue
+                path = os.path.join(self.symbols_dir, relative)
+            hot = self.hot_path(path)
+            if hot is None:
+                self.warm(path)
+                target = path
+            else:
+                self.hot_hits += 1
+                target = hot
+            url = "file://" + target
+            if url != value:
+                config[key] = url
+                changed = True
+        if not changed:
+            return config_path
+
+        data = json.dumps(config, sort_keys=True, indent=2)
+        localized = os.path.join(self.configs_dir, hashlib.sha256(data.encode()).hexdigest()[:32] + ".json")
+        if not os.path.isfile(localized):
+            with open(localized + ".tmp", "w") as f:
+                f.write(data)
+            os.replace(localized + ".tmp", localized)
+        return localized
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_os: Dict[str, int] = {}
+            for entry in self._files.values():
+                name = entry.get("os") or "unidentified"
+                by_os[name] = by_os.get(name, 0) + 1
+            return {
+                "files": len(self._files),
+                "by_os": by_os,
+                "hot_files": len(self._hot),
+                "hot_bytes": sum(entry["bytes"] for entry in self._hot.values()),
+                "hot_hits": self.hot_hits,
+                "decompressions": self.decompressions,
+                "last_refresh": self.last_refresh,
+            }
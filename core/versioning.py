@@ -0,0 +1,74 @@
+import hashlib
+import importlib.util
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_VERSION_PATTERN = re.compile(r"^VERSION_(MAJOR|MINOR|PATCH|SUFFIX)\s*=\s*([^#\n]+)", re.MULTILINE)
+
+# symbols_dir -> (computed at, fingerprint); symbol packs change rarely
+_SYMBOLS_FINGERPRINTS: Dict[str, Tuple[float, str]] = {}
+SYMBOLS_FINGERPRINT_TTL = 60
+
+def _version_files(volatility_dir: Optional[str]) -> List[Path]:
+    candidates = []
+    if volatility_dir:
+        constants_dir = Path(volatility_dir) / "volatility3" / "framework" / "constants"
+        candidates += [constants_dir / "_version.py", constants_dir / "__init__.py"]
+    spec = importlib.util.find_spec("volatility3")
+    if spec is not None and spec.submodule_search_locations:
+        constants_dir = Path(list(spec.submodule_search_locations)[0]) / "framework" / "constants"
+        candidates += [constants_dir / "_version.py", constants_dir / "__init__.py"]
+    return candidates
+
+def volatility_version(volatility_dir: Optional[str] = None) -> str:
+    """
+    Determine the volatility3 framework version without importing it
+
+    Args:
+        volatility_dir: Volatility 3 checkout to inspect before falling back to an installed package
+
+    Returns:
+        The version string (e.g. "2.28.2"), or "unknown"
+    """
+    for path in _version_files(volatility_dir):
+        if not path.is_file():
+            continue
+        parts = dict(_VERSION_PATTERN.findall(path.read_text(errors="replace")))
+        if {"MAJOR", "MINOR", "PATCH"} <= parts.keys():
+            suffix = parts.get("SUFFIX", "").strip().strip("\"'")
+            return ".".join(parts[k].strip() for k in ("MAJOR", "MINOR", "PATCH")) + suffix
+    return "unknown"
+
+def symbols_fingerprint(symbols_dir: Optional[str]) -> str:
+    """
+    Cheap fingerprint of the installed symbol set
+
+    Hashes the names, sizes and modification times of the top two levels of
+    the symbols directory. Adding, removing or re-extracting symbol packs
+    changes the directory entries or their mtimes, so the fingerprint changes
+    without reading any ISF content.
+    """
+    if not symbols_dir or not os.path.isdir(symbols_dir):
+        return "none"
+
+    cached = _SYMBOLS_FINGERPRINTS.get(symbols_dir)
+    if cached and time.monotonic() - cached[0] < SYMBOLS_FINGERPRINT_TTL:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    pending = [(symbols_dir, 0)]
+    while pending:
+        directory, depth = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                stat = entry.stat()
+                relative = os.path.relpath(entry.path, symbols_dir)
+                digest.update(f"{relative}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+                if entry.is_dir() and depth < 1:
+                    pending.append((entry.path, depth + 1))
+    fingerprint = digest.hexdigest()[:16]
+    _SYMBOLS_FINGERPRINTS[symbols_dir] = (time.monotonic(), fingerprint)
+    return fingerprint
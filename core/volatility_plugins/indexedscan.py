@@ -0,0 +1,173 @@
+"""
+Volatility 3 plugins loaded with --plugin-dirs by core.scan_index.
+
+Each plugin here is a scanning plugin (windows.psscan.PsScan as
+indexedscan.PsScan, ...) with the same requirements and output, whose
+layer scans only visit the pages a ScanIndex found its signatures on.
+Scans of the image's file layer are restricted to those pages directly;
+scans of layers translating onto it (the kernel or a process address
+space) to the virtual pages mapping them. Scans of any other layer run
+unchanged.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from volatility3.framework import interfaces
+from volatility3.framework.configuration import requirements
+# The Windows symbol extensions must load before poolscanner, which they import; this
+# module may be imported before any Windows plugin
+from volatility3.framework.symbols import windows  # noqa: F401
+from volatility3.plugins.windows import filescan, netscan, psscan, svcscan
+
+try:
+    from volatility3.plugins.windows import mftscan
+except ImportError:
+    # MFTScan needs a YARA module; the other scanners do not
+    mftscan = None
+
+vollog = logging.getLogger(__name__)
+
+PAGE_SIZE = 0x1000
+
+class _Narrowing:
+    """Pages of an image holding the signatures one plugin scans for"""
+
+    def __init__(self, index_dir: str, tags: Iterable[str]):
+        with open(os.path.join(index_dir, "index.json")) as f:
+            index = json.load(f)
+        self.image = os.path.realpath(index["path"])
+        pages = set()
+        for tag in tags:
+            entry = index["tags"].get(tag)
+            if entry is None:
+                raise ValueError(f"The scan index has no entry for tag {tag}")
+            values = array("I")
+            with open(os.path.join(index_dir, entry["file"]), "rb") as f:
+                values.frombytes(f.read())
+            pages.update(values)
+        self.pages = sorted(pages)
+        self._physical: Optional[str] = None
+
+    def physical_layer(self, context) -> Optional[str]:
+        """Name of the file layer reading the indexed image"""
+        if self._physical is None:
+            for layer in context.layers.values():
+                location = layer.config.get("location")
+                if location and os.path.realpath(unquote(urlparse(location).path)) == self.image:
+                    self._physical = layer.name
+                    break
+        return self._physical
+
+    def sections(self, context, layer, sections: Optional[Iterable[Tuple[int, int]]]):
+        """
+        Sections of `layer` to scan, or None if the index does not cover the layer
+
+        Pages are clipped to the requested sections (the whole layer if None).
+        """
+        physical = self.physical_layer(context)
+        if physical is None:
+            return None
+        if sections is None:
+            sections = [(layer.minimum_address, layer.maximum_address - layer.minimum_address)]
+        if layer.name == physical:
+            return [
+                self._clip(page, start, start + length, start)
+                for start, length in sections
+                for page in self._pages_in(start, start + length)
+            ]
+        if not isinstance(layer, interfaces.layers.TranslationLayerInterface):
+            return None
+        if layer.config.get("memory_layer") != physical:
+            return None
+        narrowed = []
+        for start, length in sections:
+            for offset, _, mapped_offset, mapped_size, mapped_layer in layer.mapping(start, length, ignore_errors=True):
+                if mapped_layer != physical:
+                    continue
+                for page in self._pages_in(mapped_offset, mapped_offset + mapped_size):
+                    narrowed.append(self._clip(page, mapped_offset, mapped_offset + mapped_size, offset))
+        return narrowed
+
+    def _pages_in(self, start: int, end: int) -> List[int]:
+        """Indexed pages overlapping [start, end)"""
+        first = bisect.bisect_left(self.pages, start // PAGE_SIZE)
+        last = bisect.bisect_left(self.pages, -(-end // PAGE_SIZE))
+        return self.pages[first:last]
+
+    @staticmethod
+    def _clip(page: int, start: int, end: int, base: int) -> Tuple[int, int]:
+        """(offset, length) of a page clipped to [start, end), rebased so that `start` maps to `base`"""
+        low = max(page * PAGE_SIZE, start)
+        high = min((page + 1) * PAGE_SIZE, end)
+        return base + low - start, high - low
+
+# (context id, thread id) -> narrowing of the indexed plugin running there
+_active: Dict[Tuple[int, int], _Narrowing] = {}
+_original_scan = interfaces.layers.DataLayerInterface.scan
+
+def _scan(self, context, scanner, progress_callback=None, sections=None):
+    narrowing = _active.get((id(context), threading.get_ident()))
+    if narrowing is not None:
+        narrowed = narrowing.sections(context, self, sections)
+        if narrowed is not None:
+            vollog.debug(f"Scanning {len(narrowed)} indexed sections of {self.name}")
+            sections = narrowed
+    return _original_scan(self, context, scanner, progress_callback, sections)
+
+interfaces.layers.DataLayerInterface.scan = _scan
+
+def _indexed(plugin):
+    """Subclass of a scanning plugin whose scans are narrowed by a scan index"""
+
+    @classmethod
+    def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
+        return plugin.get_requirements() + [
+            requirements.StringRequirement(
+                name="index_dir", description="Directory of the scan index of the image", optional=False
+            ),
+            requirements.ListRequirement(
+                name="index_tags", element_type=str, optional=False,
+                description="Hex-encoded signatures whose pages the plugin scans",
+            ),
+        ]
+
+    def run(self):
+        key = (id(self.context), threading.get_ident())
+        _active[key] = _Narrowing(self.config["index_dir"], self.config["index_tags"])
+        try:
+            grid = plugin.run(self)
+        except BaseException:
+            _active.pop(key, None)
+            raise
+
+        def rows(generator):
+            # Most plugins scan lazily, while their rows are rendered
+            try:
+                yield from generator
+            finally:
+                _active.pop(key, None)
+
+        grid._generator = rows(grid._generator)
+        return grid
+
+    return type(plugin.__name__, (plugin,), {
+        "__module__": __name__,
+        "__doc__": f"{plugin.__doc__} (pages narrowed by a scan index)",
+        "get_requirements": get_requirements,
+        "run": run,
+    })
+
+PsScan = _indexed(psscan.PsScan)
+FileScan = _indexed(filescan.FileScan)
+NetScan = _indexed(netscan.NetScan)
+SvcScan = _indexed(svcscan.SvcScan)
+if mftscan is not None:
+    MFTScan = _indexed(mftscan.MFTScan)
+    ADS = _indexed(mftscan.ADS)
+    ResidentData = _indexed(mftscan.ResidentData)
@@ -0,0 +1,111 @@
+"""
+Volatility 3 plugin loaded with --plugin-dirs by core.memscan.
+
+Maps physical addresses (hits of a raw scan of the image) to the processes
+whose address spaces map them, and to their virtual addresses there, in one
+walk over every process's page tables. Addresses no process maps are looked
+up in the kernel's address space.
+"""
+import bisect
+import json
+import logging
+from typing import Iterator, List, Tuple
+
+from volatility3.framework import interfaces, renderers
+from volatility3.framework.configuration import requirements
+from volatility3.framework.objects import utility
+from volatility3.framework.renderers import format_hints
+
+vollog = logging.getLogger(__name__)
+
+class PhysicalOwners(interfaces.plugins.PluginInterface):
+    """Maps physical addresses to the processes and virtual addresses that map them"""
+
+    _required_framework_version = (2, 0, 0)
+    _version = (1, 0, 0)
+
+    @classmethod
+    def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
+        return [
+            requirements.ModuleRequirement(
+                name="kernel",
+                description="Windows or Linux kernel",
+                architectures=["Intel32", "Intel64"],
+            ),
+            requirements.StringRequirement(
+                name="offsets_file",
+                description="JSON file holding the list of physical addresses to look up",
+                optional=False,
+            ),
+        ]
+
+    def _processes(self) -> Iterator[Tuple[int, str, str]]:
+        """(PID, name, layer name) of every process with an address space"""
+        kernel = self.context.modules[self.config["kernel"]]
+        symbols = self.context.symbol_space
+        if symbols.has_type(kernel.symbol_table_name + "!_EPROCESS"):
+            from volatility3.plugins.windows import pslist
+
+            for proc in pslist.PsList.list_processes(self.context, self.config["kernel"]):
+                try:
+                    name = proc.ImageFileName.cast(
+                        "string", max_length=proc.ImageFileName.vol.count, errors="replace"
+                    )
+                    yield int(proc.UniqueProcessId), name, proc.add_process_layer()
+                except Exception as excp:
+                    vollog.debug(f"Skipping process at {proc.vol.offset:#x}: {excp}")
+        elif symbols.has_type(kernel.symbol_table_name + "!task_struct"):
+            from volatility3.plugins.linux import pslist
+
+            for task in pslist.PsList.list_tasks(self.context, self.config["kernel"]):
+                try:
+                    layer_name = task.add_process_layer()
+                except Exception as excp:
+                    vollog.debug(f"Skipping task at {task.vol.offset:#x}: {excp}")
+                    continue
+                if layer_name is not None:
+                    # Kernel threads have no address space of their own
+                    yield int(task.pid), utility.array_to_string(task.comm), layer_name
+        else:
+            vollog.warning("Processes can only be enumerated for Windows and Linux images")
+
+    def _lookup(self, layer_name: str, offsets: List[int], physical_layer: str) -> Iterator[Tuple[int, int]]:
+        """(physical, virtual) for each of the sorted offsets the layer maps"""
+        layer = self.context.layers[layer_name]
+        for offset, _, mapped_offset, mapped_size, mapped_layer in layer.mapping(
+            0, layer.maximum_address, ignore_errors=True
+        ):
+            if mapped_layer != physical_layer:
+                continue
+            index = bisect.bisect_left(offsets, mapped_offset)
+            while index < len(offsets) and offsets[index] < mapped_offset + mapped_size:
+                yield offsets[index], offset + offsets[index] - mapped_offset
+                index += 1
+
+    def _generator(self, offsets: List[int]):
+        kernel = self.context.modules[self.config["kernel"]]
+        physical_layer = self.context.layers[kernel.layer_name].config["memory_layer"]
+        owned = set()
+        for pid, name, layer_name in self._processes():
+            for physical, virtual in self._lookup(layer_name, offsets, physical_layer):
+                owned.add(physical)
+                yield 0, (format_hints.Hex(physical), pid, name, format_hints.Hex(virtual))
+
+        unowned = [offset for offset in offsets if offset not in owned]
+        if unowned:
+            for physical, virtual in self._lookup(kernel.layer_name, unowned, physical_layer):
+                yield 0, (format_hints.Hex(physical), renderers.NotApplicableValue(), "kernel",
+                          format_hints.Hex(virtual))
+
+    def run(self):
+        with open(self.config["offsets_file"]) as f:
+            offsets = sorted({int(offset) for offset in json.load(f)})
+        return renderers.TreeGrid(
+            [
+                ("Physical", format_hints.Hex),
+                ("PID", int),
+                ("Process", str),
+                ("Virtual", format_hints.Hex),
+            ],
+            self._generator(offsets),
+        )
@@ -0,0 +1,19 @@
+"""
+Preloaded into the fork server that starts the server's worker processes.
+
+multiprocessing's spawn and forkserver children re-run the parent's main
+script as `__mp_main__` before unpickling their target. For the MCP server
+that script is volatility_mcp_server.py (or the fastmcp CLI), which imports
+fastmcp and builds every cache and pool again in each worker. Workers only
+run functions from this package, so children forked from the fork server
+skip that step. Imported by the fork server only (see
+process_control.worker_context); importing it anywhere else would affect
+every process multiprocessing starts from there.
+"""
+import multiprocessing.spawn
+
+def _skip_main(_) -> None:
+    pass
+
+multiprocessing.spawn._fixup_main_from_path = _skip_main
+multiprocessing.spawn._fixup_main_from_name = _skip_main
@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .inprocess_runner import VolatilityWorker
+from .process_control import ResourceLimits
+
+logger = logging.getLogger(__name__)
+
+class ImageWorkerPool:
+    """
+    Persistent workers pinned to one memory image each.
+
+    A pinned worker keeps its volatility context alive between plugin runs, so
+    the stacked memory layers and loaded symbol tables are reused instead of
+    being rebuilt on every call. Workers idle for longer than `idle_timeout`
+    are stopped, and at most `max_workers` are kept at once; when the cap is
+    reached the least recently used idle worker makes room for a new image.
+    """
+
+    def __init__(
+        self,
+        volatility_dir: str,
+        max_workers: int = 4,
+        idle_timeout: int = 600,
+        limits: Optional[ResourceLimits] = None
+    ):
+        """
+        Initialize ImageWorkerPool
+
+        Args:
+            volatility_dir: Directory containing the volatility3 package
+            max_workers: Maximum number of pinned workers alive at once
+            idle_timeout: Seconds a worker may stay unused before it is stopped
+            limits: Optional ResourceLimits applied to the workers (the CPU limit per job)
+        """
+        self.volatility_dir = volatility_dir
+        self.max_workers = max(1, max_workers)
+        self.idle_timeout = idle_timeout
+        self.limits = limits
+        self._workers: "OrderedDict[str, VolatilityWorker]" = OrderedDict()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def get(self, image_path: str) -> Optional[VolatilityWorker]:
+        """Return the warm worker for an image if one exists"""
+        key = os.path.realpath(image_path)
+        worker = self._workers.get(key)
+        if worker is not None:
+            self._workers.move_to_end(key)
+        return worker
+
+    def acquire(self, image_path: str) -> Optional[VolatilityWorker]:
+        """
+        Return the worker pinned to an image, creating one if there is room
+
+        Returns:
+            The pinned worker, or None when the pool is full of busy workers
+        """
+        worker = self.get(image_path)
+        if worker is not None:
+            return worker
+
+        if len(self._workers) >= self.max_workers and not self._evict_one():
+            return None
+
+        key = os.path.realpath(image_path)
+        worker = VolatilityWorker(self.volatility_dir, pinned_image=key, limits=self.limits)
+        self._workers[key] = worker
+        self._ensure_reaper()
+        logger.info(f"Pinned new volatility worker to {key}")
+        return worker
+
+    def _evict_one(self) -> bool:
+        """Stop the least recently used idle worker"""
+        for key, worker in self._workers.items():
+            if not worker.busy:
+                self._stop(key)
+                return True
+        return False
+
+    def _stop(self, key: str) -> None:
+        worker = self._workers.pop(key)
+        worker.stop()
+        logger.info(f"Stopped volatility worker pinned to {key}")
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap())
+
+    async def _reap(self) -> None:
+        """Periodically stop workers that have been idle for too long"""
+        while self._workers:
+            await asyncio.sleep(min(60, self.idle_timeout))
+            now = time.monotonic()
+            for key, worker in list(self._workers.items()):
+                if not worker.busy and now - worker.last_used > self.idle_timeout:
+                    self._stop(key)
+
+    def workers(self) -> List[VolatilityWorker]:
+        """The pinned workers currently alive"""
+        return list(self._workers.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Describe the pinned workers for diagnostics"""
+        now = time.monotonic()
+        return {
+            key: {"busy": worker.busy, "idle_seconds": round(now - worker.last_used, 1)}
+            for key, worker in self._workers.items()
+        }
+
+    def shutdown(self) -> None:
+        """Stop every pinned worker"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for key in list(self._workers):
+            with contextlib.suppress(Exception):
+                self._stop(key)
@@ -4,17 +4,56 @@ from pathlib import Path
 
 class BasePlugin(ABC):
     """Base class for all Volatility plugins"""
+
+    # Whether run_plugins may execute this plugin in one process together with
+    # other plugins on the same image (see core.PluginBatch)
+    shares_process = True
     
     def __init__(self, volatility_runner):
         self.volatility_runner = volatility_runner
         
     def validate_memory_dump(self, memory_dump_path: str) -> str:
-        """Validate that the memory dump file exists"""
+        """Validate that the memory dump file exists and can be read"""
         memory_dump_path = str(Path(memory_dump_path).resolve())
         if not Path(memory_dump_path).is_file():
             return f"Error: Memory dump file not found at {memory_dump_path}"
+        # Fingerprinting reads the header and sampled pages, and warms the cache keys used by the runner
+        fingerprinter = getattr(self.volatility_runner, "fingerprinter", None)
+        if fingerprinter is not None:
+            try:
+                fingerprinter.fingerprint(memory_dump_path)
+            except (OSError, ValueError) as e:
+                return f"Error: Memory dump file could not be read at {memory_dump_path}: {str(e)}"
         return memory_dump_path
         
+    async def run_for_pids(
+        self,
+        cmd_args: List[str],
+        pid: Union[int, List[int], None],
+        pid_column: Optional[str] = None
+    ) -> str:
+        """
+        Run a volatility command for all processes, one PID or a list of PIDs
+
+        A single PID is passed as --pid. A list is handed to the runner's
+        run_per_pid, which runs the uncached PIDs in one pass and returns the
+        output per PID (pid_column names the output column holding the PID when
+        the plugin accepts a PID list).
+        """
+        if not isinstance(pid, list):
+            if pid is not None:
+                cmd_args = cmd_args + ["--pid", str(pid)]
+            return await self.volatility_runner(cmd_args)
+
+        try:
+            pids = [int(value) for value in pid]
+        except (TypeError, ValueError):
+            return f"Error: Invalid PID list {pid}"
+        if not pids:
+            return "Error: The PID list is empty"
+        results = await self.volatility_runner.run_per_pid(cmd_args, pids, pid_column)
+        return "\n\n".join(f"PID {pid}:\n{result.output}" for pid, result in results.items())
+        
     @abstractmethod
     async def run(self, memory_dump_path: str, kw_args: Dict[str, Any] = None) -> str:
         """Run the plugin with the given memory dump and optional keyword arguments."""
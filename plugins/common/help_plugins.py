@@ -5,6 +5,9 @@ class PluginHelp(BasePlugin):
     Lists the command parameters for a given plugin by appending --help
     to the plugin's name.
     """
+    # Help text comes from argparse rather than a TreeGrid
+    shares_process = False
+
     async def run(self, memory_dump_path: str, plugin_name: str) -> str:
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
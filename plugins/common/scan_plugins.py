@@ -1,16 +1,42 @@
-from typing import Optional, Dict, Any
+import json
+from typing import Optional, Dict, Any, List
 from ..base_plugin import BasePlugin
 
+async def parallel_scan(volatility_runner, memory_dump_path: str, rules: str = None, rule_files: List[str] = None,
+                        patterns: List[str] = None, max_hits: int = None) -> str:
+    """Scan with the runner's PhysicalScanner and return its report as JSON"""
+    scanner = getattr(volatility_runner, "memory_scanner", None)
+    if scanner is None:
+        return "Error: The parallel scanner is not available"
+    try:
+        report = await scanner.scan(memory_dump_path, rules=rules, rule_files=rule_files, patterns=patterns,
+                                    max_hits=max_hits)
+    except (OSError, ValueError) as e:
+        return f"Error: {str(e)}"
+    return json.dumps(report, indent=2)
+
 class RegExScan(BasePlugin):
     """Scans kernel memory using RegEx patterns"""
     
-    async def run(self, memory_dump_path: str, kw_args: Dict[str, Any] = None) -> str:
-        """Run the common RegExScan plugin with the given memory dump and optional keyword arguments."""
+    async def run(self, memory_dump_path: str, pattern: str = None, patterns: List[str] = None,
+                  parallel: bool = False, max_hits: int = None, kw_args: Dict[str, Any] = None) -> str:
+        """
+        Run the common RegExScan plugin with the given memory dump and optional keyword arguments.
+
+        With parallel=True the raw image is scanned for `pattern` and/or `patterns` on
+        all cores (see core.PhysicalScanner) instead, and hits are mapped to processes.
+        """
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
             return memory_dump_path
+        if parallel:
+            return await parallel_scan(self.volatility_runner, memory_dump_path,
+                                       patterns=([pattern] if pattern else []) + list(patterns or []),
+                                       max_hits=max_hits)
+        if not pattern:
+            return "Error: RegExScan requires a pattern"
             
-        cmd_args = ["-f", memory_dump_path, "regexscan.RegExScan"]
+        cmd_args = ["-f", memory_dump_path, "regexscan.RegExScan", "--pattern", pattern]
         # Add any relevant args from kw_args
             
         return await self.volatility_runner(cmd_args)
@@ -18,14 +44,31 @@ class RegExScan(BasePlugin):
 class YaraScan(BasePlugin):
     """Scans kernel memory using yara rules (string or file)"""
     
-    async def run(self, memory_dump_path: str, kw_args: Dict[str, Any] = None) -> str:
-        """Run the common YaraScan plugin with the given memory dump and optional keyword arguments."""
+    async def run(self, memory_dump_path: str, yara_rules: str = None, yara_file: str = None,
+                  rule_files: List[str] = None, patterns: List[str] = None, parallel: bool = False,
+                  max_hits: int = None, kw_args: Dict[str, Any] = None) -> str:
+        """
+        Run the common YaraScan plugin with the given memory dump and optional keyword arguments.
+
+        With parallel=True the raw image is scanned with the rules (`yara_rules`, `yara_file`,
+        `rule_files`) and/or byte `patterns` on all cores (see core.PhysicalScanner) instead,
+        and hits are mapped to processes.
+        """
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
             return memory_dump_path
+        if parallel:
+            return await parallel_scan(self.volatility_runner, memory_dump_path, rules=yara_rules,
+                                       rule_files=([yara_file] if yara_file else []) + list(rule_files or []),
+                                       patterns=patterns, max_hits=max_hits)
+        if not yara_rules and not yara_file:
+            return "Error: YaraScan requires yara_rules or yara_file"
             
         cmd_args = ["-f", memory_dump_path, "yarascan.YaraScan"]
-        # Add any relevant args from kw_args
+        if yara_rules:
+            cmd_args.extend(["--yara-string", yara_rules])
+        if yara_file:
+            cmd_args.extend(["--yara-file", yara_file])
             
         return await self.volatility_runner(cmd_args)
 
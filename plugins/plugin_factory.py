@@ -19,6 +19,12 @@ class PluginFactory:
             raise ValueError(f"Plugin '{name}' not found")
         return cls._plugins[name](volatility_runner)
         
+    @classmethod
+    def shares_process(cls, name: str) -> bool:
+        """Whether a registered plugin can run in a shared multi-plugin process"""
+        plugin_class = cls._plugins.get(name)
+        return bool(plugin_class is not None and plugin_class.shares_process)
+        
     @classmethod
     def list_plugins(cls) -> Dict[str, str]:
         """List all registered plugins and their descriptions"""
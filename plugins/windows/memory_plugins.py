@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
 from ..base_plugin import BasePlugin
 
 class Malfind(BasePlugin):
@@ -19,16 +19,17 @@ class Malfind(BasePlugin):
         return await self.volatility_runner(cmd_args)
 
 class MemMap(BasePlugin):
-    """Shows the memory map for a specific process"""
+    """Shows the memory map for a specific process, or for each process of a PID list"""
     
-    async def run(self, memory_dump_path: str, pid: int, kw_args: Dict[str, Any] = None) -> str:
+    async def run(self, memory_dump_path: str, pid: Union[int, List[int]], kw_args: Dict[str, Any] = None) -> str:
         """Run the MemMap plugin with the given memory dump and optional keyword arguments."""
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
             return memory_dump_path
             
-        cmd_args = ["-f", memory_dump_path, "windows.memmap.Memmap", "--pid", str(pid)]
+        cmd_args = ["-f", memory_dump_path, "windows.memmap.Memmap"]
         # run_plugin in volatility_mcp_server.py will handle passing pid from kw_args if present
         # Add any other relevant args from kw_args if needed by MemMap
+        # Memmap takes a single --pid and has no PID column, so a list runs once per PID
             
-        return await self.volatility_runner(cmd_args) 
\ No newline at end of file
+        return await self.run_for_pids(cmd_args, pid)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
 from ..base_plugin import BasePlugin
 
 class SvcScan(BasePlugin):
@@ -26,34 +26,34 @@ class CmdLine(BasePlugin):
 class DllList(BasePlugin):
     """Lists loaded DLLs for each process"""
     
-    async def run(self, memory_dump_path: str, pid: Optional[int] = None, kw_args: Dict[str, Any] = None) -> str:
+    async def run(self, memory_dump_path: str, pid: Union[int, List[int], None] = None,
+                  kw_args: Dict[str, Any] = None) -> str:
         """Run the DllList plugin with the given memory dump and optional keyword arguments."""
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
             return memory_dump_path
             
         cmd_args = ["-f", memory_dump_path, "windows.dlllist.DllList"]
-        if pid is not None:
-            cmd_args.extend(["--pid", str(pid)])
         # run_plugin in volatility_mcp_server.py will handle passing pid from kw_args if present
+        # A PID list runs in one pass and comes back grouped by the PID column
             
-        return await self.volatility_runner(cmd_args)
+        return await self.run_for_pids(cmd_args, pid, pid_column="PID")
 
 class Handles(BasePlugin):
     """Lists open handles for each process"""
     
-    async def run(self, memory_dump_path: str, pid: Optional[int] = None, kw_args: Dict[str, Any] = None) -> str:
+    async def run(self, memory_dump_path: str, pid: Union[int, List[int], None] = None,
+                  kw_args: Dict[str, Any] = None) -> str:
         """Run the Handles plugin with the given memory dump and optional keyword arguments.""" 
         memory_dump_path = self.validate_memory_dump(memory_dump_path)
         if memory_dump_path.startswith("Error"):
             return memory_dump_path
             
         cmd_args = ["-f", memory_dump_path, "windows.handles.Handles"]
-        if pid is not None:
-            cmd_args.extend(["--pid", str(pid)])
         # run_plugin in volatility_mcp_server.py will handle passing pid from kw_args if present
+        # A PID list runs in one pass and comes back grouped by the PID column
             
-        return await self.volatility_runner(cmd_args)
+        return await self.run_for_pids(cmd_args, pid, pid_column="PID")
 
 class FileScan(BasePlugin):
     """Scans for file objects"""
@@ -0,0 +1,75 @@
+import json
+
+from core.fanout import split_by_pid
+
+BANNER = "Volatility 3 Framework 2.7.0"
+HEADER = "PID\tPPID\tImageFileName"
+
+def raises_value_error(function, *args) -> bool:
+    try:
+        function(*args)
+    except ValueError:
+        return True
+    return False
+
+def quick_output(rows) -> str:
+    return "\n".join([BANNER, "", HEADER, ""] + rows + [""])
+
+def test_split_quick():
+    output = quick_output([
+        "4\t0\tSystem",
+        "* 88\t4\tRegistry",
+        "** 92\t88\tMemCompression",
+        "412\t4\tsmss.exe",
+        "999\t4\tother.exe",
+    ])
+    split = split_by_pid(output, "quick", [412, 4, 1234])
+    # In the order of the requested PIDs, child rows staying with their parent
+    assert list(split) == [412, 4, 1234]
+    assert split[4] == quick_output(["4\t0\tSystem", "* 88\t4\tRegistry", "** 92\t88\tMemCompression"])
+    assert split[412] == quick_output(["412\t4\tsmss.exe"])
+    # A PID without rows still gets the banner and header
+    assert split[1234] == quick_output([])
+    # None is vol.py's default renderer, which is quick
+    assert split_by_pid(output, None, [412]) == {412: split[412]}
+
+def test_split_quick_child_rows_of_other_pids():
+    # Child rows follow their parent even when the parent was not requested
+    output = quick_output(["999\t4\tother.exe", "* 412\t999\tchild.exe", "4\t0\tSystem"])
+    split = split_by_pid(output, "quick", [4, 412])
+    assert split[4] == quick_output(["4\t0\tSystem"])
+    assert split[412] == quick_output([])
+
+def test_split_quick_missing_pid_column():
+    output = "\n".join([BANNER, "", "Offset\tName", "", "0x1000\tntoskrnl.exe", ""])
+    assert raises_value_error(split_by_pid, output, "quick", [4])
+    assert split_by_pid(output, "quick", [4], "Offset") == {4: "\n".join([BANNER, "", "Offset\tName", "", ""])}
+
+def test_split_json():
+    rows = [
+        {"PID": 4, "ImageFileName": "System", "__children": [
+            {"PID": 88, "ImageFileName": "Registry", "__children": []},
+        ]},
+        {"PID": 412, "ImageFileName": "smss.exe", "__children": []},
+        {"PID": 999, "ImageFileName": "other.exe", "__children": []},
+    ]
+    split = split_by_pid(json.dumps(rows), "json", [4, 412, 1234])
+    assert list(split) == [4, 412, 1234]
+    # Nested rows stay inside their parent
+    assert json.loads(split[4]) == [rows[0]]
+    assert json.loads(split[412]) == [rows[1]]
+    assert json.loads(split[1234]) == []
+
+def test_split_json_errors():
+    assert raises_value_error(split_by_pid, json.dumps([{"Offset": 4096}]), "json", [4])
+    assert raises_value_error(split_by_pid, json.dumps({"PID": 4}), "json", [4])
+    assert raises_value_error(split_by_pid, "not json", "json", [4])
+    assert raises_value_error(split_by_pid, "", "csv", [4])
+
+if __name__ == "__main__":
+    test_split_quick()
+    test_split_quick_child_rows_of_other_pids()
+    test_split_quick_missing_pid_column()
+    test_split_json()
+    test_split_json_errors()
+    print("ok")
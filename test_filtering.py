@@ -0,0 +1,75 @@
+from core.filtering import compile_condition, filter_pids, select_rows
+from core.rendering import TabularResult
+
+def raises_value_error(function, *args) -> bool:
+    try:
+        function(*args)
+    except ValueError:
+        return True
+    return False
+
+def process_table() -> TabularResult:
+    return TabularResult(
+        columns=["PID", "ImageFileName", "Offset(V)", "Threads"],
+        types=["int", "str", "int", "int"],
+        data=[
+            [4, 88, 412, 1000],
+            ["System", "smss.exe", "csrss.exe", None],
+            [0x1000, 0x2000, 0x3000, 0x4000],
+            [100, 2, 9, None],
+        ],
+        depth=[0, 1, 1, 0],
+    )
+
+def test_condition_forms():
+    # A bare value is equality, a list is membership
+    assert compile_condition(4, "int")(4)
+    assert not compile_condition(4, "int")(5)
+    assert compile_condition([4, 88], "int")(88)
+    assert not compile_condition([4, 88], "int")(412)
+    between = compile_condition({"min": 10, "max": 100}, "int")
+    assert [between(value) for value in (9, 10, 100, 101, None)] == [False, True, True, False, False]
+    assert compile_condition({"ne": "x"})("y")
+    assert compile_condition({"regex": "^sm"})("smss.exe")
+    assert not compile_condition({"regex": "^sm"})(None)
+
+def test_condition_coercion():
+    # Strings are read as integers (decimal or 0x) against integer columns only
+    assert compile_condition("4", "int")(4)
+    assert compile_condition({"in": ["0x1000", "8192"]}, "int")(0x2000)
+    assert compile_condition({"min": "0x10"}, "int")(16)
+    assert not compile_condition("4", "str")(4)
+    # Strings that are not numbers are compared as they are
+    assert compile_condition("System", "int")("System")
+
+def test_condition_errors():
+    assert raises_value_error(compile_condition, {"gt": 1})
+    assert raises_value_error(compile_condition, {"in": 1})
+    assert raises_value_error(compile_condition, {"regex": "("})
+
+def test_select_rows():
+    table = process_table()
+    result = select_rows(table, {"pid": {"min": "10"}, "imagefilename": {"regex": "exe$"}}, ["ImageFileName", "PID"])
+    assert result.columns == ["ImageFileName", "PID"]
+    assert result.types == ["str", "int"]
+    assert result.data == [["smss.exe", "csrss.exe"], [88, 412]]
+    assert result.depth == [1, 1]
+    assert select_rows(table).data == table.data
+    assert raises_value_error(select_rows, table, {"Missing": 1})
+    # Conditions that cannot be compared with the column's values
+    assert raises_value_error(select_rows, table, {"ImageFileName": {"min": 3}})
+
+def test_filter_pids():
+    assert filter_pids({"PID": ["4", 88]}) == [4, 88]
+    assert filter_pids({"pid": {"eq": "0x10"}}) == [16]
+    assert filter_pids({"pid": {"min": 4}}) is None
+    assert filter_pids({"pid": "System"}) is None
+    assert filter_pids({"Threads": 4}) is None
+
+if __name__ == "__main__":
+    test_condition_forms()
+    test_condition_coercion()
+    test_condition_errors()
+    test_select_rows()
+    test_filter_pids()
+    print("ok")
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import tempfile
+
+from core.memscan import PhysicalScanner
+
+def write_image(directory: str, size: int, markers) -> str:
+    data = bytearray(os.urandom(size))
+    for offset, marker in markers:
+        data[offset:offset + len(marker)] = marker
+    path = os.path.join(directory, "image.raw")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def scan(path: str, patterns, max_hits: int, chunk_bytes: int = 64 * 1024 * 1024):
+    scanner = PhysicalScanner(workers=2, chunk_bytes=chunk_bytes, overlap_bytes=64)
+    try:
+        return asyncio.run(scanner.scan(path, patterns=patterns, max_hits=max_hits, map_processes=False))
+    finally:
+        scanner.pool.shutdown()
+
+def test_truncation_keeps_lowest_offsets_across_patterns():
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = write_image(work_dir, 1024 * 1024, [(0, b"AAAAA"), (100, b"BBBBB"), (200, b"BBBBB")])
+        # The first pattern alone could fill the quota with its higher offsets
+        report = scan(path, ["BBBBB", "AAAAA"], max_hits=2)
+        assert [hit["offset"] for hit in report["hits"]] == [0, 100]
+        assert [hit["pattern"] for hit in report["hits"]] == ["AAAAA", "BBBBB"]
+        assert report["truncated"]
+
+def test_truncation_across_chunks():
+    with tempfile.TemporaryDirectory() as work_dir:
+        markers = [(offset, b"NEEDLE") for offset in range(0, 1024 * 1024, 4096)]
+        path = write_image(work_dir, 1024 * 1024, markers)
+        report = scan(path, ["NEEDLE"], max_hits=10, chunk_bytes=64 * 1024)
+        assert [hit["offset"] for hit in report["hits"]] == [offset for offset, _ in markers[:10]]
+        report = scan(path, ["NEEDLE"], max_hits=1000, chunk_bytes=64 * 1024)
+        assert report["hit_count"] == len(markers)
+        assert not report["truncated"]
+
+if __name__ == "__main__":
+    test_truncation_keeps_lowest_offsets_across_patterns()
+    test_truncation_across_chunks()
+    print("ok")
@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+
+from core.sparse import PAGE_SIZE, SparseWriter, punch_zero_pages, zero_runs
+
+def page(fill: int) -> bytes:
+    return bytes([fill]) * PAGE_SIZE
+
+def test_zero_runs():
+    # data, zero, zero, data, then a zero partial page
+    data = page(1) + page(0) + page(0) + page(2) + bytes(100)
+    assert zero_runs(data) == [(PAGE_SIZE, 3 * PAGE_SIZE), (4 * PAGE_SIZE, 4 * PAGE_SIZE + 100)]
+    # A partial page holding data is not a run
+    assert zero_runs(page(0) + b"\0" * 50 + b"x") == [(0, PAGE_SIZE)]
+    assert zero_runs(bytes(3 * PAGE_SIZE + 7)) == [(0, 3 * PAGE_SIZE + 7)]
+    assert zero_runs(b"") == []
+
+def test_sparse_writer_trailing_hole():
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "image.raw")
+        data = page(7) + bytes(5 * PAGE_SIZE + 123)
+        with open(path, "wb") as output:
+            writer = SparseWriter(output)
+            # Chunks that do not line up with pages
+            for offset in range(0, len(data), 1000):
+                writer.write(data[offset:offset + 1000])
+            writer.close()
+        assert writer.size == len(data)
+        assert writer.zero_bytes == 5 * PAGE_SIZE + 123
+        # The trailing hole still counts towards the file size
+        assert os.path.getsize(path) == len(data)
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+def test_sparse_writer_in_memory():
+    output = io.BytesIO()
+    writer = SparseWriter(output)
+    writer.write(bytes(PAGE_SIZE) + b"tail")
+    writer.close()
+    assert output.getvalue() == bytes(PAGE_SIZE) + b"tail"
+
+def test_punch_zero_pages():
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "image.raw")
+        data = page(1) + bytes(64 * PAGE_SIZE) + page(2) + bytes(10)
+        with open(path, "wb") as f:
+            f.write(data)
+        mtime = os.stat(path).st_mtime_ns
+        report = punch_zero_pages(path)
+        assert report.size == len(data)
+        # The partial zero tail is too short to punch
+        assert report.zero_bytes == 64 * PAGE_SIZE
+        assert os.stat(path).st_mtime_ns == mtime
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+if __name__ == "__main__":
+    test_zero_runs()
+    test_sparse_writer_trailing_hole()
+    test_sparse_writer_in_memory()
+    test_punch_zero_pages()
+    print("ok")
@@ -4,8 +4,13 @@ import sys
 import json
 import subprocess
 import asyncio
+import base64
+import time
 from typing import List, Dict, Any, Optional, Union
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse, Response
 from dotenv import load_dotenv
 import logging
 from pathlib import Path
@@ -14,6 +19,16 @@ from pydantic import BaseModel, Field
 
 from rich_logger import RichLogger
 from plugins.plugin_factory import PluginFactory
+from core import (
+    VolatilityRunner, InProcessVolatilityRunner, ImageWorkerPool, AutomagicConfigCache, ResultCache,
+    ImageFingerprinter,
+    RunOptions, set_run_options, reset_run_options,
+    OUTPUT_FORMATS, parse_json_output, OutputSink, ResultStore, select_rows, filter_pids,
+    JobScheduler, PRIORITIES, PluginBatch, Job, JobManager, ResourceLimits, RuntimeHistory, os_family,
+    RunMetrics, MetricsRegistry, JOB_STATES, ProfileStore, ImageNormalizer, DecompressionCache,
+    compression_format, COMPRESSED_SUFFIXES, ImageSparsifier, SparseReport, SparseWriter, allocated_bytes, PhysicalScanner, ScanIndex, detect_container, SymbolIndex,
+    ProcessPool
+)
 
 # Initialize logger
 logger = RichLogger.get_logger("volatility3_mcp")
@@ -38,129 +53,378 @@ VOLATILITY_SCRIPT = os.environ.get("VOLATILITY_SCRIPT", os.path.join(VOLATILITY_
 SYMBOLS_DIR = os.environ.get("SYMBOLS_DIR", os.path.join(VOLATILITY_DIR, "symbols"))
 # Add new configuration for memory images directory
 MEMORY_IMAGES_DIR = os.environ.get("MEMORY_IMAGES_DIR", "/tmp/memimages/")
+# Execution backend: "subprocess" forks vol.py per call, "inprocess" drives the
+# volatility3 framework API inside long-lived worker processes
+VOLATILITY_BACKEND = os.environ.get("VOLATILITY_BACKEND", "subprocess").lower()
+VOLATILITY_WORKERS = int(os.environ.get("VOLATILITY_WORKERS", 2))
+# Warm workers pinned to one image each (inprocess backend only, 0 disables)
+VOLATILITY_WARM_WORKERS = int(os.environ.get("VOLATILITY_WARM_WORKERS", 4))
+VOLATILITY_WARM_IDLE_TIMEOUT = int(os.environ.get("VOLATILITY_WARM_IDLE_TIMEOUT", 600))
+# Server-side caches (automagic configuration, results, ...)
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/volatility_mcp_cache/")
+AUTOMAGIC_CACHE = os.environ.get("AUTOMAGIC_CACHE", "true").lower() == "true"
+RESULT_CACHE = os.environ.get("RESULT_CACHE", "true").lower() == "true"
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# Size of the output chunks sent to the client when run_plugin streams
+STREAM_CHUNK_BYTES = int(os.environ.get("STREAM_CHUNK_BYTES", 16 * 1024))
+# Results with more rows than this are stored and returned a page at a time (0 disables paging)
+RESULT_PAGE_SIZE = int(os.environ.get("RESULT_PAGE_SIZE", 500))
+RESULT_PAGE_TTL = int(os.environ.get("RESULT_PAGE_TTL", 3600))
+# Seconds the cProfile output of a profiled run is kept for download
+PROFILE_RETENTION = int(os.environ.get("PROFILE_RETENTION", 86400))
+# Default timeout of a plugin run in seconds, and of a run submitted as a background job
+VOLATILITY_TIMEOUT = int(os.environ.get("VOLATILITY_TIMEOUT", 360))
+VOLATILITY_JOB_TIMEOUT = int(os.environ.get("VOLATILITY_JOB_TIMEOUT", 6 * 3600))
+# Derive timeouts from the runtime history of each plugin on images of similar size
+VOLATILITY_ADAPTIVE_TIMEOUT = os.environ.get("VOLATILITY_ADAPTIVE_TIMEOUT", "true").lower() == "true"
+VOLATILITY_TIMEOUT_FACTOR = float(os.environ.get("VOLATILITY_TIMEOUT_FACTOR", 3.0))
+VOLATILITY_TIMEOUT_MIN_RUNS = int(os.environ.get("VOLATILITY_TIMEOUT_MIN_RUNS", 3))
+VOLATILITY_TIMEOUT_MIN = int(os.environ.get("VOLATILITY_TIMEOUT_MIN", 30))
+VOLATILITY_TIMEOUT_MAX = int(os.environ.get("VOLATILITY_TIMEOUT_MAX", VOLATILITY_JOB_TIMEOUT))
+# Resource limits of each volatility process (0 for none): address space in MB, CPU seconds
+# per plugin run, open files; and seconds between SIGTERM and SIGKILL when a run is stopped
+VOLATILITY_RLIMIT_AS_MB = int(os.environ.get("VOLATILITY_RLIMIT_AS_MB", 0))
+VOLATILITY_RLIMIT_CPU = int(os.environ.get("VOLATILITY_RLIMIT_CPU", 0))
+VOLATILITY_RLIMIT_NOFILE = int(os.environ.get("VOLATILITY_RLIMIT_NOFILE", 0))
+VOLATILITY_KILL_GRACE = float(os.environ.get("VOLATILITY_KILL_GRACE", 5))
+# Background jobs running at once, and how long finished jobs and their results are kept
+VOLATILITY_MAX_JOBS = int(os.environ.get("VOLATILITY_MAX_JOBS", 2))
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", 3600))
+# Concurrent plugin runs overall and per image; further calls queue by priority
+VOLATILITY_MAX_CONCURRENT = int(os.environ.get("VOLATILITY_MAX_CONCURRENT", min(4, os.cpu_count() or 1)))
+VOLATILITY_MAX_PER_IMAGE = int(os.environ.get("VOLATILITY_MAX_PER_IMAGE", 2))
+# Default number of plugins of one run_plugins call executing at once
+VOLATILITY_BATCH_CONCURRENCY = int(os.environ.get("VOLATILITY_BATCH_CONCURRENCY", VOLATILITY_MAX_CONCURRENT))
+# Run the plugins of one run_plugins call in a single process sharing one volatility
+# context (subprocess backend), on this many threads after the first plugin
+VOLATILITY_SHARED_PROCESS = os.environ.get("VOLATILITY_SHARED_PROCESS", "true").lower() == "true"
+VOLATILITY_SHARED_PROCESS_THREADS = int(os.environ.get("VOLATILITY_SHARED_PROCESS_THREADS", 1))
 
-class VolatilityRunner:
-    """Class to handle Volatility command execution with proper error handling and logging"""
-
-    def __init__(
-        self,
-        volatility_python: Path,
-        volatility_script: Path,
-        volatility_dir: Path,   
-        timeout: int,
-        log_level: int = logging.INFO
-    ):
-        """
-        Initialize VolatilityRunner
-
-        Args:
-            volatility_python: Path to Python executable
-            volatility_script: Path to Volatility script
-            volatility_dir: Working directory for Volatility
-            log_level: Logging level (default: logging.INFO)
-        """
-        self.volatility_python = str(volatility_python)
-        self.volatility_script = str(volatility_script)
-        self.volatility_dir = str(volatility_dir)
-        self.timeout = timeout
-
-        # Set up logging
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(log_level)
-
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-
-        # Validate paths
-        self._validate_paths()
-
-    def _validate_paths(self) -> None:
-        """Validate that all required paths exist"""
-        paths = {
-            "Volatility Python": self.volatility_python,
-            "Volatility Script": self.volatility_script,
-            "Volatility Directory": self.volatility_dir
-        }
-
-        for name, path in paths.items():
-            if not Path(path).exists():
-                error_msg = f"{name} path does not exist: {path}"
-                self.logger.error(error_msg)
-                raise FileNotFoundError(error_msg)
-
-    async def __call__(
-        self,
-        cmd_args: List[str],
-        timeout: Optional[int] = None
-    ) -> Union[str, Exception]:
-        """
-        Run a Volatility command
-
-        Args:
-            cmd_args: List of command arguments
-            timeout: Command timeout in seconds
-
-        Returns:
-            Command output or error message
-        """
-        cmd = [self.volatility_python, self.volatility_script] + cmd_args
-        cmd_str = ' '.join(cmd)
-
-        self.logger.info(f"Running command: {cmd_str}")
+# Decompress .gz, .xz, .zst and .zip dumps once into a sparse copy under CACHE_DIR/decompressed
+DECOMPRESSION_CACHE = os.environ.get("DECOMPRESSION_CACHE", "true").lower() == "true"
+DECOMPRESSION_CACHE_MAX_BYTES = int(os.environ.get("DECOMPRESSION_CACHE_MAX_BYTES", 64 * 1024 ** 3))
 
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=self.volatility_dir
-            )
+# Store zero pages of memory images as holes: "downloads" writes downloaded dumps sparse,
+# "all" also rewrites local images in place (once, in the background) when plugins first run on them
+SPARSE_IMAGES = os.environ.get("SPARSE_IMAGES", "downloads").lower()
 
-            try:
-                timeout = timeout or self.timeout 
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                error_msg = f"Command timed out after {timeout} seconds: {cmd_str}"
-                self.logger.error(error_msg)
-                return error_msg
-
-            if process.returncode != 0:
-                stderr_text = stderr.decode('utf-8', errors='replace')
-                error_msg = f"Command failed with return code {process.returncode}: {stderr_text}"
-                self.logger.error(error_msg)
-                return error_msg
-
-            output = stdout.decode('utf-8', errors='replace')
-            self.logger.debug(f"Command completed successfully: {cmd_str}")
-            return output
+# Parallel physical-memory scans (scan_memory_dump, YaraScan/RegExScan with parallel=true):
+# worker processes per scan, bytes per chunk, bytes chunks overlap and the default hit limit
+MEMSCAN_WORKERS = int(os.environ.get("MEMSCAN_WORKERS", os.cpu_count() or 1))
+MEMSCAN_CHUNK_BYTES = int(os.environ.get("MEMSCAN_CHUNK_BYTES", 64 * 1024 * 1024))
+MEMSCAN_OVERLAP_BYTES = int(os.environ.get("MEMSCAN_OVERLAP_BYTES", 64 * 1024))
+MEMSCAN_MAX_HITS = int(os.environ.get("MEMSCAN_MAX_HITS", 10000))
+
+# Index, in one parallel pass, the pages holding the signatures of PsScan, FileScan, NetScan, SvcScan
+# and MFTScan, and make those plugins scan only the indexed pages; images are indexed in the background
+# the first time one of them runs (or with index_memory_dump)
+SCAN_INDEX = os.environ.get("SCAN_INDEX", "true").lower() == "true"
 
-        except Exception as e:
-            error_msg = f"Exception running command {cmd_str}: {str(e)}"
-            self.logger.exception(error_msg)
-            return error_msg
+# Index the ISFs in SYMBOLS_DIR by kernel identifier (PDB GUID/age, Linux or macOS banner) for
+# resolve_symbols, and keep decompressed copies of the ISFs images resolve to within the byte budget
+SYMBOL_INDEX = os.environ.get("SYMBOL_INDEX", "true").lower() == "true"
+HOT_ISF_MAX_BYTES = int(os.environ.get("HOT_ISF_MAX_BYTES", 2 * 1024 ** 3))
 
-volatility_runner = VolatilityRunner(
-    volatility_python=VOLATILITY_PYTHON,
+# Convert LiME, ELF core, crash dump, VMware and hibernation images to a raw layer once, in the
+# background, and run plugins against that; the raw layers are kept within the byte budget
+NORMALIZE_IMAGES = os.environ.get("NORMALIZE_IMAGES", "true").lower() == "true"
+NORMALIZED_MAX_BYTES = int(os.environ.get("NORMALIZED_MAX_BYTES", 64 * 1024 ** 3))
+
+# Serve Prometheus metrics at /metrics next to the SSE endpoint (get_metrics works either way)
+METRICS_ENDPOINT = os.environ.get("METRICS_ENDPOINT", "true").lower() == "true"
+
+fingerprinter = ImageFingerprinter(store_dir=os.path.join(CACHE_DIR, "fingerprints"))
+
+config_cache = AutomagicConfigCache(
+    cache_dir=os.path.join(CACHE_DIR, "automagic"),
     volatility_dir=VOLATILITY_DIR,
-    volatility_script=VOLATILITY_SCRIPT,
-    timeout=360  # Seconds
+    symbols_dir=SYMBOLS_DIR,
+    fingerprinter=fingerprinter
+) if AUTOMAGIC_CACHE else None
+
+result_cache = ResultCache(
+    cache_dir=os.path.join(CACHE_DIR, "results"),
+    volatility_dir=VOLATILITY_DIR,
+    symbols_dir=SYMBOLS_DIR,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    fingerprinter=fingerprinter
+) if RESULT_CACHE else None
+
+decompression_cache = DecompressionCache(
+    cache_dir=os.path.join(CACHE_DIR, "decompressed"),
+    max_bytes=DECOMPRESSION_CACHE_MAX_BYTES,
+    fingerprinter=fingerprinter
+) if DECOMPRESSION_CACHE else None
+
+image_sparsifier = ImageSparsifier(
+    path=os.path.join(CACHE_DIR, "sparse_images.json")
+) if SPARSE_IMAGES in ("downloads", "all") else None
+
+result_store = ResultStore(store_dir=os.path.join(CACHE_DIR, "pages"), ttl=RESULT_PAGE_TTL)
+
+profile_store = ProfileStore(store_dir=os.path.join(CACHE_DIR, "profiles"), ttl=PROFILE_RETENTION)
+
+scheduler = JobScheduler(max_slots=VOLATILITY_MAX_CONCURRENT, per_image_limit=VOLATILITY_MAX_PER_IMAGE)
+
+job_manager = JobManager(max_running=VOLATILITY_MAX_JOBS, retention=JOB_RETENTION)
+
+# Runs are always recorded for estimate_plugin_cost; timeouts adapt only with VOLATILITY_ADAPTIVE_TIMEOUT
+runtime_history = RuntimeHistory(
+    path=os.path.join(CACHE_DIR, "runtime_history.json"),
+    factor=VOLATILITY_TIMEOUT_FACTOR,
+    min_samples=VOLATILITY_TIMEOUT_MIN_RUNS,
+    min_timeout=VOLATILITY_TIMEOUT_MIN,
+    max_timeout=VOLATILITY_TIMEOUT_MAX,
+    adaptive_timeouts=VOLATILITY_ADAPTIVE_TIMEOUT
 )
 
+run_metrics = RunMetrics()
+
+resource_limits = ResourceLimits(
+    address_space=VOLATILITY_RLIMIT_AS_MB * 1024 * 1024,
+    cpu_time=VOLATILITY_RLIMIT_CPU,
+    open_files=VOLATILITY_RLIMIT_NOFILE
+)
+
+if VOLATILITY_BACKEND == "inprocess":
+    volatility_runner = InProcessVolatilityRunner(
+        volatility_dir=VOLATILITY_DIR,
+        timeout=VOLATILITY_TIMEOUT,  # Seconds
+        max_workers=VOLATILITY_WORKERS,
+        image_pool=ImageWorkerPool(
+            volatility_dir=VOLATILITY_DIR,
+            max_workers=VOLATILITY_WARM_WORKERS,
+            idle_timeout=VOLATILITY_WARM_IDLE_TIMEOUT,
+            limits=resource_limits
+        ) if VOLATILITY_WARM_WORKERS > 0 else None,
+        config_cache=config_cache,
+        result_cache=result_cache,
+        fingerprinter=fingerprinter,
+        scheduler=scheduler,
+        runtime_history=runtime_history,
+        metrics=run_metrics,
+        limits=resource_limits
+    )
+else:
+    volatility_runner = VolatilityRunner(
+        volatility_python=VOLATILITY_PYTHON,
+        volatility_dir=VOLATILITY_DIR,
+        volatility_script=VOLATILITY_SCRIPT,
+        timeout=VOLATILITY_TIMEOUT,  # Seconds
+        config_cache=config_cache,
+        result_cache=result_cache,
+        fingerprinter=fingerprinter,
+        scheduler=scheduler,
+        runtime_history=runtime_history,
+        metrics=run_metrics,
+        limits=resource_limits,
+        kill_grace=VOLATILITY_KILL_GRACE
+    )
+
+image_normalizer = ImageNormalizer(
+    volatility_runner,
+    cache_dir=os.path.join(CACHE_DIR, "normalized"),
+    max_bytes=NORMALIZED_MAX_BYTES,
+    timeout=VOLATILITY_JOB_TIMEOUT
+) if NORMALIZE_IMAGES else None
+volatility_runner.normalizer = image_normalizer
+
+# Worker processes of the parallel scans and index builds, started once and kept
+process_pool = ProcessPool(workers=MEMSCAN_WORKERS)
+
+memory_scanner = PhysicalScanner(
+    volatility_runner,
+    pool=process_pool,
+    chunk_bytes=MEMSCAN_CHUNK_BYTES,
+    overlap_bytes=MEMSCAN_OVERLAP_BYTES,
+    max_hits=MEMSCAN_MAX_HITS
+)
+volatility_runner.memory_scanner = memory_scanner
+
+scan_index = ScanIndex(
+    cache_dir=os.path.join(CACHE_DIR, "scan_index"),
+    fingerprinter=fingerprinter,
+    chunk_bytes=MEMSCAN_CHUNK_BYTES,
+    pool=process_pool
+) if SCAN_INDEX else None
+volatility_runner.scan_index = scan_index
+
+symbol_index = SymbolIndex(
+    symbols_dir=SYMBOLS_DIR,
+    cache_dir=os.path.join(CACHE_DIR, "symbol_index"),
+    scanner=memory_scanner,
+    hot_max_bytes=HOT_ISF_MAX_BYTES,
+    pool=process_pool
+) if SYMBOL_INDEX else None
+if config_cache is not None:
+    config_cache.symbol_index = symbol_index
+
+# Clear what an earlier server process left behind. Worker processes that re-run this script as
+# __mp_main__ (multiprocessing's spawn start method) must not touch the running server's files
+if __name__ != "__mp_main__":
+    result_store.remove_stale()
+    if decompression_cache is not None:
+        decompression_cache.remove_orphans()
+    if scan_index is not None:
+        scan_index.remove_partial_builds()
+
 # Register all plugins
 PluginFactory.register_windows_plugins(volatility_runner)
 PluginFactory.register_linux_plugins(volatility_runner)
 PluginFactory.register_mac_plugins(volatility_runner)
 PluginFactory.register_common_plugins(volatility_runner)
 
+def register_collected_metrics(registry: MetricsRegistry) -> None:
+    """Expose the counters and queue state the server's components keep themselves"""
+    registry.collected("volatility_active_processes", "Volatility processes running a plugin", "gauge",
+                       volatility_runner.active_processes)
+    registry.collected("volatility_queue_depth", "Calls waiting for an execution slot", "gauge",
+                       lambda: {(priority,): count for priority, count in scheduler.stats()["queued"].items()},
+                       ("priority",))
+    registry.collected("volatility_running_slots", "Execution slots in use", "gauge",
+                       lambda: scheduler.stats()["running"])
+    registry.collected("volatility_jobs", "Background jobs by state", "gauge",
+                       lambda: {(state,): count for state, count in job_manager.stats().items() if state in JOB_STATES},
+                       ("state",))
+    if result_cache is not None:
+        for name, documentation in (("hits", "Result cache hits"), ("misses", "Result cache misses"),
+                                    ("evictions", "Result cache entries evicted to stay under budget")):
+            registry.collected(f"volatility_result_cache_{name}_total", documentation, "counter",
+                               lambda name=name: result_cache.stats()[name])
+        registry.collected("volatility_result_cache_bytes", "Compressed size of the result cache", "gauge",
+                           lambda: result_cache.stats()["bytes"])
+        registry.collected("volatility_result_cache_entries", "Entries in the result cache", "gauge",
+                           lambda: result_cache.stats()["entries"])
+
+    if decompression_cache is not None:
+        registry.collected("volatility_decompressed_disk_bytes", "Disk used by decompressed copies of compressed dumps",
+                           "gauge", lambda: decompression_cache.stats()["disk_bytes"])
+        registry.collected("volatility_decompressions_total", "Compressed dumps decompressed", "counter",
+                           lambda: decompression_cache.stats()["decompressions"])
+    if image_normalizer is not None:
+        registry.collected("volatility_normalized_layer_bytes", "Disk used by raw layers of normalized images",
+                           "gauge", lambda: image_normalizer.stats()["bytes"])
+        registry.collected("volatility_normalizations_total", "Images converted to a raw layer", "counter",
+                           lambda: image_normalizer.stats()["conversions"])
+    registry.collected("volatility_memscan_bytes_total", "Bytes scanned by parallel physical-memory scans",
+                       "counter", lambda: memory_scanner.stats()["bytes_scanned"])
+    if scan_index is not None:
+        registry.collected("volatility_scan_index_narrowed_runs_total",
+                           "Scan plugin runs narrowed to the pages of a scan index", "counter",
+                           lambda: scan_index.stats()["narrowed_runs"])
+    if symbol_index is not None:
+        registry.collected("volatility_hot_isf_bytes", "Disk used by decompressed copies of hot ISFs", "gauge",
+                           lambda: symbol_index.stats()["hot_bytes"])
+    if image_sparsifier is not None:
+        registry.collected("volatility_sparse_reclaimed_bytes", "Disk reclaimed by storing zero pages of images as holes",
+                           "gauge", lambda: image_sparsifier.stats()["reclaimed_bytes"])
+
+register_collected_metrics(run_metrics.registry)
+
+class ToolMetricsMiddleware(Middleware):
+    """Counts tool calls, their duration and the bytes returned to the client"""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        started = time.monotonic()
+        result = None
+        try:
+            result = await call_next(context)
+            return result
+        finally:
+            returned = 0
+            for block in getattr(result, "content", None) or []:
+                returned += len((getattr(block, "text", "") or "").encode("utf-8"))
+            run_metrics.observe_tool(context.message.name, time.monotonic() - started, returned)
+
+mcp.add_middleware(ToolMetricsMiddleware())
+
+@mcp.custom_route("/profiles/{profile_id}", methods=["GET"])
+async def profile_download(request: Request) -> Response:
+    path = profile_store.path(request.path_params["profile_id"])
+    if path is None:
+        return PlainTextResponse("Unknown or expired profile", status_code=404)
+    return FileResponse(path, media_type="application/octet-stream",
+                        filename=os.path.basename(path))
+
+if METRICS_ENDPOINT:
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(run_metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+def shape_output(output: str, output_format: str, page_size: int,
+                 filters: Optional[Dict[str, Any]] = None, columns: Optional[List[str]] = None) -> str:
+    """
+    Filter, project and page successful plugin output
+
+    Args:
+        output: Successful plugin output (JSON renderer output when filtering or output_format is 'json')
+        output_format: Format requested from run_plugin
+        page_size: Maximum rows returned without paging (0 returns everything)
+        filters: Optional column conditions rows must match
+        columns: Optional columns to keep, in order
+
+    Returns:
+        The formatted output, or the first page with a handle for get_result_page
+    """
+    if output_format == "text" and not (filters or columns):
+        header, rows = ResultStore.split_text(output)
+        if page_size <= 0 or len(rows) <= page_size:
+            return output
+        return result_store.render_page(result_store.put_text(header, rows), 0, page_size)
+
+    try:
+        table = parse_json_output(output)
+    except ValueError:
+        return output
+    if filters or columns:
+        try:
+            table = select_rows(table, filters, columns)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+    if output_format == "json":
+        if page_size <= 0 or table.row_count <= page_size:
+            return json.dumps(table.to_dict(), separators=(",", ":"))
+        stored = result_store.put_table(table)
+    else:
+        text = table.to_text()
+        if page_size <= 0 or table.row_count <= page_size:
+            return text
+        stored = result_store.put_text(*ResultStore.split_text(text))
+    return result_store.render_page(stored, 0, page_size)
+
+def resolve_memory_dump_path(memory_dump_path: str) -> Optional[str]:
+    """Resolve a full path or a bare filename in MEMORY_IMAGES_DIR to an existing dump, or None"""
+    if os.path.isabs(memory_dump_path) and os.path.exists(memory_dump_path):
+        return memory_dump_path
+    # Try to find the file in MEMORY_IMAGES_DIR
+    potential_path = os.path.join(MEMORY_IMAGES_DIR, os.path.basename(memory_dump_path))
+    if os.path.exists(potential_path):
+        logger.info(f"Using memory dump from {MEMORY_IMAGES_DIR}: {potential_path}")
+        return potential_path
+    if os.path.exists(memory_dump_path):
+        return memory_dump_path
+    return None
+
+async def prepare_memory_dump(memory_dump_path: str) -> str:
+    """
+    Resolve a dump like resolve_memory_dump_path, decompressing it first if it is compressed
+
+    Concurrent calls for the same archive wait on one decompression.
+
+    Returns:
+        The path plugins should run against, or an error message
+    """
+    resolved_path = resolve_memory_dump_path(memory_dump_path)
+    if resolved_path is None:
+        return f"Error: Memory dump file not found at {memory_dump_path} or in {MEMORY_IMAGES_DIR}"
+    if decompression_cache is None or compression_format(resolved_path) is None:
+        return resolved_path
+    try:
+        return await decompression_cache.extract(resolved_path)
+    except Exception as e:
+        return f"Error: Could not decompress {resolved_path}: {str(e)}"
+
 @mcp.tool()
 async def list_available_plugins() -> str:
     """
@@ -172,30 +436,35 @@ async def list_available_plugins() -> str:
     plugins = PluginFactory.list_plugins()
     return json.dumps(plugins, indent=2)
 
-@mcp.tool()
-async def run_plugin(memory_dump_path: str, plugin_name: str, os_type: str = 'windows', kw_args: dict = None) -> str:
-    """
-    Run a specific Volatility plugin with optional keyword arguments.
-
-    Args:
-        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
-        plugin_name: Name of the plugin to run.
-        os_type: Optional 'windows', 'linux', or 'mac' (required for common plugins)
-        kw_args: Optional dictionary of keyword arguments to pass to the plugin.
+async def execute_plugin(memory_dump_path: str, plugin_name: str, kw_args: dict = None,
+                         no_cache: bool = False, output_format: str = 'text', stream: bool = False,
+                         page_size: int = None, filters: dict = None, columns: list = None,
+                         priority: str = 'interactive', batch: PluginBatch = None, timeout: int = None,
+                         job: Job = None, profile_path: str = None, ctx: Context = None) -> str:
+    """Run one plugin for run_plugin, run_plugins and submit_plugin; see run_plugin for the arguments"""
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: Unknown output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}"
+    if stream and (output_format != 'text' or filters or columns or ctx is None):
+        return "Error: Streaming is only supported with output_format 'text' and without filters or columns"
+    if filters is not None and not isinstance(filters, dict):
+        return "Error: filters must be an object mapping column names to conditions"
+    if columns is not None and not isinstance(columns, list):
+        return "Error: columns must be a list of column names"
+    if priority not in PRIORITIES:
+        return f"Error: Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}"
 
-    Returns:
-        Output from the specified plugin or an error message.
-    """
     try:
-        # Check if the path is just a filename or a full path
-        if not os.path.isabs(memory_dump_path) or not os.path.exists(memory_dump_path):
-            # Try to find the file in MEMORY_IMAGES_DIR
-            potential_path = os.path.join(MEMORY_IMAGES_DIR, os.path.basename(memory_dump_path))
-            if os.path.exists(potential_path):
-                memory_dump_path = potential_path
-                logger.info(f"Using memory dump from {MEMORY_IMAGES_DIR}: {memory_dump_path}")
-            elif not os.path.exists(memory_dump_path):
-                return f"Error: Memory dump file not found at {memory_dump_path} or in {MEMORY_IMAGES_DIR}"
+        # Check if the path is just a filename or a full path, and decompress compressed dumps
+        resolved_path = await prepare_memory_dump(memory_dump_path)
+        if resolved_path.startswith("Error"):
+            return resolved_path
+        memory_dump_path = resolved_path
+        if SPARSE_IMAGES == "all":
+            # Reads stay byte-identical, so runs need not wait for the rewrite
+            image_sparsifier.submit(memory_dump_path)
+
+        # Fingerprint off the event loop; plugin validation and cache lookups then reuse it
+        await asyncio.to_thread(fingerprinter.fingerprint, memory_dump_path)
 
         plugin = PluginFactory.get_plugin(plugin_name, volatility_runner)
 
@@ -215,13 +484,684 @@ async def run_plugin(memory_dump_path: str, plugin_name: str, os_type: str = 'wi
                 if param_name != 'memory_dump_path' and param_name in kw_args:
                     plugin_args[param_name] = kw_args[param_name]
 
-        return await plugin.run(**plugin_args)
+        # Hand a single-PID filter to plugins that take a pid themselves (e.g. MemMap)
+        pids = filter_pids(filters)
+        if pids and len(pids) == 1 and 'pid' in run_params and 'pid' not in plugin_args:
+            plugin_args['pid'] = pids[0]
+
+        sink = None
+        if stream:
+            async def send_chunk(chunk: str) -> None:
+                # Awaiting each notification paces the plugin to what the client consumes
+                await ctx.info(chunk, logger_name="volatility3.output")
+                await ctx.report_progress(progress=sink.lines)
+            sink = OutputSink(send_chunk, chunk_bytes=STREAM_CHUNK_BYTES)
+
+        # Filtering works on parsed rows, so it needs the JSON renderer whatever the output format
+        renderer = "json" if output_format == "json" or filters or columns else None
+
+        async def report_queue(position: int, waited: float) -> None:
+            await ctx.info(f"Queued for an execution slot: position {position}, waited {waited:.1f}s",
+                           logger_name="volatility3.scheduler")
+
+        options = RunOptions(no_cache=no_cache, renderer=renderer, sink=sink, pids=pids,
+                             priority=priority, on_queue=report_queue if ctx is not None else None,
+                             batch=batch, timeout=timeout, profile_path=profile_path,
+                             on_progress=job.update_progress if job is not None else None)
+        token = set_run_options(options)
+        try:
+            output = await plugin.run(**plugin_args)
+        finally:
+            reset_run_options(token)
+        if job is not None:
+            job.succeeded = bool(options.succeeded)
+            job.usage = options.usage
+        if options.queue_position and ctx is not None:
+            await ctx.info(f"Started after {options.queue_wait:.1f}s in the queue (position {options.queue_position})",
+                           logger_name="volatility3.scheduler")
+
+        if sink is not None:
+            if output:
+                return output
+            return f"Streamed {sink.lines} lines ({sink.chars} characters) of {plugin_name} output in {sink.chunks} messages"
+
+        page_size = RESULT_PAGE_SIZE if page_size is None else page_size
+        if options.pid_results is not None:
+            # A PID list was fanned out; shape each PID's output on its own
+            grouped = {}
+            for pid, result in options.pid_results.items():
+                pid_output = result.output
+                if result.success:
+                    pid_output = await asyncio.to_thread(shape_output, pid_output, output_format,
+                                                         page_size, filters, columns)
+                if output_format == "json":
+                    try:
+                        pid_output = json.loads(pid_output)
+                    except ValueError:
+                        pass
+                grouped[str(pid)] = pid_output
+            return json.dumps(grouped, indent=2)
+
+        if not options.succeeded:
+            return output
+        return await asyncio.to_thread(shape_output, output, output_format, page_size, filters, columns)
     except ValueError as e:
         return str(e)
     except Exception as e:
         logger.exception(f"Error running plugin {plugin_name}: {str(e)}")
         return f"Error running plugin: {str(e)}"
 
+@mcp.tool()
+async def run_plugin(memory_dump_path: str, plugin_name: str, os_type: str = 'windows', kw_args: dict = None,
+                     no_cache: bool = False, output_format: str = 'text', stream: bool = False,
+                     page_size: int = None, filters: dict = None, columns: list = None,
+                     priority: str = 'interactive', profile: bool = False, profile_top: int = 20,
+                     ctx: Context = None) -> str:
+    """
+    Run a specific Volatility plugin with optional keyword arguments.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        plugin_name: Name of the plugin to run.
+        os_type: Optional 'windows', 'linux', or 'mac' (required for common plugins)
+        kw_args: Optional dictionary of keyword arguments to pass to the plugin.
+        no_cache: Re-run the plugin even if a cached result exists (the cache is refreshed).
+        output_format: 'text' for the plain table, or 'json' for column-oriented rows
+            ({"columns", "types", "row_count", "depth", "data"} with one array per column)
+        stream: Send the output to the client as it is produced, in chunks of whole lines
+            delivered as log messages (logger 'volatility3.output') with progress notifications
+            counting lines; the result is then only a summary. Requires output_format 'text'.
+        page_size: Rows per page for large results (default 500, 0 returns everything). Larger
+            results are kept on the server and the first page is returned with a handle and
+            cursor for get_result_page.
+        filters: Optional conditions rows must match, keyed by column name (case-insensitive).
+            A value means equality, a list means membership (e.g. {"PID": [4, 868]}), and a dict
+            combines "eq", "ne", "in", "min", "max" and "regex" (e.g. {"ImageFileName": {"regex": "svc"}}).
+            PID conditions are also passed to the plugin as --pid where it supports it.
+            MemMap, DllList and Handles also take a list of PIDs as kw_args {"pid": [...]}; the
+            result is then a JSON object keyed by PID.
+            RegExScan takes {"pattern": ...} and YaraScan {"yara_rules": ...} or {"yara_file": ...};
+            with {"parallel": true} they scan the raw image on all cores as scan_memory_dump does.
+        columns: Optional list of columns to return, in order.
+        priority: 'interactive' (default) or 'background'. When all execution slots are busy,
+            queued interactive calls start first; the queue position and wait are reported
+            to the client as log messages.
+        profile: Run the plugin under cProfile, bypassing the result cache, to find out where
+            a slow run spends its time. The result is then JSON with the plugin "output" and a
+            "profile" summary: own time per volatility component (layer translation, symbol
+            loading, rendering, ...) and the top functions by cumulative time. The raw profile
+            is kept for get_profile and download.
+        profile_top: Number of functions listed in the profile summary (default 20)
+
+    Returns:
+        Output from the specified plugin or an error message.
+    """
+    if not profile:
+        return await execute_plugin(memory_dump_path, plugin_name, kw_args, no_cache=no_cache,
+                                    output_format=output_format, stream=stream, page_size=page_size,
+                                    filters=filters, columns=columns, priority=priority, ctx=ctx)
+
+    profile_id, profile_path = profile_store.new()
+    output = await execute_plugin(memory_dump_path, plugin_name, kw_args, no_cache=no_cache,
+                                  output_format=output_format, stream=stream, page_size=page_size,
+                                  filters=filters, columns=columns, priority=priority,
+                                  profile_path=profile_path, ctx=ctx)
+    try:
+        summary = await asyncio.to_thread(profile_store.summarize, profile_id, profile_top)
+    except (OSError, ValueError, EOFError) as e:
+        summary = f"Error: Could not read the profile: {str(e)}"
+    if summary is None:
+        # Timed-out, cancelled and rejected runs leave no profile
+        summary = "Error: The run produced no profile"
+    if output_format == "json":
+        try:
+            output = json.loads(output)
+        except ValueError:
+            pass
+    return json.dumps({"output": output, "profile": summary}, indent=2)
+
+@mcp.tool()
+async def run_plugins(memory_dump_path: str, plugins: list, os_type: str = 'windows',
+                      max_concurrency: int = None, no_cache: bool = False, output_format: str = 'text',
+                      page_size: int = None, priority: str = 'interactive', shared_process: bool = None,
+                      ctx: Context = None) -> str:
+    """
+    Run several plugins against one memory dump concurrently, e.g. a triage set such as
+    PsList, PsScan, NetScan, CmdLine, DllList, Malfind and SvcScan.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        plugins: Plugin names, or objects {"plugin": name, "kw_args": {...}}; identical entries run once
+        os_type: Optional 'windows', 'linux', or 'mac' (required for common plugins)
+        max_concurrency: Plugins of this batch running at once (defaults to VOLATILITY_BATCH_CONCURRENCY)
+        no_cache: Re-run the plugins even if cached results exist
+        output_format: 'text' or 'json', as for run_plugin
+        page_size: Rows per page for large results, as for run_plugin
+        priority: 'interactive' (default) or 'background', as for run_plugin
+        shared_process: Run the plugins that are not cached in one volatility process sharing
+            its layers and symbol tables, instead of one process each (subprocess backend;
+            defaults to VOLATILITY_SHARED_PROCESS). max_concurrency then does not apply to them.
+
+    Returns:
+        JSON object keyed by plugin name (followed by its arguments when given) holding each
+        plugin's output or error message
+    """
+    if not isinstance(plugins, list) or not plugins:
+        return "Error: plugins must be a non-empty list"
+
+    # Keyed by plugin and normalized arguments, so repeated entries collapse into one run
+    entries: Dict[str, Any] = {}
+    for item in plugins:
+        if isinstance(item, str):
+            name, args = item, {}
+        elif isinstance(item, dict) and isinstance(item.get("plugin"), str):
+            name, args = item["plugin"], item.get("kw_args") or {}
+        else:
+            return f"Error: Invalid plugins entry {json.dumps(item)}; use a name or {{\"plugin\": name, \"kw_args\": {{...}}}}"
+        key = f"{name} {json.dumps(args, sort_keys=True)}" if args else name
+        entries.setdefault(key, (name, args))
+
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    await asyncio.to_thread(fingerprinter.fingerprint, resolved_path)
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or VOLATILITY_BATCH_CONCURRENCY))
+
+    # Plugins that opt in share one process; the driver itself runs the first of them
+    # alone before the rest, so they need neither the semaphore nor a primer run
+    if shared_process is None:
+        shared_process = VOLATILITY_SHARED_PROCESS
+    shared_keys = []
+    if shared_process and volatility_runner.supports_batches:
+        shared_keys = [key for key, (name, _) in entries.items() if PluginFactory.shares_process(name)]
+    batch = None
+    if len(shared_keys) > 1:
+        batch = PluginBatch(volatility_runner, members=len(shared_keys),
+                            threads=VOLATILITY_SHARED_PROCESS_THREADS, priority=priority)
+    else:
+        shared_keys = []
+
+    async def run_entry(name: str, args: dict) -> str:
+        async with semaphore:
+            return await execute_plugin(resolved_path, name, args, no_cache=no_cache,
+                                        output_format=output_format, page_size=page_size,
+                                        priority=priority, ctx=ctx)
+
+    async def run_shared_entry(name: str, args: dict) -> str:
+        async with batch.member():
+            return await execute_plugin(resolved_path, name, args, no_cache=no_cache,
+                                        output_format=output_format, page_size=page_size,
+                                        priority=priority, batch=batch, ctx=ctx)
+
+    # Let one plugin do the automagic pass (layer stacking, symbol search) on its own, so the
+    # others start from the configuration it leaves in the automagic cache or the warm worker
+    pending = [(key, entry) for key, entry in entries.items() if key not in shared_keys]
+    outputs: Dict[str, str] = {}
+    image_pool = getattr(volatility_runner, "image_pool", None)
+    cold = (config_cache is not None and config_cache.lookup(resolved_path) is None) or (
+        image_pool is not None and image_pool.get(resolved_path) is None)
+    if len(pending) > 1 and cold and batch is None:
+        key, (name, args) = pending.pop(0)
+        outputs[key] = await run_entry(name, args)
+
+    results = await asyncio.gather(
+        *(run_shared_entry(*entries[key]) for key in shared_keys),
+        *(run_entry(name, args) for _, (name, args) in pending)
+    )
+    outputs.update(zip(shared_keys + [key for key, _ in pending], results))
+
+    combined = {}
+    for key in entries:
+        output = outputs[key]
+        if output_format == "json":
+            try:
+                output = json.loads(output)
+            except ValueError:
+                pass
+        combined[key] = output
+    return json.dumps(combined, indent=2)
+
+@mcp.tool()
+async def submit_plugin(memory_dump_path: str, plugin_name: str, os_type: str = 'windows', kw_args: dict = None,
+                        no_cache: bool = False, output_format: str = 'text', page_size: int = None,
+                        filters: dict = None, columns: list = None, priority: str = 'background',
+                        timeout: int = None) -> str:
+    """
+    Start a plugin as a background job and return its job ID at once, for long runs such as
+    timeliner.Timeliner, YaraScan or full-image scans on large dumps.
+
+    Follow the job with get_job_status, fetch the output with get_job_result, and stop it with
+    cancel_job.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        plugin_name: Name of the plugin to run.
+        os_type: Optional 'windows', 'linux', or 'mac' (required for common plugins)
+        kw_args, no_cache, output_format, page_size, filters, columns: As for run_plugin
+        priority: 'background' (default) or 'interactive', as for run_plugin
+        timeout: Seconds the plugin may run (defaults to VOLATILITY_JOB_TIMEOUT)
+
+    Returns:
+        JSON with the job ID and status, or an error message
+    """
+    if priority not in PRIORITIES:
+        return f"Error: Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}"
+    if resolve_memory_dump_path(memory_dump_path) is None:
+        return f"Error: Memory dump file not found at {memory_dump_path} or in {MEMORY_IMAGES_DIR}"
+    if plugin_name not in PluginFactory.list_plugins():
+        return f"Error: Plugin '{plugin_name}' not found"
+
+    async def work(job: Job) -> str:
+        # No client context: the job outlives the request that submitted it
+        return await execute_plugin(memory_dump_path, plugin_name, kw_args, no_cache=no_cache,
+                                    output_format=output_format, page_size=page_size, filters=filters,
+                                    columns=columns, priority=priority,
+                                    timeout=timeout or VOLATILITY_JOB_TIMEOUT, job=job)
+
+    job = job_manager.submit(f"{plugin_name} on {os.path.basename(memory_dump_path)}", work)
+    return json.dumps({"job_id": job.job_id, "status": job.status})
+
+@mcp.tool()
+async def get_job_status(job_id: str = None) -> str:
+    """
+    Report the state of a background job: status (queued, running, completed, failed or
+    cancelled), progress of the current volatility stage in percent, the stage name,
+    elapsed seconds and the estimated seconds until the stage completes; finished jobs also
+    report the peak RSS (bytes) and CPU seconds of their volatility process
+
+    Args:
+        job_id: Job to report on (all jobs if omitted)
+
+    Returns:
+        JSON with the job's state, or a list of all jobs
+    """
+    if job_id is None:
+        return json.dumps({"jobs": [job.to_dict() for job in job_manager.list()], **job_manager.stats()}, indent=2)
+    job = job_manager.get(job_id)
+    if job is None:
+        return f"Error: Unknown or expired job '{job_id}'"
+    return json.dumps(job.to_dict(), indent=2)
+
+@mcp.tool()
+async def get_job_result(job_id: str, wait: int = 0) -> str:
+    """
+    Fetch the output of a background job
+
+    Args:
+        job_id: Job ID returned by submit_plugin
+        wait: Seconds to wait for the job to finish if it has not yet (at most 300)
+
+    Returns:
+        The plugin output as run_plugin would return it, or the job's status if it is not finished
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return f"Error: Unknown or expired job '{job_id}'"
+    if not await job_manager.wait(job, min(max(wait, 0), 300)):
+        return json.dumps({"message": "Job has not finished yet", **job.to_dict()}, indent=2)
+    return job.result
+
+@mcp.tool()
+async def cancel_job(job_id: str) -> str:
+    """
+    Cancel a queued or running background job; its volatility process is stopped
+
+    Args:
+        job_id: Job ID returned by submit_plugin
+
+    Returns:
+        Confirmation or an error message
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return f"Error: Unknown or expired job '{job_id}'"
+    if not await job_manager.cancel(job):
+        return f"Error: Job {job_id} has already {job.status}"
+    return f"Job {job_id} cancelled"
+
+@mcp.tool()
+async def get_result_page(handle: str, cursor: str = None, page_size: int = None) -> str:
+    """
+    Fetch a further page of a large run_plugin result without re-running the plugin
+
+    Args:
+        handle: Result handle returned with the first page
+        cursor: Cursor of the page to fetch, as returned with the previous page (first page if omitted)
+        page_size: Rows per page (defaults to the server's page size)
+
+    Returns:
+        The page in the format of the original run_plugin call, or an error message
+    """
+    stored = result_store.get(handle)
+    if stored is None:
+        return f"Error: Unknown or expired result handle '{handle}'"
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        return f"Error: Invalid cursor '{cursor}'"
+    if offset < 0 or offset > stored.row_count:
+        return f"Error: Cursor '{cursor}' is outside the result ({stored.row_count} rows)"
+
+    page_size = page_size if page_size and page_size > 0 else (RESULT_PAGE_SIZE or 500)
+    return await asyncio.to_thread(result_store.render_page, stored, offset, page_size)
+
+@mcp.tool()
+async def get_scheduler_status() -> str:
+    """
+    Show the execution queue: running plugin runs, waiting calls with their queue position and wait time
+
+    Returns:
+        JSON with the scheduler's limits, running counts and queued calls
+    """
+    return json.dumps(scheduler.stats(), indent=2)
+
+@mcp.tool()
+async def get_profile(profile_id: str, top: int = 20, sort: str = "cumulative", raw: bool = False) -> str:
+    """
+    Summarize the profile of a run_plugin call made with profile=true, or fetch the raw profile
+
+    Args:
+        profile_id: The profile_id from the run_plugin result
+        top: Number of functions to list
+        sort: 'cumulative' (default), 'tottime' (own time) or 'ncalls'
+        raw: Also return the cProfile file, base64-encoded, for pstats or snakeviz
+            (over HTTP it can be downloaded from /profiles/<profile_id>)
+
+    Returns:
+        JSON with the profile summary, or an error message
+    """
+    try:
+        summary = await asyncio.to_thread(profile_store.summarize, profile_id, top, sort)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except (OSError, EOFError) as e:
+        return f"Error reading profile {profile_id}: {str(e)}"
+    if summary is None:
+        return f"Error: Unknown or expired profile '{profile_id}'"
+    if raw:
+        with open(profile_store.path(profile_id), "rb") as f:
+            summary["raw_base64"] = base64.b64encode(f.read()).decode("ascii")
+    return json.dumps(summary, indent=2)
+
+@mcp.tool()
+async def get_metrics(format: str = "json") -> str:
+    """
+    Server metrics: plugin run durations by plugin and OS, outcomes (success, failure, timeout),
+    peak RSS and CPU time, queue waits and depth, active volatility processes, result cache
+    hits/misses/evictions, background jobs, and tool calls with the bytes they returned
+
+    Args:
+        format: 'json' (default), or 'prometheus' for the text exposition format also served at /metrics
+
+    Returns:
+        The metrics in the requested format
+    """
+    if format == "prometheus":
+        return run_metrics.registry.render()
+    if format != "json":
+        return "Error: Unknown format. Use 'json' or 'prometheus'"
+    return json.dumps(run_metrics.registry.snapshot(), indent=2)
+
+@mcp.tool()
+async def estimate_plugin_cost(memory_dump_path: str, plugins: list = None, os_type: str = None) -> str:
+    """
+    Estimate how long plugins will take on a memory dump, from earlier runs of each plugin
+    scaled to the dump's size. Use it to run cheap plugins first and to submit_plugin the
+    expensive ones as background jobs.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        plugins: Plugin names to estimate (default: all plugins, limited to os_type if given)
+        os_type: Optional 'windows', 'linux', or 'mac' to limit the default plugin list
+
+    Returns:
+        JSON with the image size and, per plugin, the expected and p99 runtime in seconds, the
+        timeout a run would get and the number of runs the estimate is based on; cheapest
+        first, plugins without enough history last
+    """
+    resolved_path = resolve_memory_dump_path(memory_dump_path)
+    if resolved_path is None:
+        return f"Error: Memory dump file not found at {memory_dump_path} or in {MEMORY_IMAGES_DIR}"
+    if decompression_cache is not None:
+        # Estimate from the decompressed image if there is one; the archive size is a lower bound
+        resolved_path = decompression_cache.lookup(resolved_path) or resolved_path
+    available = PluginFactory.list_plugins()
+    if plugins is None:
+        plugins = [name for name in available if not os_type or os_family(name) in (os_type, "any")]
+    elif not isinstance(plugins, list):
+        return "Error: plugins must be a list of plugin names"
+    unknown = [name for name in plugins if name not in available]
+    if unknown:
+        return f"Error: Plugin(s) not found: {', '.join(unknown)}"
+
+    image_size = os.path.getsize(resolved_path)
+    image_os = config_cache.image_os(resolved_path) if config_cache is not None else None
+    estimated, unestimated = [], []
+    for name in plugins:
+        estimates = [runtime_history.estimate(plugin, image_size, image_os) for plugin in runtime_history.find(name)]
+        estimates = [estimate for estimate in estimates if estimate is not None]
+        if estimates:
+            best = max(estimates, key=lambda estimate: estimate.samples)
+            entry = {"name": name, **best.to_dict()}
+            if not VOLATILITY_ADAPTIVE_TIMEOUT:
+                entry["timeout"] = VOLATILITY_TIMEOUT
+            estimated.append(entry)
+        else:
+            unestimated.append({"name": name, "expected_seconds": None, "timeout": VOLATILITY_TIMEOUT})
+    estimated.sort(key=lambda entry: entry["expected_seconds"])
+    return json.dumps({
+        "path": resolved_path,
+        "size": image_size,
+        "adaptive_timeouts": VOLATILITY_ADAPTIVE_TIMEOUT,
+        "plugins": estimated + unestimated,
+    }, indent=2)
+
+@mcp.tool()
+async def fingerprint_memory_dump(memory_dump_path: str, full_hash: bool = False) -> str:
+    """
+    Get the identity of a memory dump as used by the server's caches
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        full_hash: Also compute the full SHA-256 in the background (returned by later calls once done)
+
+    Returns:
+        JSON with the sampled fingerprint, the size and the full SHA-256 if known; for a
+        compressed dump, those of the decompressed image plus the archive and its SHA-256
+    """
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    archive = None
+    original_path = resolve_memory_dump_path(memory_dump_path)
+    if original_path != resolved_path and decompression_cache is not None:
+        record = decompression_cache.info(original_path) or {}
+        archive = {"path": original_path, "format": record.get("format"),
+                   "sha256": record.get("archive_sha256")}
+
+    try:
+        fingerprint = await asyncio.to_thread(fingerprinter.fingerprint, resolved_path)
+        sha256 = fingerprinter.full_hash(resolved_path)
+        hashing = full_hash and sha256 is None and (
+            fingerprinter.start_full_hash(resolved_path) or fingerprinter.is_hashing(resolved_path)
+        )
+    except OSError as e:
+        return f"Error reading memory dump {resolved_path}: {str(e)}"
+
+    return json.dumps({
+        "path": resolved_path,
+        "size": os.path.getsize(resolved_path),
+        "fingerprint": fingerprint,
+        "sha256": sha256,
+        "sha256_in_progress": bool(hashing),
+        **({"archive": archive} if archive else {}),
+    }, indent=2)
+
+@mcp.tool()
+async def normalize_memory_dump(memory_dump_path: str, wait: int = 0) -> str:
+    """
+    Convert a LiME, AVML, ELF core, crash dump, VMware (vmem with vmss/vmsn) or hibernation
+    image to a raw physical layer that later plugin runs use instead, so volatility stops
+    re-parsing the container on every run. This happens on its own the first time a plugin
+    runs against such an image; this tool starts it up front and reports its state.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        wait: Seconds to wait for a running conversion to finish (at most 300)
+
+    Returns:
+        JSON with the container format and the state of the raw layer (raw, converting,
+        ready, failed or pending), its path and size once ready
+    """
+    if image_normalizer is None:
+        return "Error: Image normalization is disabled (NORMALIZE_IMAGES=false)"
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+
+    task = image_normalizer.submit(resolved_path)
+    if task is not None and wait > 0:
+        await asyncio.wait([task], timeout=min(wait, 300))
+    return json.dumps({"path": resolved_path, **image_normalizer.status(resolved_path),
+                       "budget": image_normalizer.stats()}, indent=2)
+
+@mcp.tool()
+async def scan_memory_dump(memory_dump_path: str, rules: str = None, rule_files: list = None,
+                           patterns: list = None, map_processes: bool = True, max_hits: int = None) -> str:
+    """
+    Scan the whole physical memory of a dump for YARA rules or byte patterns on all CPU cores,
+    much faster than the single-threaded YaraScan and RegExScan plugins, then map the hits to
+    the processes and virtual addresses that own them with one volatility pass.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        rules: YARA rule source text (requires the yara-python package)
+        rule_files: Paths of YARA rule files
+        patterns: Python regular expressions matched against raw bytes (e.g. "https?://[ -~]{4,64}"),
+            or YARA-style hex strings such as "{4D 5A ?? 00}"
+        map_processes: Look up the owning processes (PID, name, virtual address) of each hit
+        max_hits: Stop after this many hits, keeping those at the lowest offsets (default MEMSCAN_MAX_HITS)
+
+    Returns:
+        JSON with scan statistics and the hits sorted by physical offset, each with the
+        matched pattern or rule and string, the matched bytes (hex) and its owners
+    """
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    try:
+        report = await memory_scanner.scan(resolved_path, rules=rules, rule_files=rule_files, patterns=patterns,
+                                           max_hits=max_hits, map_processes=map_processes)
+    except (OSError, ValueError) as e:
+        return f"Error: {str(e)}"
+    return json.dumps(report, indent=2)
+
+@mcp.tool()
+async def index_memory_dump(memory_dump_path: str, wait: int = 0) -> str:
+    """
+    Index, in one parallel pass over a dump, the pages holding the pool tags and MFT record
+    headers that PsScan, FileScan, NetScan, SvcScan and MFTScan (with ADS and ResidentData)
+    search for. Once indexed, those plugins scan only these pages instead of the whole image,
+    with the same output. Images are indexed in the background the first time one of the
+    plugins runs on them; this tool starts it up front and reports the index.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        wait: Seconds to wait for the index to be built (at most 300)
+
+    Returns:
+        JSON with the index state (building or ready) and, once ready, the occurrences
+        and pages of each signature
+    """
+    if scan_index is None:
+        return "Error: Scan indexing is disabled (SCAN_INDEX=false)"
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    if image_normalizer is not None:
+        # Container images are indexed through their raw layer
+        raw_path = await asyncio.to_thread(image_normalizer.lookup, resolved_path)
+        if raw_path is not None:
+            resolved_path = raw_path
+    if detect_container(resolved_path) is not None:
+        return (f"Error: {resolved_path} is a container image; only raw layers can be indexed "
+                f"(convert it with normalize_memory_dump first)")
+
+    task = scan_index.submit(resolved_path)
+    if task is not None and wait > 0:
+        await asyncio.wait([task], timeout=min(wait, 300))
+    if task is not None and task.done() and not task.cancelled() and task.exception() is not None:
+        return f"Error: Could not index {resolved_path}: {str(task.exception())}"
+    info = await asyncio.to_thread(scan_index.info, resolved_path)
+    if info is None:
+        return json.dumps({"path": resolved_path, "state": "building", "totals": scan_index.stats()}, indent=2)
+    return json.dumps({"state": "ready", **info, "totals": scan_index.stats()}, indent=2)
+
+@mcp.tool()
+async def resolve_symbols(memory_dump_path: str, refresh: bool = False) -> str:
+    """
+    Report which symbol file (ISF) volatility will use for a memory dump, before running any
+    plugin. The image is scanned on all cores for Windows kernel PDB records (name, GUID and
+    age) and Linux or macOS version banners, which are looked up in the index of SYMBOLS_DIR.
+    Symbol files found are decompressed ahead of the runs that follow.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+        refresh: Re-read the symbols directory even if it looks unchanged
+
+    Returns:
+        JSON with the resolved ISF path (null if none matches) and every kernel identifier
+        found, with its offset, occurrences, matching ISF and whether that ISF is decompressed
+    """
+    if symbol_index is None:
+        return "Error: Symbol indexing is disabled (SYMBOL_INDEX=false)"
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    try:
+        if refresh:
+            await symbol_index.refresh(force=True)
+        report = await symbol_index.resolve_image(resolved_path)
+    except (OSError, ValueError) as e:
+        return f"Error: {str(e)}"
+    if report["resolved"] is None:
+        if any(candidate["os"] == "windows" for candidate in report["candidates"]):
+            report["note"] = ("No ISF in SYMBOLS_DIR matches; volatility will try to download the PDB from "
+                              "the Microsoft symbol server and convert it")
+        elif report["candidates"]:
+            report["note"] = "No ISF in SYMBOLS_DIR matches; generate one for this kernel with dwarf2json"
+        else:
+            report["note"] = "No Windows, Linux or macOS kernel identifier found in the image"
+    report["symbol_index"] = symbol_index.stats()
+    return json.dumps(report, indent=2)
+
+@mcp.tool()
+async def sparsify_memory_dump(memory_dump_path: str) -> str:
+    """
+    Store the zero-filled pages of a memory dump as holes, reclaiming their disk space.
+    The file reads back byte for byte the same, so plugin results and fingerprints are
+    unaffected. Downloaded dumps are written this way already; with SPARSE_IMAGES=all,
+    local images are processed the first time a plugin runs on them.
+
+    Args:
+        memory_dump_path: Full path to the memory dump file OR just the filename if it exists in /tmp/memimages/
+
+    Returns:
+        JSON with the image size, zero bytes found, disk bytes before and after and the
+        bytes reclaimed
+    """
+    if image_sparsifier is None:
+        return "Error: Sparse image storage is disabled (SPARSE_IMAGES=off)"
+    resolved_path = await prepare_memory_dump(memory_dump_path)
+    if resolved_path.startswith("Error"):
+        return resolved_path
+    try:
+        report = await image_sparsifier.sparsify(resolved_path)
+    except OSError as e:
+        return f"Error: Could not rewrite {resolved_path} as a sparse file: {str(e)}"
+    return json.dumps({**report, "totals": image_sparsifier.stats()}, indent=2)
+
 @mcp.tool()
 async def list_memory_dumps(search_dir: str = None) -> str:
     """
@@ -251,10 +1191,16 @@ async def list_memory_dumps(search_dir: str = None) -> str:
         memory_files = []
         for root, _, files in os.walk(search_dir):
             for file in files:
-                if any(file.lower().endswith(ext) for ext in memory_extensions):
+                name = file.lower()
+                compressed = name.endswith(COMPRESSED_SUFFIXES)
+                if compressed and not name.endswith(".zip"):
+                    # e.g. win10.raw.gz
+                    name = os.path.splitext(name)[0]
+                if any(name.endswith(ext) for ext in memory_extensions) or name.endswith(".zip"):
                     full_path = os.path.join(root, file)
                     size_mb = os.path.getsize(full_path) / (1024 * 1024)
-                    memory_files.append(f"{full_path} (Size: {size_mb:.2f} MB)")
+                    note = ", compressed" if compressed else ""
+                    memory_files.append(f"{full_path} (Size: {size_mb:.2f} MB{note})")
         
         if memory_files:
             all_memory_files.append(f"\n=== Memory dumps in {search_dir} ===")
@@ -276,9 +1222,9 @@ async def download_memory_dump(url: str, filename: str = None) -> str:
 
     Returns:
         Status message indicating success or failure with the saved file path
+        (and, with SPARSE_IMAGES enabled, the disk space saved on zero pages)
     """
     import aiohttp
-    import aiofiles
     from urllib.parse import urlparse
     
     try:
@@ -304,6 +1250,7 @@ async def download_memory_dump(url: str, filename: str = None) -> str:
             return f"File already exists at {destination_path} (Size: {size_mb:.2f} MB). Use a different filename if you want to download it again."
         
         logger.info(f"Downloading memory dump from {url} to {destination_path}")
+        started = time.monotonic()
         
         # Download the file
         async with aiohttp.ClientSession() as session:
@@ -313,27 +1260,43 @@ async def download_memory_dump(url: str, filename: str = None) -> str:
                 # Get the total file size if available
                 total_size = int(response.headers.get('content-length', 0))
                 
-                # Stream download to file
-                async with aiofiles.open(destination_path, 'wb') as file:
+                # Stream download to file, skipping zero pages so they become holes
+                with open(destination_path, 'wb') as file:
+                    writer = SparseWriter(file) if image_sparsifier is not None else file
                     downloaded = 0
-                    chunk_size = 8192
+                    chunk_size = 64 * 1024
+                    pending = bytearray()
                     
                     async for chunk in response.content.iter_chunked(chunk_size):
-                        await file.write(chunk)
+                        pending += chunk
                         downloaded += len(chunk)
+                        if len(pending) >= 4 * 1024 * 1024:
+                            # Page scanning and disk writes happen off the event loop
+                            await asyncio.to_thread(writer.write, bytes(pending))
+                            pending.clear()
                         
                         # Log progress every 10MB
-                        if downloaded % (10 * 1024 * 1024) < chunk_size:
+                        if downloaded % (10 * 1024 * 1024) < len(chunk):
                             if total_size:
                                 progress = (downloaded / total_size) * 100
                                 logger.info(f"Download progress: {progress:.1f}% ({downloaded / (1024*1024):.1f} MB / {total_size / (1024*1024):.1f} MB)")
                             else:
                                 logger.info(f"Downloaded: {downloaded / (1024*1024):.1f} MB")
+                    await asyncio.to_thread(writer.write, bytes(pending))
+                    await asyncio.to_thread(writer.close)
         
         # Verify the file was created and get its size
         if os.path.exists(destination_path):
             size_mb = os.path.getsize(destination_path) / (1024 * 1024)
-            return f"Successfully downloaded memory dump to {destination_path} (Size: {size_mb:.2f} MB)"
+            message = f"Successfully downloaded memory dump to {destination_path} (Size: {size_mb:.2f} MB)"
+            if image_sparsifier is not None:
+                report = image_sparsifier.record(SparseReport(
+                    destination_path, writer.size, writer.size, allocated_bytes(destination_path),
+                    writer.zero_bytes, "download", round(time.monotonic() - started, 2)
+                ))
+                message += (f"; {report['zero_bytes'] / (1024 * 1024):.2f} MB of zero pages stored as holes, "
+                            f"{report['reclaimed_bytes'] / (1024 * 1024):.2f} MB of disk saved")
+            return message
         else:
             return f"Error: File was not created at {destination_path}"
             
@@ -403,6 +1366,8 @@ async def download_symbols(symbol_type: str = "windows") -> str:
 
         # Clean up zip file
         os.remove(destination)
+        if symbol_index is not None:
+            symbol_index.submit_refresh()
 
         return f"Successfully downloaded and extracted {symbol_type} symbols."
     except Exception as e:
@@ -416,14 +1381,15 @@ if __name__ == "__main__":
     logger.info(f"Using Volatility script: {VOLATILITY_SCRIPT}")
     logger.info(f"Symbols directory: {SYMBOLS_DIR}")
     logger.info(f"Memory images directory: {MEMORY_IMAGES_DIR}")
+    logger.info(f"Execution backend: {VOLATILITY_BACKEND}")
 
     # Ensure directories exist
     os.makedirs(VOLATILITY_DIR, exist_ok=True)
     os.makedirs(SYMBOLS_DIR, exist_ok=True)
     os.makedirs(MEMORY_IMAGES_DIR, exist_ok=True)
 
-    # Check if the volatility script exists
-    if not os.path.isfile(VOLATILITY_SCRIPT):
+    # Check if the volatility script exists (the in-process backend imports volatility3 directly)
+    if VOLATILITY_BACKEND != "inprocess" and not os.path.isfile(VOLATILITY_SCRIPT):
         logger.error(f"Volatility script not found at {VOLATILITY_SCRIPT}")
         sys.exit(1)
 